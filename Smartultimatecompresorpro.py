@@ -1,87 +1,4875 @@
 import os
+import re
 import sys
 import math
 import subprocess
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, simpledialog
+import argparse
+import json
+import io
+import contextlib
 import logging
 import threading
+import time
 import zipfile
+import zlib
+import importlib
+import importlib.util
+import shutil
+import tempfile
+import struct
 import uuid
+import hashlib
+import random
+import queue
+import bisect
+import fnmatch
+import glob
+import mmap
+from collections import Counter, deque
 
-# For .tar
-try:
-    import tarfile
-    TAR_AVAILABLE = True
-except ImportError:
-    TAR_AVAILABLE = False
-
-# For .7z
-try:
-    import py7zr
-    SEVENZ_AVAILABLE = True
-except ImportError:
-    SEVENZ_AVAILABLE = False
-
-# For .xz
-try:
-    import lzma
-    LZMA_AVAILABLE = True
-except ImportError:
-    LZMA_AVAILABLE = False
-
-# Attempt to import Qiskit only if you want quantum circuit placeholders
-try:
-    from qiskit import IBMQ, QuantumCircuit, transpile
-    from qiskit.providers.ibmq import least_busy
-    QISKIT_AVAILABLE = True
-except ImportError:
-    QISKIT_AVAILABLE = False
-
-# pydrive2 for Google Drive integration
-try:
+#########################
+#   Optional Backends (imported lazily)
+#########################
+# Codecs and cloud providers are imported on first use, not at start-up: most runs
+# only need zip, and qiskit/py7zr alone cost far more than the rest of the program.
+# Availability is checked with find_spec, which locates a module without running it.
+BACKENDS = {
+    "tarfile": "tarfile",        # .tar
+    "py7zr": "py7zr",            # .7z
+    "lzma": "lzma",              # .xz
+    "zstandard": "zstandard",    # .zst
+    "brotli": "brotli",          # .br
+    "lz4": "lz4.block",          # fastest tier of the adaptive engine
+    "xxhash": "xxhash",          # integrity digests (xxh3)
+    "blake3": "blake3",          # integrity digests when xxhash is missing
+    "qiskit": "qiskit",          # quantum circuit placeholders
+    "pydrive2": "pydrive2",      # Google Drive integration
+}
+
+
+def backend_available(name):
+    top_level = BACKENDS.get(name, name).split(".")[0]
+    try:
+        return importlib.util.find_spec(top_level) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def backend_status():
+    return {name: backend_available(name) for name in BACKENDS}
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return getattr(self._module, attr)
+
+
+tarfile = LazyModule(BACKENDS["tarfile"])
+py7zr = LazyModule(BACKENDS["py7zr"])
+lzma = LazyModule(BACKENDS["lzma"])
+zstd = LazyModule(BACKENDS["zstandard"])
+brotli = LazyModule(BACKENDS["brotli"])
+lz4_block = LazyModule(BACKENDS["lz4"])
+xxhash = LazyModule(BACKENDS["xxhash"])
+blake3 = LazyModule(BACKENDS["blake3"])
+
+TAR_AVAILABLE = backend_available("tarfile")
+SEVENZ_AVAILABLE = backend_available("py7zr")
+LZMA_AVAILABLE = backend_available("lzma")
+ZSTD_AVAILABLE = backend_available("zstandard")
+BROTLI_AVAILABLE = backend_available("brotli")
+LZ4_AVAILABLE = backend_available("lz4")
+XXHASH_AVAILABLE = backend_available("xxhash")
+BLAKE3_AVAILABLE = backend_available("blake3")
+QISKIT_AVAILABLE = backend_available("qiskit")
+PYDRIVE_AVAILABLE = backend_available("pydrive2")
+
+# Tkinter is loaded by load_tkinter() when the GUI starts, so the compress()/extract()
+# API and the command line work on machines without a display or Tk installed.
+tk = filedialog = messagebox = ttk = simpledialog = None
+
+
+def load_tkinter():
+    global tk, filedialog, messagebox, ttk, simpledialog
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk, simpledialog
+
+#########################
+# Logging Setup
+#########################
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+#########################
+#   THEMING / SKINS
+#########################
+THEMES = {
+    "Default": {
+        "bg_color": "#f0f0f0",
+        "fg_color": "#000000",
+        "progress_bg": "#ffffff"
+    },
+    "Dark": {
+        "bg_color": "#333333",
+        "fg_color": "#ffffff",
+        "progress_bg": "#555555"
+    },
+    "Rainbow": {
+        "bg_color": "#ffb3ba",
+        "fg_color": "#004d00",
+        "progress_bg": "#ffffba"
+    },
+    "HighContrast": {
+        "bg_color": "#000000",
+        "fg_color": "#ffed00",
+        "progress_bg": "#ffffff"
+    },
+    "CustomImage": {
+        "bg_color": None,
+        "fg_color": "#ffffff",
+        "progress_bg": "#ffffff"
+    }
+}
+CURRENT_THEME = "Default"
+
+#########################
+#   Streaming Helpers
+#########################
+# Size of the reusable buffer used when copying file data into archives.
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+
+def stream_copy(f_in, f_out, buffer, progress=None):
+    """
+    Copy f_in into f_out through a caller-owned buffer, so memory stays flat
+    no matter how large the input is. progress(nbytes) is called per chunk.
+    """
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        n = f_in.readinto(buffer)
+        if not n:
+            break
+        f_out.write(view[:n])
+        total += n
+        if progress:
+            progress(n)
+    return total
+
+
+def map_file(f):
+    """
+    Read-only mmap of an open file, or None where that isn't possible (empty
+    files, pipes, no address space left); callers then fall back to readinto().
+    """
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        return None
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+
+def release_pages(mm, offset, length):
+    """Drop an already processed range of a mapping from our RSS; the data stays in the page cache."""
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+        start = offset - offset % mmap.PAGESIZE
+        mm.madvise(mmap.MADV_DONTNEED, start, offset + length - start)
+
+
+def close_mapping(mm):
+    try:
+        mm.close()
+    except BufferError:
+        pass  # a view of it is still alive somewhere; the mapping closes when that goes
+
+
+def file_slices(path, slice_size, start=0, length=None):
+    """
+    Yield memoryviews of consecutive slice_size pieces of [start, start+length)
+    of path. They come straight from an mmap when possible, so nothing is copied
+    and processed pages leave RSS; otherwise readinto() fills one reused buffer.
+    Each view is only valid until the next one is requested.
+    """
+    end = os.path.getsize(path) if length is None else start + length
+    with open(path, 'rb') as f:
+        mm = map_file(f)
+        if mm is not None:
+            try:
+                if end > len(mm):
+                    raise ValueError(f"{os.path.basename(path)} shrank while it was being read")
+                for offset in range(start, end, slice_size):
+                    n = min(slice_size, end - offset)
+                    with memoryview(mm)[offset:offset + n] as view:
+                        yield view
+                    release_pages(mm, offset, n)
+            finally:
+                close_mapping(mm)
+            return
+        buffer = memoryview(bytearray(min(slice_size, max(end - start, 1))))
+        f.seek(start)
+        offset = start
+        while offset < end:
+            n = f.readinto(buffer[:min(slice_size, end - offset)])
+            if not n:
+                raise ValueError(f"{os.path.basename(path)} shrank while it was being read")
+            yield buffer[:n]
+            offset += n
+
+
+def log_throughput(label, nbytes, elapsed):
+    mb = nbytes / (1024 * 1024)
+    rate = mb / elapsed if elapsed > 0 else 0.0
+    logging.info(f"{label}: {mb:.1f} MB in {elapsed:.2f}s ({rate:.1f} MB/s)")
+
+#########################
+#   Progress Tracking
+#########################
+# Seconds between samples taken by the GUI poller and status reporters.
+PROGRESS_INTERVAL = 0.25
+
+
+class ProgressTracker:
+    """
+    Byte counter shared by worker threads. Each thread adds to its own slot, so
+    counting takes no lock and never touches the UI; readers sum the slots when
+    they sample. A tracker is itself a progress(nbytes) callback, so it can be
+    handed to any engine function. output_size() returns the bytes written so
+    far, for the ratio; forward(nbytes) is an optional downstream callback.
+    """
+
+    def __init__(self, total_bytes=0, output_size=None, label="", forward=None):
+        self.total_bytes = total_bytes
+        self.output_size = output_size
+        self.label = label
+        self.forward = forward
+        self.started = time.perf_counter()
+        self._slots = []
+        self._local = threading.local()
+        self._register = threading.Lock()
+        self._stop = None
+        self._reporter = None
+        self._callback = None
+
+    def __call__(self, nbytes):
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            # First report from this thread; only the registration is locked.
+            slot = self._local.slot = [0]
+            with self._register:
+                self._slots.append(slot)
+        slot[0] += nbytes
+        if self.forward:
+            self.forward(nbytes)
+
+    def check(self):
+        """Raise if the job this tracker reports to was cancelled; engines call it between blocks."""
+        check = getattr(self.forward, "check", None)
+        if check:
+            check()
+
+    @property
+    def done_bytes(self):
+        return sum(slot[0] for slot in list(self._slots))
+
+    def snapshot(self):
+        """Counters plus MB/s, output/input ratio (None when unknown) and ETA in seconds."""
+        done = self.done_bytes
+        elapsed = time.perf_counter() - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        output = self.output_size() if self.output_size else None
+        return {
+            "label": self.label,
+            "done_bytes": done,
+            "total_bytes": self.total_bytes,
+            "fraction": min(done / self.total_bytes, 1.0) if self.total_bytes else 0.0,
+            "seconds": elapsed,
+            "mb_per_s": rate / (1024 * 1024),
+            "ratio": output / done if output is not None and done else None,
+            "eta_s": max(self.total_bytes - done, 0) / rate if rate > 0 and self.total_bytes else None,
+        }
+
+    def report_every(self, callback, interval=PROGRESS_INTERVAL):
+        """Call callback(snapshot) from a background thread every interval seconds until stop()."""
+        self._stop = threading.Event()
+
+        def loop():
+            while not self._stop.wait(interval):
+                callback(self.snapshot())
+
+        self._callback = callback
+        self._reporter = threading.Thread(target=loop, daemon=True)
+        self._reporter.start()
+
+    def stop(self):
+        """End report_every; the callback gets one final snapshot."""
+        if self._reporter:
+            self._stop.set()
+            self._reporter.join()
+            self._reporter = None
+            self._callback(self.snapshot())
+
+
+def output_size_probe(path):
+    """An output_size for ProgressTracker: how far the file at path has grown."""
+    def probe():
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    return probe
+
+
+def format_progress(snapshot):
+    """One status line, e.g. 'Compressing: 42% | 180.3 MB/s | ratio 0.31 | ETA 0:12'."""
+    parts = [f"{snapshot['fraction']:.0%}"] if snapshot["total_bytes"] else []
+    parts.append(f"{snapshot['mb_per_s']:.1f} MB/s")
+    if snapshot["ratio"] is not None:
+        parts.append(f"ratio {snapshot['ratio']:.2f}")
+    if snapshot["eta_s"] is not None:
+        minutes, seconds = divmod(int(snapshot["eta_s"]), 60)
+        parts.append(f"ETA {minutes}:{seconds:02d}")
+    text = " | ".join(parts)
+    return f"{snapshot['label']}: {text}" if snapshot["label"] else text
+
+
+def progress_check(progress):
+    """
+    progress's check() (see JobControl), for engines that do work between
+    progress reports; a no-op for plain callbacks.
+    """
+    return getattr(progress, "check", None) or (lambda: None)
+
+
+def job_cancelled(progress):
+    """True if progress, or a callback it forwards to, belongs to a cancelled job."""
+    while progress is not None:
+        if getattr(progress, "cancelled", False):
+            return True
+        progress = getattr(progress, "forward", None)
+    return False
+
+
+@contextlib.contextmanager
+def worker_pool(executor):
+    """
+    `with executor:`, except that leaving on an error (a cancelled job, a failed
+    task) drops the queued work instead of running all of it first.
+    """
+    try:
+        yield executor
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        raise
+    executor.shutdown()
+
+#########################
+#   Parallel ZIP Engine
+#########################
+# Default worker process count for the parallel engine.
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Members larger than this are deflated as several independent blocks.
+PARALLEL_BLOCK_SIZE = 16 * 1024 * 1024
+# Each block is primed with the tail of the previous one (deflate window size).
+DEFLATE_WINDOW = 32 * 1024
+
+
+def _gf2_matrix_times(mat, vec):
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+
+def _gf2_matrix_square(mat):
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+# _CRC32_ZERO_OPERATORS[k] advances a CRC32 over 2**k zero bytes; built on first use.
+_CRC32_ZERO_OPERATORS = None
+
+
+def _crc32_zero_operators():
+    global _CRC32_ZERO_OPERATORS
+    if _CRC32_ZERO_OPERATORS is None:
+        one_bit = [0xEDB88320] + [1 << n for n in range(31)]
+        operators = [_gf2_matrix_square(_gf2_matrix_square(_gf2_matrix_square(one_bit)))]
+        while len(operators) < 64:
+            operators.append(_gf2_matrix_square(operators[-1]))
+        _CRC32_ZERO_OPERATORS = operators
+    return _CRC32_ZERO_OPERATORS
+
+
+def crc32_combine(crc1, crc2, len2):
+    """
+    CRC32 of A+B given crc32(A), crc32(B) and len(B). Port of zlib's crc32_combine,
+    which Python's zlib module doesn't expose, with the squared operators cached
+    so a call costs a few matrix-vector products.
+    """
+    operators = _crc32_zero_operators()
+    k = 0
+    while len2 > 0:
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(operators[k], crc1)
+        len2 >>= 1
+        k += 1
+    return crc1 ^ crc2
+
+
+def _deflate_block(job):
+    """
+    Worker: raw-deflate one block of a file into its own temp file.
+    Non-final blocks end on a sync flush so the pieces can simply be concatenated.
+    """
+    file_path, offset, length, level, is_last, tmp_path = job
+    crc = 0
+    done = 0
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, 'rb') as f_in, open(tmp_path, 'wb') as f_out:
+        if offset:
+            start = max(0, offset - DEFLATE_WINDOW)
+            f_in.seek(start)
+            zdict = f_in.read(offset - start)
+            comp = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+        else:
+            comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+        while done < length:
+            n = f_in.readinto(view[:min(len(buffer), length - done)])
+            if not n:
+                break
+            crc = zlib.crc32(view[:n], crc)
+            f_out.write(comp.compress(view[:n]))
+            done += n
+        f_out.write(comp.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH))
+        compressed = f_out.tell()
+    return tmp_path, crc, done, compressed
+
+
+def plan_blocks(file_size, block_size=None):
+    """Split a member into (offset, length) blocks; empty files still get one block."""
+    block_size = block_size or PARALLEL_BLOCK_SIZE
+    if file_size <= block_size:
+        return [(0, file_size)]
+    return [(off, min(block_size, file_size - off)) for off in range(0, file_size, block_size)]
+
+
+def zip_begin_raw_member(zf, zinfo, zip64):
+    """
+    Start a member whose data the caller writes already compressed.
+    zipfile has no public API for this, so we mirror what ZipFile.open('w') does.
+    """
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader(zip64))
+
+
+def zip_end_raw_member(zf, zinfo, zip64):
+    """Rewrite the local header with the final CRC/sizes and register the member."""
+    end = zf.fp.tell()
+    zf.fp.seek(zinfo.header_offset)
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.seek(end)
+    zf.start_dir = end
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+
+
+def parallel_zip(selected_files, out_path, level=5, workers=DEFAULT_WORKERS, progress=None):
+    """
+    Deflate members (and blocks of large members) across a process pool into temp
+    files, while this process writes them in order into a standard ZIP.
+    At most a few blocks per worker are in flight, which bounds temp disk usage.
+    """
+    with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        return parallel_zip_into(zf, selected_files, level, workers, progress)
+
+
+def parallel_zip_into(zf, selected_files, level=5, workers=DEFAULT_WORKERS, progress=None):
+    """parallel_zip's engine: append the files as members of an already open ZipFile."""
+    tmp_dir = tempfile.mkdtemp(prefix=".usc_", dir=os.path.dirname(os.path.abspath(zf.filename)))
+    jobs = []
+    for file_path in selected_files:
+        blocks = plan_blocks(os.path.getsize(file_path))
+        for idx, (offset, length) in enumerate(blocks):
+            tmp_path = os.path.join(tmp_dir, f"{len(jobs)}.deflate")
+            jobs.append((file_path, offset, length, level, idx == len(blocks) - 1, tmp_path))
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    job_iter = iter(jobs)
+    window = max(1, workers) * 4
+    total = 0
+    try:
+        with worker_pool(ProcessPoolExecutor(max_workers=max(1, workers))) as pool:
+
+            def next_result():
+                for job in job_iter:
+                    pending.append(pool.submit(_deflate_block, job))
+                    if len(pending) >= window:
+                        break
+                return pending.popleft().result()
+
+            for file_path in selected_files:
+                zinfo = zipfile.ZipInfo.from_file(file_path, os.path.basename(file_path))
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zinfo.CRC = zinfo.compress_size = 0
+                zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+                zip_begin_raw_member(zf, zinfo, zip64)
+                crc = 0
+                file_size = 0
+                compress_size = 0
+                for _ in plan_blocks(zinfo.file_size):
+                    tmp_path, block_crc, length, compressed = next_result()
+                    with open(tmp_path, 'rb') as f_block:
+                        shutil.copyfileobj(f_block, zf.fp, STREAM_BUFFER_SIZE)
+                    os.remove(tmp_path)
+                    crc = crc32_combine(crc, block_crc, length)
+                    file_size += length
+                    compress_size += compressed
+                    if progress:
+                        progress(length)
+                zinfo.CRC = crc
+                zinfo.file_size = file_size
+                zinfo.compress_size = compress_size
+                zip_end_raw_member(zf, zinfo, zip64)
+                total += file_size
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return total
+
+
+#########################
+#   Stream Codecs (zstd / brotli)
+#########################
+# File extension written for each algorithm in the dropdown.
+ALGO_EXTENSIONS = {"zstd": "zst", "brotli": "br"}
+# Largest window a .zst with long-distance matching may need on decompression.
+ZSTD_MAX_WINDOW = 1 << 31
+
+
+class BrotliWriter:
+    """Minimal file-like wrapper so brotli can be fed through stream_copy/tarfile."""
+
+    def __init__(self, f_out, quality=5):
+        self.f_out = f_out
+        self.compressor = brotli.Compressor(quality=quality, lgwin=24)
+
+    def write(self, data):
+        out = self.compressor.process(data)
+        if out:
+            self.f_out.write(out)
+        return len(data)
+
+    def close(self):
+        self.f_out.write(self.compressor.finish())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BrotliReader:
+    """
+    Streaming brotli decoder exposing read/readinto. Output per step is capped where
+    the installed brotli supports output_buffer_limit, so memory stays bounded.
+    Brotli can't find the boundary between concatenated streams by itself, so
+    split parts pass `ends`, the offsets where each part's stream stops.
+    """
+
+    def __init__(self, f_in, ends=None):
+        self.f_in = f_in
+        self.ends = list(ends) if ends else [None]
+        self.decompressor = brotli.Decompressor()
+        self.bounded = hasattr(self.decompressor, "can_accept_more_data")
+        self.pending = b""
+        self.pos = 0
+        self.eof = False
+
+    def _next_stream(self):
+        if len(self.ends) < 2:
+            return False
+        self.ends.pop(0)
+        self.decompressor = brotli.Decompressor()
+        self.eof = False
+        return True
+
+    def _fill(self):
+        d = self.decompressor
+        data = b""
+        if not self.bounded or d.can_accept_more_data():
+            want = STREAM_BUFFER_SIZE
+            if self.ends[0] is not None:
+                want = min(want, self.ends[0] - self.f_in.tell())
+            data = b"" if self.eof or want <= 0 else self.f_in.read(want)
+            if not data:
+                self.eof = True
+                if not self.bounded:
+                    return b""
+        if self.bounded:
+            # Even with all input consumed, the decoder may still hold capped output.
+            return d.process(data, output_buffer_limit=STREAM_BUFFER_SIZE)
+        return d.process(data)
+
+    def read(self, size=-1):
+        out = []
+        want = size
+        while want != 0:
+            if self.pos >= len(self.pending):
+                if self.decompressor.is_finished():
+                    if self._next_stream():
+                        continue
+                    break
+                self.pending, self.pos = self._fill(), 0
+                if not self.pending and self.eof:
+                    if self._next_stream():
+                        continue
+                    break
+                continue
+            end = len(self.pending) if want < 0 else min(len(self.pending), self.pos + want)
+            out.append(self.pending[self.pos:end])
+            if want > 0:
+                want -= end - self.pos
+            self.pos = end
+        return b"".join(out)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class PrefixedReader:
+    """Replays bytes already read from a stream before continuing with the stream itself."""
+
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        if size < 0:
+            out, self.head = self.head + self.stream.read(), b""
+            return out
+        out, self.head = self.head[:size], self.head[size:]
+        return out
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class ProgressReader:
+    """Wraps a readable file and reports every read to progress(nbytes)."""
+
+    def __init__(self, f_in, progress):
+        self.f_in = f_in
+        self.progress = progress
+
+    def read(self, size=-1):
+        data = self.f_in.read(size)
+        if data and self.progress:
+            self.progress(len(data))
+        return data
+
+    def close(self):
+        self.f_in.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def looks_like_tar(head):
+    return len(head) >= 262 and head[257:262] == b"ustar"
+
+
+def untar_stream(stream, out_dir, members=None):
+    """
+    Unpack a forward-only tar stream, or only the members matching the glob
+    patterns in members. Returns the paths written.
+    """
+    with tarfile.open(fileobj=stream, mode='r|', bufsize=STREAM_BUFFER_SIZE) as tf:
+        if members is None:
+            tf.extractall(path=out_dir)
+            return [os.path.join(out_dir, n) for n in tf.getnames()]
+        written = []
+        for info in tf:
+            if member_matches(info.name, members):
+                tf.extract(info, out_dir)
+                written.append(os.path.join(out_dir, info.name))
+        return written
+
+
+def open_stream_writer(algo, f_out, level=5, workers=1, long_distance=False, size=-1, check=None):
+    """
+    Return a writable compressor for 'zstd', 'brotli' or 'xz' on top of f_out.
+    zstd runs its native multithreaded mode when workers > 1 and ends each frame
+    with an XXH64 checksum of its content; xz compresses independent blocks on
+    `workers` threads, each with its own check, calling check() between blocks.
+    """
+    if algo == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Install zstandard to handle .zst.")
+        kwargs = {"threads": workers if workers > 1 else 0, "write_checksum": True}
+        if long_distance:
+            kwargs.update(enable_ldm=True, window_log=27)
+        params = zstd.ZstdCompressionParameters.from_level(level, **kwargs)
+        cctx = zstd.ZstdCompressor(compression_params=params)
+        return cctx.stream_writer(f_out, size=size, closefd=False)
+    if algo == "brotli":
+        if not BROTLI_AVAILABLE:
+            raise RuntimeError("Install brotli to handle .br.")
+        return BrotliWriter(f_out, quality=level)
+    if algo == "xz":
+        if not LZMA_AVAILABLE:
+            raise RuntimeError("Install python-lzma or ensure it's available to handle .xz.")
+        return XzBlockWriter(f_out, level, workers, check=check)
+    raise ValueError(f"Unsupported stream algorithm: {algo}")
+
+
+def open_stream_reader(algo, f_in):
+    if algo == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Install zstandard to handle .zst.")
+        dctx = zstd.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW)
+        return dctx.stream_reader(f_in, read_across_frames=True, closefd=False)
+    if algo == "brotli":
+        if not BROTLI_AVAILABLE:
+            raise RuntimeError("Install brotli to handle .br.")
+        if isinstance(f_in, ConcatenatedFile):
+            return BrotliReader(f_in, f_in.starts[1:] + [f_in.size])
+        return BrotliReader(f_in)
+    raise ValueError(f"Unsupported stream algorithm: {algo}")
+
+
+def stream_compress_files(algo, selected_files, out_path, level=5, workers=1, long_distance=False, progress=None):
+    """
+    Compress into a single .zst/.br. One file is compressed as-is; several files
+    are streamed through a tar first so names survive the round trip.
+    """
+    total = 0
+    check = progress_check(progress)
+    with open(out_path, 'wb') as f_out:
+        if len(selected_files) == 1:
+            size = os.path.getsize(selected_files[0])
+            with open_stream_writer(algo, f_out, level, workers, long_distance, size, check) as writer, \
+                    open(selected_files[0], 'rb') as f_in:
+                total = stream_copy(f_in, writer, bytearray(STREAM_BUFFER_SIZE), progress)
+        else:
+            with open_stream_writer(algo, f_out, level, workers, long_distance, check=check) as writer, \
+                    tarfile.open(fileobj=writer, mode='w|', bufsize=STREAM_BUFFER_SIZE) as tf:
+                for file_path in selected_files:
+                    tarinfo = tf.gettarinfo(file_path, arcname=os.path.basename(file_path))
+                    with open(file_path, 'rb') as f_in:
+                        tf.addfile(tarinfo, ProgressReader(f_in, progress))
+                    total += tarinfo.size
+    return total
+
+
+def stream_decompress_file(algo, in_path, out_dir, progress=None, members=None):
+    """
+    Decompress a .zst/.br into out_dir. A tar payload is unpacked (only the members
+    matching the glob patterns in members, if given); anything else is written next
+    to the archive name without its extension. Returns the paths written.
+    """
+    with open_source(in_path) as f_in:
+        reader = open_stream_reader(algo, f_in)
+        head = reader.read(512)
+        stream = PrefixedReader(head, reader)
+        if looks_like_tar(head):
+            return untar_stream(stream, out_dir, members)
+        base = os.path.splitext(os.path.basename(source_name(in_path)))[0]
+        if members is not None and not member_matches(base, members):
+            return []
+        out_name = os.path.join(out_dir, base)
+        with open(out_name, 'wb') as f_out:
+            stream_copy(stream, f_out, bytearray(STREAM_BUFFER_SIZE), progress)
+        return [out_name]
+
+
+#########################
+#   Parallel XZ (multi-block)
+#########################
+XZ_HEADER_MAGIC = b"\xfd7zXZ\x00"
+XZ_FOOTER_MAGIC = b"YZ"
+XZ_CHECK_CRC32 = 0x01
+XZ_CHECK_SHA256 = 0x0A
+XZ_STREAM_FLAGS = bytes([0x00, XZ_CHECK_CRC32])
+XZ_FILTER_LZMA2 = 0x21
+# LZMA2 dictionary per preset (liblzma's table); blocks are three dictionaries
+# long, as with xz -T, and never shorter than XZ_MIN_BLOCK_SIZE.
+XZ_PRESET_DICT = [1 << 18, 1 << 20, 1 << 21, 1 << 22, 1 << 22, 1 << 23, 1 << 23, 1 << 24, 1 << 25, 1 << 26]
+XZ_MIN_BLOCK_SIZE = 1024 * 1024
+
+
+def xz_vli(n):
+    """Encode an xz variable-length integer."""
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def xz_read_vli(buf, pos):
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift >= 63:
+            raise ValueError("Corrupt .xz integer")
+
+
+def lzma2_dict_size(props):
+    return 0xFFFFFFFF if props >= 40 else (2 | (props & 1)) << (props // 2 + 11)
+
+
+def lzma2_dict_props(dict_size):
+    """Smallest LZMA2 dictionary property byte covering dict_size."""
+    for props in range(40):
+        if lzma2_dict_size(props) >= dict_size:
+            return props
+    return 40
+
+
+def xz_block_size(level):
+    return max(XZ_MIN_BLOCK_SIZE, 3 * XZ_PRESET_DICT[level])
+
+
+def _xz_compress_block(data, level):
+    """
+    Encode one independent .xz block: header, raw LZMA2 data, padding and a CRC32
+    check. Returns (block bytes, unpadded size, uncompressed size) for the index.
+    """
+    # No point in a dictionary bigger than the block; it only costs decoder memory.
+    props = lzma2_dict_props(min(XZ_PRESET_DICT[level], max(len(data), 4096)))
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": level, "dict_size": lzma2_dict_size(props)}]
+    compressor = lzma.LZMACompressor(format=lzma.FORMAT_RAW, filters=filters)
+    payload = compressor.compress(data) + compressor.flush()
+    # Flags 0xC0: compressed and uncompressed sizes present, one filter.
+    body = b"\xc0" + xz_vli(len(payload)) + xz_vli(len(data)) + bytes([XZ_FILTER_LZMA2, 1, props])
+    header_size = (1 + len(body) + 4 + 3) // 4 * 4
+    header = bytes([header_size // 4 - 1]) + body
+    header += bytes(header_size - 4 - len(header))
+    header += struct.pack("<I", zlib.crc32(header))
+    check = struct.pack("<I", zlib.crc32(data))
+    block = b"".join((header, payload, bytes(-len(payload) % 4), check))
+    return block, len(header) + len(payload) + len(check), len(data)
+
+
+class XzBlockWriter:
+    """
+    Writes a standard .xz stream made of independent blocks. Input is cut into
+    block_size pieces that are compressed on a thread pool (liblzma releases the
+    GIL) and written in order, followed by the index of every block. Stock xz
+    reads the result; XzReader uses the index for parallel and random access.
+    Memory is about 2 x workers blocks plus liblzma's per-thread encoder state.
+    """
+
+    def __init__(self, f_out, level=6, workers=1, block_size=None, check=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self.f_out = f_out
+        # Called before each block is queued or written; raising there stops the writer.
+        self.check = check or (lambda: None)
+        self.level = min(9, max(0, level))
+        self.block_size = block_size or xz_block_size(self.level)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.window = deque()
+        self.max_pending = 2 * max(1, workers)
+        self.buffer = bytearray()
+        self.records = []
+        self.closed = False
+        f_out.write(XZ_HEADER_MAGIC + XZ_STREAM_FLAGS + struct.pack("<I", zlib.crc32(XZ_STREAM_FLAGS)))
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(memoryview(self.buffer)[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self.check()
+        self.window.append(self.pool.submit(_xz_compress_block, block, self.level))
+        while len(self.window) >= self.max_pending:
+            self._write_next()
+
+    def _write_next(self):
+        from concurrent.futures import TimeoutError
+        while True:
+            self.check()
+            try:
+                block, unpadded, usize = self.window[0].result(timeout=PROGRESS_INTERVAL)
+                break
+            except TimeoutError:
+                continue
+        self.window.popleft()
+        self.f_out.write(block)
+        self.records.append((unpadded, usize))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.window:
+                self._write_next()
+        except BaseException:
+            self._abandon()
+            raise
+        self.pool.shutdown()
+        index = bytearray(b"\x00" + xz_vli(len(self.records)))
+        for unpadded, usize in self.records:
+            index += xz_vli(unpadded) + xz_vli(usize)
+        index += bytes(-len(index) % 4)
+        index += struct.pack("<I", zlib.crc32(index))
+        footer = struct.pack("<I", len(index) // 4 - 1) + XZ_STREAM_FLAGS
+        self.f_out.write(bytes(index) + struct.pack("<I", zlib.crc32(footer)) + footer + XZ_FOOTER_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abandon()
+
+    def _abandon(self):
+        # Blocks only compress into memory, so a cancelled writer needn't wait for the ones still running.
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class XzReader:
+    """
+    Random access into a single-stream .xz via its block index: only the blocks
+    covering a range are decoded. Raises ValueError for files it can't index
+    (one block, concatenated streams, filters other than plain LZMA2); those are
+    still read by lzma.open. Blocks may be decoded from several threads.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, 'rb')
+        self.lock = threading.Lock()
+        try:
+            self._read_index()
+        except (ValueError, struct.error, IndexError):
+            self.f.close()
+            raise ValueError(f"{os.path.basename(path)} has no usable .xz block index")
+
+    def _read_index(self):
+        self.f.seek(0, io.SEEK_END)
+        size = self.f.tell()
+        self.f.seek(0)
+        header = self.f.read(12)
+        self.f.seek(size - 12)
+        footer = self.f.read(12)
+        if size < 32 or header[:6] != XZ_HEADER_MAGIC or footer[10:] != XZ_FOOTER_MAGIC \
+                or footer[8:10] != header[6:8]:
+            raise ValueError("not a plain .xz stream")
+        check_id = header[7] & 0x0F
+        self.check_id = check_id
+        self.check_size = 0 if check_id == 0 else 4 << ((check_id - 1) // 3)
+        index_size = (struct.unpack("<I", footer[4:8])[0] + 1) * 4
+        index_start = size - 12 - index_size
+        self.f.seek(index_start)
+        index = self.f.read(index_size)
+        if index[0] != 0 or zlib.crc32(index[:-4]) != struct.unpack("<I", index[-4:])[0]:
+            raise ValueError("corrupt index")
+        count, pos = xz_read_vli(index, 1)
+        self.blocks = []  # (file offset, unpadded size, uncompressed offset, uncompressed size)
+        offset, uoffset = 12, 0
+        for _ in range(count):
+            unpadded, pos = xz_read_vli(index, pos)
+            usize, pos = xz_read_vli(index, pos)
+            self.blocks.append((offset, unpadded, uoffset, usize))
+            offset += (unpadded + 3) // 4 * 4
+            uoffset += usize
+        if offset != index_start:
+            raise ValueError("stream padding or several streams")
+        self.starts = [b[2] for b in self.blocks]
+        self.size = uoffset
+
+    def read_block(self, i):
+        offset, unpadded, _, usize = self.blocks[i]
+        with self.lock:
+            self.f.seek(offset)
+            raw = _read_exact(self.f, (unpadded + 3) // 4 * 4)
+        header_size = (raw[0] + 1) * 4
+        if zlib.crc32(raw[:header_size - 4]) != struct.unpack("<I", raw[header_size - 4:header_size])[0]:
+            raise ValueError(f"Corrupt .xz block header {i}")
+        flags, pos = raw[1], 2
+        if flags & 0x40:
+            _, pos = xz_read_vli(raw, pos)
+        if flags & 0x80:
+            _, pos = xz_read_vli(raw, pos)
+        filter_id, pos = xz_read_vli(raw, pos)
+        props_size, pos = xz_read_vli(raw, pos)
+        if flags & 0x03 or filter_id != XZ_FILTER_LZMA2 or props_size != 1:
+            raise ValueError(f"Unsupported filter chain in .xz block {i}")
+        filters = [{"id": lzma.FILTER_LZMA2, "dict_size": lzma2_dict_size(raw[pos])}]
+        payload = raw[header_size:unpadded - self.check_size]
+        data = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters).decompress(payload)
+        check = raw[len(raw) - self.check_size:]
+        if len(data) != usize:
+            raise ValueError(f"Corrupt .xz block {i}")
+        if self.check_id == XZ_CHECK_CRC32 and struct.pack("<I", zlib.crc32(data)) != check:
+            raise ValueError(f"Checksum mismatch in .xz block {i}")
+        if self.check_id == XZ_CHECK_SHA256 and hashlib.sha256(data).digest() != check:
+            raise ValueError(f"Checksum mismatch in .xz block {i}")
+        return data
+
+    def read(self, offset, size):
+        """Return up to size bytes of the uncompressed data starting at offset."""
+        end = min(self.size, offset + size)
+        out = []
+        i = bisect.bisect_right(self.starts, offset) - 1
+        while offset < end and 0 <= i < len(self.blocks):
+            _, _, ustart, usize = self.blocks[i]
+            data = self.read_block(i)
+            out.append(data[offset - ustart:min(end, ustart + usize) - ustart])
+            offset = ustart + usize
+            i += 1
+        return b"".join(out)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class XzFile(io.RawIOBase):
+    """
+    Seekable read-only view of an indexed .xz's content, caching the most recently
+    decoded block, so tarfile can seek through a .tar.xz block by block.
+    """
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+        self.pos = 0
+        self.cached = (None, b"")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.reader.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def readinto(self, buffer):
+        # Fill the whole buffer across block boundaries; tarfile expects full reads.
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view) and self.pos < self.reader.size:
+            idx = bisect.bisect_right(self.reader.starts, self.pos) - 1
+            _, _, ustart, usize = self.reader.blocks[idx]
+            if self.cached[0] != idx:
+                self.cached = (idx, self.reader.read_block(idx))
+            lo = self.pos - ustart
+            n = min(len(view) - filled, usize - lo)
+            view[filled:filled + n] = self.cached[1][lo:lo + n]
+            filled += n
+            self.pos += n
+        return filled
+
+
+def open_xz_reader(src):
+    """An XzReader if src is a path to a .xz of several indexed blocks, else None."""
+    if not isinstance(src, (str, os.PathLike)):
+        return None
+    try:
+        reader = XzReader(src)
+    except ValueError:
+        return None
+    if len(reader.blocks) < 2:
+        reader.close()
+        return None
+    return reader
+
+
+def xz_decompress_parallel(reader, out_path, workers, progress=None):
+    """Decode every block of an indexed .xz on a thread pool, writing them in order."""
+    from concurrent.futures import ThreadPoolExecutor
+    window = deque()
+    with worker_pool(ThreadPoolExecutor(max_workers=workers)) as pool, open(out_path, 'wb') as f_out:
+        def write_next():
+            data = window.popleft().result()
+            f_out.write(data)
+            if progress:
+                progress(len(data))
+
+        for i in range(len(reader.blocks)):
+            window.append(pool.submit(reader.read_block, i))
+            if len(window) >= 2 * workers:
+                write_next()
+        while window:
+            write_next()
+
+
+#########################
+#   zstd Dictionary ZIP (many small files)
+#########################
+# Archive member holding the trained dictionary (empty if training was skipped);
+# its presence marks the archive.
+ZSTD_DICT_MEMBER = ".usc-zstd.dict"
+ZSTD_DICT_SIZE = 112640
+# Training uses at most this many files, each capped at ZSTD_DICT_SAMPLE_BYTES.
+ZSTD_DICT_MAX_SAMPLES = 4000
+ZSTD_DICT_SAMPLE_BYTES = 128 * 1024
+
+
+def safe_extract_path(out_dir, name):
+    """Join an archive member name onto out_dir, refusing anything that escapes it."""
+    root = os.path.abspath(out_dir)
+    target = os.path.abspath(os.path.join(root, name))
+    if os.path.commonpath([root, target]) != root:
+        raise ValueError(f"Refusing to extract outside target folder: {name}")
+    return target
+
+
+def train_zstd_dictionary(selected_files, level=5):
+    """
+    Train a dictionary on an evenly spaced sample of the selection.
+    Returns None when there isn't enough sample data for zstd to train on.
+    """
+    step = max(1, len(selected_files) // ZSTD_DICT_MAX_SAMPLES)
+    samples = []
+    for file_path in selected_files[::step]:
+        with open(file_path, 'rb') as f:
+            data = f.read(ZSTD_DICT_SAMPLE_BYTES)
+        if data:
+            samples.append(data)
+    try:
+        return zstd.train_dictionary(ZSTD_DICT_SIZE, samples, level=level)
+    except zstd.ZstdError as e:
+        logging.warning(f"zstd dictionary training skipped: {e}")
+        return None
+
+
+def zip_with_zstd_dictionary(selected_files, out_path, level=5, progress=None):
+    """
+    ZIP whose members are stored zstd frames ('name.zst') compressed against one
+    shared dictionary, which is kept in the archive as ZSTD_DICT_MEMBER.
+    """
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("Install zstandard to use dictionary compression.")
+    dict_data = train_zstd_dictionary(selected_files, level)
+    if dict_data is not None:
+        cctx = zstd.ZstdCompressor(level=level, dict_data=dict_data, write_checksum=True)
+    else:
+        cctx = zstd.ZstdCompressor(level=level, write_checksum=True)
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    total = 0
+    with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        zf.writestr(ZSTD_DICT_MEMBER, dict_data.as_bytes() if dict_data is not None else b"")
+        for file_path in selected_files:
+            zinfo = zipfile.ZipInfo.from_file(file_path, os.path.basename(file_path) + ".zst")
+            zinfo.compress_type = zipfile.ZIP_STORED
+            size = zinfo.file_size
+            with open(file_path, 'rb') as f_in:
+                if size <= STREAM_BUFFER_SIZE:
+                    zf.writestr(zinfo, cctx.compress(f_in.read()))
+                else:
+                    with zf.open(zinfo, 'w', force_zip64=True) as f_out, \
+                            cctx.stream_writer(f_out, size=size, closefd=False) as writer:
+                        stream_copy(f_in, writer, buffer)
+            total += size
+            if progress:
+                progress(size)
+    return total
+
+
+def is_zstd_dictionary_zip(zf):
+    return ZSTD_DICT_MEMBER in zf.NameToInfo
+
+
+def unzip_with_zstd_dictionary(zf, out_dir, progress=None, members=None):
+    """
+    Load the dictionary once and decode every '.zst' member (or those whose
+    original names match the glob patterns in members) with the same context.
+    Returns the paths written.
+    """
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("Install zstandard to extract dictionary-compressed archives.")
+    dict_bytes = zf.read(ZSTD_DICT_MEMBER)
+    if dict_bytes:
+        dctx = zstd.ZstdDecompressor(dict_data=zstd.ZstdCompressionDict(dict_bytes))
+    else:
+        dctx = zstd.ZstdDecompressor()
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    written = []
+    for info in zf.infolist():
+        if info.filename == ZSTD_DICT_MEMBER or info.is_dir():
+            continue
+        name = info.filename[:-len(".zst")] if info.filename.endswith(".zst") else info.filename
+        if members is not None and not member_matches(name, members):
+            continue
+        if name == info.filename:
+            written.append(zf.extract(info, out_dir))
+            continue
+        target = safe_extract_path(out_dir, name)
+        written.append(target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zf.open(info) as f_in, open(target, 'wb') as f_out:
+            if info.file_size <= STREAM_BUFFER_SIZE:
+                f_out.write(dctx.decompress(f_in.read()))
+            else:
+                stream_copy(dctx.stream_reader(f_in), f_out, buffer)
+        if progress:
+            progress(info.file_size)
+    return written
+
+
+#########################
+#   Adaptive Engine ("AI Smart Ratio")
+#########################
+# Per-chunk codec ids, stored in the container so decompression never guesses.
+CODEC_STORE = 0
+CODEC_ZLIB = 1
+CODEC_LZ4 = 2
+CODEC_ZSTD = 3
+CODEC_XZ = 4
+CODEC_NAMES = {CODEC_STORE: "store", CODEC_ZLIB: "zlib", CODEC_LZ4: "lz4", CODEC_ZSTD: "zstd", CODEC_XZ: "xz"}
+
+AI_CHUNK_SIZE = 4 * 1024 * 1024
+# Bytes taken from the start, middle and end of a chunk to probe it.
+AI_SAMPLE_SLICE = 16 * 1024
+# Above this many bits/byte a chunk is treated as already compressed and stored.
+AI_ENTROPY_STORE = 7.9
+# Trial compressions saving less than this fraction also mean "store".
+AI_MIN_SAVING = 0.03
+
+
+def compress_chunk(codec, level, data):
+    if codec == CODEC_STORE:
+        return bytes(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, level)
+    if codec == CODEC_LZ4:
+        return lz4_block.compress(data, store_size=False)
+    if codec == CODEC_ZSTD:
+        return zstd.ZstdCompressor(level=level).compress(data)
+    if codec == CODEC_XZ:
+        return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+    raise ValueError(f"Unknown codec id {codec}")
+
+
+def decompress_chunk(codec, payload, usize):
+    if codec == CODEC_STORE:
+        return payload
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_LZ4:
+        if not LZ4_AVAILABLE:
+            raise RuntimeError("Install lz4 to read this archive.")
+        return lz4_block.decompress(payload, uncompressed_size=usize)
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Install zstandard to read this archive.")
+        return zstd.ZstdDecompressor().decompress(payload, max_output_size=usize)
+    if codec == CODEC_XZ:
+        return lzma.decompress(payload)
+    raise ValueError(f"Unknown codec id {codec}")
+
+
+def codec_ladder():
+    """Available (codec, level) pairs ordered from fastest to strongest."""
+    ladder = [(CODEC_LZ4, 0)] if LZ4_AVAILABLE else [(CODEC_ZLIB, 1)]
+    if ZSTD_AVAILABLE:
+        ladder += [(CODEC_ZSTD, 1), (CODEC_ZSTD, 3), (CODEC_ZSTD, 6), (CODEC_ZSTD, 12), (CODEC_ZSTD, 19)]
+    else:
+        ladder += [(CODEC_ZLIB, 6), (CODEC_ZLIB, 9)]
+    if LZMA_AVAILABLE:
+        ladder += [(CODEC_XZ, 6), (CODEC_XZ, 9)]
+    return ladder
+
+
+def ratio_budget_mbps(ratio):
+    """Slider 1..10 -> minimum acceptable throughput, from 400 MB/s down to 1 MB/s."""
+    ratio = min(10, max(1, ratio))
+    return 400.0 * (1 / 400.0) ** ((ratio - 1) / 9)
+
+
+def byte_entropy(sample):
+    if not sample:
+        return 0.0
+    n = len(sample)
+    return -sum(c / n * math.log2(c / n) for c in Counter(sample).values())
+
+
+def sample_chunk(view):
+    """A few slices from the start, middle and end of the chunk."""
+    n = len(view)
+    if n <= 3 * AI_SAMPLE_SLICE:
+        return bytes(view)
+    mid = n // 2 - AI_SAMPLE_SLICE // 2
+    return b"".join((view[:AI_SAMPLE_SLICE], view[mid:mid + AI_SAMPLE_SLICE], view[-AI_SAMPLE_SLICE:]))
+
+
+def choose_codec(view, ratio):
+    """
+    Pick (codec, level) for one chunk. High-entropy data is stored outright; otherwise
+    candidates are tried on a sample from the strongest the slider allows downwards,
+    and the first one fast enough for the slider's throughput budget wins.
+    """
+    sample = sample_chunk(view)
+    if byte_entropy(sample) >= AI_ENTROPY_STORE:
+        return CODEC_STORE, 0
+    ladder = codec_ladder()
+    top = round((min(10, max(1, ratio)) - 1) / 9 * (len(ladder) - 1))
+    budget = ratio_budget_mbps(ratio)
+    for codec, level in reversed(ladder[:top + 1]):
+        start = time.perf_counter()
+        trial = compress_chunk(codec, level, sample)
+        elapsed = time.perf_counter() - start
+        mbps = len(sample) / (1024 * 1024) / elapsed if elapsed > 0 else float("inf")
+        if len(trial) > len(sample) * (1 - AI_MIN_SAVING):
+            return CODEC_STORE, 0
+        if mbps >= budget:
+            return codec, level
+    return ladder[0]
+
+
+def adaptive_compress_chunk(view, ratio):
+    """Compress one chunk with the selected codec; falls back to store if it didn't shrink."""
+    codec, level = choose_codec(view, ratio)
+    payload = compress_chunk(codec, level, view)
+    if codec != CODEC_STORE and len(payload) >= len(view):
+        return CODEC_STORE, 0, bytes(view)
+    return codec, level, payload
+
+
+#########################
+#   Integrity Hashing
+#########################
+# Digests are stored as "<algorithm>:<hex>". New ones use the first algorithm
+# whose module is installed; CRC32 (zlib) is always there.
+HASH_ALGORITHMS = ("xxh3_64", "blake3", "crc32")
+
+
+class Crc32Hash:
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value:08x}"
+
+
+def new_hash(algorithm=None):
+    """
+    (algorithm, hasher) for an integrity digest: xxh3_64 or BLAKE3 when
+    installed, else CRC32. Naming an algorithm (to check a stored digest)
+    raises RuntimeError if its module isn't installed.
+    """
+    for name in [algorithm] if algorithm else HASH_ALGORITHMS:
+        if name == "xxh3_64" and XXHASH_AVAILABLE:
+            return name, xxhash.xxh3_64()
+        if name == "blake3" and BLAKE3_AVAILABLE:
+            return name, blake3.blake3()
+        if name == "crc32":
+            return name, Crc32Hash()
+    if algorithm in HASH_ALGORITHMS:
+        raise RuntimeError(f"Install {'xxhash' if algorithm == 'xxh3_64' else algorithm} to check {algorithm} digests.")
+    raise ValueError(f"Unknown digest algorithm '{algorithm}'")
+
+
+class HashingWriter:
+    """Write-through wrapper that digests everything written to f_out, in the same pass."""
+
+    def __init__(self, f_out, algorithm=None):
+        self.f_out = f_out
+        self.algorithm, self.hasher = new_hash(algorithm)
+
+    def write(self, data):
+        self.hasher.update(data)
+        return self.f_out.write(data)
+
+    def tell(self):
+        return self.f_out.tell()
+
+    def digest(self):
+        return f"{self.algorithm}:{self.hasher.hexdigest()}"
+
+
+def file_digest(path, algorithm=None):
+    """The "<algorithm>:<hex>" digest of the file at path (see new_hash)."""
+    algorithm, hasher = new_hash(algorithm)
+    for view in file_slices(path, STREAM_BUFFER_SIZE * 16):
+        hasher.update(view)
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+
+def file_matches_digest(path, digest):
+    """True if the file at path matches a stored "<algorithm>:<hex>" digest."""
+    return file_digest(path, digest.split(":", 1)[0]) == digest
+
+
+#########################
+#   Native Container (.usc)
+#########################
+# Layout: header, then per member an "M" record followed by its "C" chunk records,
+# an "E" record, a binary index of every member and chunk, and a fixed-size footer
+# locating that index. Sequential readers never need the index; random-access
+# readers load only the footer and index and then seek straight to chunks.
+USC_MAGIC = b"USCA"
+USC_VERSION = 2
+USC_HEADER = struct.Struct("<4sBB")       # magic, version, flags
+USC_FLAG_MEMBER_CRC = 0x01                # index member records end with the member's crc32
+USC_MEMBER = struct.Struct("<cHQ")        # b"M", name length, uncompressed size
+USC_CHUNK = struct.Struct("<cBBIII")      # b"C", codec, level, usize, csize, crc32 of the data
+USC_END = struct.Struct("<cI")            # b"E", index length
+USC_INDEX_HEAD = struct.Struct("<II")     # member count, chunk count
+USC_INDEX_MEMBER = struct.Struct("<HQII")  # name length, size, first chunk, chunk count
+USC_INDEX_MEMBER_CRC = struct.Struct("<HQIII")  # ... plus crc32 of the member's data in this container
+USC_INDEX_CHUNK = struct.Struct("<QQIIBBI")  # payload offset, member offset, usize, csize, codec, level, crc
+USC_FOOTER = struct.Struct("<QII4s")      # index offset, index length, index crc32, b"USCI"
+USC_FOOTER_MAGIC = b"USCI"
+
+
+class UscChunk:
+    __slots__ = ("payload_offset", "member_offset", "usize", "csize", "codec", "level", "crc")
+
+    def __init__(self, payload_offset, member_offset, usize, csize, codec, level, crc):
+        self.payload_offset = payload_offset
+        self.member_offset = member_offset
+        self.usize = usize
+        self.csize = csize
+        self.codec = codec
+        self.level = level
+        self.crc = crc
+
+
+class UscMember:
+    def __init__(self, name, size, crc=None):
+        self.name = name
+        self.size = size
+        self.crc = crc  # None in archives written before member checksums
+        self.chunks = []
+
+
+class UscWriter:
+    """Appends members and pre-compressed chunks to a .usc file and writes the index on close."""
+
+    def __init__(self, f_out):
+        self.f_out = f_out
+        self.base = f_out.tell()
+        self.members = []
+        self.member_pos = 0
+        self.stats = {}
+        f_out.write(USC_HEADER.pack(USC_MAGIC, USC_VERSION, USC_FLAG_MEMBER_CRC))
+
+    def begin_member(self, name, size, offset=0):
+        """Start a member; offset > 0 when this container holds only its tail (volume sets)."""
+        encoded = name.encode("utf-8")
+        self.f_out.write(USC_MEMBER.pack(b"M", len(encoded), size))
+        self.f_out.write(encoded)
+        self.members.append(UscMember(name, size, 0))
+        self.member_pos = offset
+
+    def add_chunk(self, codec, level, usize, crc, payload):
+        member = self.members[-1]
+        member_offset = self.member_pos
+        self.member_pos += usize
+        self.f_out.write(USC_CHUNK.pack(b"C", codec, level, usize, len(payload), crc))
+        payload_offset = self.f_out.tell() - self.base
+        self.f_out.write(payload)
+        member.chunks.append(UscChunk(payload_offset, member_offset, usize, len(payload), codec, level, crc))
+        # The member checksum comes from the chunk checksums, so it costs no pass over the data.
+        member.crc = crc32_combine(member.crc, crc, usize)
+        self.stats[CODEC_NAMES[codec]] = self.stats.get(CODEC_NAMES[codec], 0) + 1
+
+    def close(self):
+        parts = [USC_INDEX_HEAD.pack(len(self.members), sum(len(m.chunks) for m in self.members))]
+        first = 0
+        for m in self.members:
+            encoded = m.name.encode("utf-8")
+            parts.append(USC_INDEX_MEMBER_CRC.pack(len(encoded), m.size, first, len(m.chunks), m.crc))
+            parts.append(encoded)
+            first += len(m.chunks)
+        for m in self.members:
+            for c in m.chunks:
+                parts.append(USC_INDEX_CHUNK.pack(c.payload_offset, c.member_offset, c.usize, c.csize,
+                                                  c.codec, c.level, c.crc))
+        index = b"".join(parts)
+        self.f_out.write(USC_END.pack(b"E", len(index)))
+        index_offset = self.f_out.tell() - self.base
+        self.f_out.write(index)
+        self.f_out.write(USC_FOOTER.pack(index_offset, len(index), zlib.crc32(index), USC_FOOTER_MAGIC))
+
+
+def usc_chunk_plan(size):
+    """(offset, length) of each chunk of a member; empty members have no chunks."""
+    return plan_blocks(size, AI_CHUNK_SIZE) if size else []
+
+
+def _usc_compress_job(job):
+    """Worker: compress one chunk straight out of the mapped source file."""
+    file_path, offset, length, ratio = job
+    for view in file_slices(file_path, length, offset, length):
+        codec, level, payload = adaptive_compress_chunk(view, ratio)
+        return codec, level, len(view), zlib.crc32(view), payload
+
+
+def write_usc_member(writer, name, size, views, ratio, progress=None):
+    """Compress one member in this process; views yields its data in chunks of up to AI_CHUNK_SIZE."""
+    writer.begin_member(name, size)
+    for view in views:
+        codec, level, payload = adaptive_compress_chunk(view, ratio)
+        writer.add_chunk(codec, level, len(view), zlib.crc32(view), payload)
+        if progress:
+            progress(len(view))
+
+
+def check_unique_names(selected_files):
+    """Raise ValueError if two selected files would be stored under the same name (their basename)."""
+    seen = {}
+    for file_path in selected_files:
+        seen.setdefault(os.path.basename(file_path), []).append(file_path)
+    clashes = [paths for paths in seen.values() if len(paths) > 1]
+    if clashes:
+        raise ValueError("Files with the same name can't share an archive: " +
+                         "; ".join(", ".join(paths) for paths in clashes))
+
+
+def adaptive_compress_files(selected_files, out_path, ratio=5, workers=1, progress=None):
+    """
+    Write selected files into a .usc container, choosing a codec per chunk.
+    Chunks are independent, so with workers > 1 they are compressed in a process pool
+    (a few chunks per worker in flight) and written in order. Member names are the
+    files' basenames, so those must be unique.
+    """
+    check_unique_names(selected_files)
+    with open(out_path, 'wb') as f_out:
+        writer = UscWriter(f_out)
+        if workers <= 1:
+            for file_path in selected_files:
+                write_usc_member(writer, os.path.basename(file_path), os.path.getsize(file_path),
+                                 file_slices(file_path, AI_CHUNK_SIZE), ratio, progress)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with worker_pool(ProcessPoolExecutor(max_workers=workers)) as pool:
+                pending = deque()
+                window = workers * 2
+                jobs = ((file_path, offset, length, ratio)
+                        for file_path in selected_files
+                        for offset, length in usc_chunk_plan(os.path.getsize(file_path)))
+                for file_path in selected_files:
+                    size = os.path.getsize(file_path)
+                    writer.begin_member(os.path.basename(file_path), size)
+                    for _ in usc_chunk_plan(size):
+                        for job in jobs:
+                            pending.append(pool.submit(_usc_compress_job, job))
+                            if len(pending) >= window:
+                                break
+                        codec, level, usize, crc, payload = pending.popleft().result()
+                        writer.add_chunk(codec, level, usize, crc, payload)
+                        if progress:
+                            progress(usize)
+        writer.close()
+    return writer.stats
+
+
+def is_usc_file(src):
+    with open_source(src) as f:
+        magic = f.read(len(USC_MAGIC))
+        f.seek(0)
+        return magic == USC_MAGIC
+
+
+def _read_exact(f, n):
+    data = f.read(n)
+    if len(data) != n:
+        raise ValueError("Truncated .usc archive")
+    return data
+
+
+def usc_index_members(index, flags):
+    """UscMembers with their chunks, in archive order, from a container's binary index."""
+    record = USC_INDEX_MEMBER_CRC if flags & USC_FLAG_MEMBER_CRC else USC_INDEX_MEMBER
+    member_count, _ = USC_INDEX_HEAD.unpack_from(index, 0)
+    pos = USC_INDEX_HEAD.size
+    layout = []
+    for _ in range(member_count):
+        name_len, size, first, count, *crc = record.unpack_from(index, pos)
+        pos += record.size
+        name = index[pos:pos + name_len].decode("utf-8")
+        pos += name_len
+        layout.append((UscMember(name, size, crc[0] if crc else None), count))
+    for member, count in layout:
+        for _ in range(count):
+            member.chunks.append(UscChunk(*USC_INDEX_CHUNK.unpack_from(index, pos)))
+            pos += USC_INDEX_CHUNK.size
+    return [member for member, _ in layout]
+
+
+def usc_member_problem(member):
+    """
+    Why a member's index entry is inconsistent (chunks that leave gaps, or a
+    member checksum that doesn't match its chunk checksums), or None.
+    """
+    expected = member.chunks[0].member_offset if member.chunks else 0
+    crc = 0
+    for c in member.chunks:
+        if c.member_offset != expected:
+            return f"{member.name}: chunk at offset {c.member_offset}, expected {expected}"
+        expected += c.usize
+        crc = crc32_combine(crc, c.crc, c.usize)
+    if expected > member.size:
+        return f"{member.name}: chunks run past the member size"
+    if member.crc is not None and crc != member.crc:
+        return f"{member.name}: member checksum doesn't match its chunks"
+    return None
+
+
+def _decode_usc_chunk(codec, payload, usize, crc):
+    data = decompress_chunk(codec, payload, usize)
+    if len(data) != usize or zlib.crc32(data) != crc:
+        raise ValueError("Checksum mismatch in .usc chunk")
+    return data
+
+
+def read_usc_stream(f_in, label=".usc archive"):
+    """
+    Walk back-to-back .usc containers front to back. Yields (name, None) as each
+    member starts and (name, data) for each chunk, checked against its crc32.
+    The index closing each container is checked too, and with it every member's
+    checksum against the chunks just read, so a dropped or reordered chunk
+    can't go unnoticed.
+    """
+    magic = f_in.read(len(USC_MAGIC))
+    while magic:
+        if magic != USC_MAGIC:
+            raise ValueError(f"{label} is not a .usc archive")
+        _, version, flags = USC_HEADER.unpack(magic + _read_exact(f_in, USC_HEADER.size - len(magic)))
+        if version != USC_VERSION:
+            raise ValueError(f"Unsupported .usc version {version}")
+        seen = []  # [name, crc of its chunks so far] per member record
+        while True:
+            tag = _read_exact(f_in, 1)
+            if tag == b"E":
+                _, index_len = USC_END.unpack(tag + _read_exact(f_in, USC_END.size - 1))
+                index = _read_exact(f_in, index_len)
+                _, _, index_crc, footer_magic = USC_FOOTER.unpack(_read_exact(f_in, USC_FOOTER.size))
+                if footer_magic != USC_FOOTER_MAGIC or zlib.crc32(index) != index_crc:
+                    raise ValueError(f"Corrupt index in {label}")
+                if flags & USC_FLAG_MEMBER_CRC:
+                    stored = [[m.name, m.crc] for m in usc_index_members(index, flags)]
+                    if stored != seen:
+                        raise ValueError(f"Member checksum mismatch in {label}")
+                break
+            if tag == b"M":
+                _, name_len, _ = USC_MEMBER.unpack(tag + _read_exact(f_in, USC_MEMBER.size - 1))
+                name = _read_exact(f_in, name_len).decode("utf-8")
+                seen.append([name, 0])
+                yield name, None
+            elif tag == b"C" and seen:
+                _, codec, _, usize, csize, crc = USC_CHUNK.unpack(tag + _read_exact(f_in, USC_CHUNK.size - 1))
+                data = _decode_usc_chunk(codec, _read_exact(f_in, csize), usize, crc)
+                seen[-1][1] = crc32_combine(seen[-1][1], crc, usize)
+                yield seen[-1][0], data
+            else:
+                raise ValueError(f"Corrupt {label}")
+        magic = f_in.read(len(USC_MAGIC))
+
+
+def usc_indexes(f, label=".usc archive"):
+    """
+    (base offset, flags, index) of each container in a seekable file, last first.
+    Every footer points at its container's start, which is where the container
+    before it ends, so back-to-back containers (merged split parts) are walked
+    without touching their chunks.
+    """
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    while True:
+        if end < USC_HEADER.size + USC_FOOTER.size:
+            raise ValueError("Truncated .usc archive")
+        f.seek(end - USC_FOOTER.size)
+        index_offset, index_len, index_crc, magic = USC_FOOTER.unpack(_read_exact(f, USC_FOOTER.size))
+        base = end - USC_FOOTER.size - index_len - index_offset
+        if magic != USC_FOOTER_MAGIC or base < 0:
+            raise ValueError(f"{label} has no .usc index")
+        f.seek(base)
+        magic, version, flags = USC_HEADER.unpack(_read_exact(f, USC_HEADER.size))
+        if magic != USC_MAGIC or version != USC_VERSION:
+            raise ValueError(f"Unsupported .usc archive (version {version})")
+        f.seek(base + index_offset)
+        index = _read_exact(f, index_len)
+        if zlib.crc32(index) != index_crc:
+            raise ValueError("Corrupt .usc index")
+        yield base, flags, index
+        if base == 0:
+            return
+        end = base
+
+
+class UscReader:
+    """
+    Random access into a .usc container via its trailing index. Only the chunks that
+    overlap a requested range are read and decompressed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'rb')
+        try:
+            # Offsets are relative to the container start; a container appended to other
+            # data (e.g. merged split parts) is still readable on its own.
+            self.base, self.flags, index = next(usc_indexes(self.f, os.path.basename(path)))
+            self.members = usc_index_members(index, self.flags)
+        except Exception:
+            self.f.close()
+            raise
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_chunk(self, chunk):
+        self.f.seek(self.base + chunk.payload_offset)
+        return _decode_usc_chunk(chunk.codec, _read_exact(self.f, chunk.csize), chunk.usize, chunk.crc)
+
+    def member(self, name):
+        """The first member called name; KeyError if there is none."""
+        for member in self.members:
+            if member.name == name:
+                return member
+        raise KeyError(name)
+
+    def read(self, name, offset=0, size=-1):
+        """Bytes [offset, offset+size) of a member, decoding only the chunks that cover them."""
+        member = self.member(name)
+        end = member.size if size < 0 else min(member.size, offset + size)
+        starts = [c.member_offset for c in member.chunks]
+        idx = max(0, bisect.bisect_right(starts, offset) - 1)
+        out = []
+        while offset < end and idx < len(member.chunks):
+            chunk = member.chunks[idx]
+            data = self.read_chunk(chunk)
+            lo = offset - chunk.member_offset
+            hi = min(chunk.usize, end - chunk.member_offset)
+            out.append(data[lo:hi])
+            offset = chunk.member_offset + hi
+            idx += 1
+        return b"".join(out)
+
+    def open(self, name):
+        return UscMemberFile(self, name)
+
+
+class UscMemberFile(io.RawIOBase):
+    """Seekable read-only view of one member, caching the most recently decoded chunk."""
+
+    def __init__(self, reader, name):
+        super().__init__()
+        self.reader = reader
+        self.member = reader.member(name)
+        self.starts = [c.member_offset for c in self.member.chunks]
+        self.pos = 0
+        self.cached = (None, b"")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.member.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def readinto(self, buffer):
+        if self.pos >= self.member.size:
+            return 0
+        idx = bisect.bisect_right(self.starts, self.pos) - 1
+        chunk = self.member.chunks[idx]
+        if self.cached[0] != idx:
+            self.cached = (idx, self.reader.read_chunk(chunk))
+        data = self.cached[1]
+        lo = self.pos - chunk.member_offset
+        n = min(len(buffer), chunk.usize - lo)
+        buffer[:n] = data[lo:lo + n]
+        self.pos += n
+        return n
+
+
+def _usc_extract_job(job):
+    """Worker: decode one chunk and write it at its offset in the pre-sized target file."""
+    path, base, chunk_fields, target = job
+    chunk = UscChunk(*chunk_fields)
+    with open(path, 'rb') as f:
+        f.seek(base + chunk.payload_offset)
+        data = _decode_usc_chunk(chunk.codec, _read_exact(f, chunk.csize), chunk.usize, chunk.crc)
+    with open(target, 'r+b') as f_out:
+        f_out.seek(chunk.member_offset)
+        f_out.write(data)
+    return chunk.usize
+
+
+def usc_extract_parallel(in_path, out_dir, workers=DEFAULT_WORKERS, progress=None, members=None):
+    """
+    Extract every member, or those matching the glob patterns in members, decoding
+    independent chunks across a process pool. Only the chosen members' chunks are read.
+    A name that appears again is appended to, as the sequential reader does.
+    """
+    restored = {}  # target -> bytes written to it by earlier members
+    with UscReader(in_path) as reader:
+        jobs = []
+        for member in reader.members:
+            if members is not None and not member_matches(member.name, members):
+                continue
+            problem = usc_member_problem(member)
+            if problem:
+                raise ValueError(f"{os.path.basename(in_path)}: {problem}")
+            target = safe_extract_path(out_dir, member.name)
+            base = restored.get(target, 0)
+            with open(target, 'r+b' if target in restored else 'wb') as f_out:
+                f_out.truncate(base + member.size)
+            restored[target] = base + member.size
+            for c in member.chunks:
+                fields = (c.payload_offset, base + c.member_offset, c.usize, c.csize, c.codec, c.level, c.crc)
+                jobs.append((in_path, reader.base, fields, target))
+    if workers <= 1:
+        for job in jobs:
+            usize = _usc_extract_job(job)
+            if progress:
+                progress(usize)
+        return list(restored)
+    from concurrent.futures import ProcessPoolExecutor
+    with worker_pool(ProcessPoolExecutor(max_workers=workers)) as pool:
+        for usize in pool.map(_usc_extract_job, jobs, chunksize=4):
+            if progress:
+                progress(usize)
+    return list(restored)
+
+
+def adaptive_decompress_file(in_path, out_dir, workers=1, progress=None, members=None):
+    """
+    Restore every member of a .usc container (or those matching the glob patterns
+    in members), verifying each chunk's checksum and each member's. A single
+    container is extracted in parallel when workers > 1 or members are chosen; a
+    lone volume of a volume set is written at its members' offsets. Back-to-back
+    containers (merged split parts) are read sequentially, and a member name seen
+    again is appended to. Returns the restored paths.
+    """
+    if isinstance(in_path, str):
+        try:
+            with UscReader(in_path) as reader:
+                single = reader.base == 0
+                # A volume of a volume set holds slices of members at their real offsets.
+                partial = any(sum(c.usize for c in m.chunks) != m.size for m in reader.members)
+        except ValueError:
+            single = partial = False
+        if single and (workers > 1 or partial or members is not None):
+            return usc_extract_parallel(in_path, out_dir, workers, progress, members)
+    restored = []
+    f_out = None
+    try:
+        with open_source(in_path) as f_in:
+            for name, data in read_usc_stream(f_in, os.path.basename(source_name(in_path))):
+                if data is None:
+                    if f_out:
+                        f_out.close()
+                        f_out = None
+                    if members is not None and not member_matches(name, members):
+                        continue
+                    target = safe_extract_path(out_dir, name)
+                    f_out = open(target, 'ab' if target in restored else 'wb')
+                    if target not in restored:
+                        restored.append(target)
+                    continue
+                if f_out is None:
+                    continue
+                f_out.write(data)
+                if progress:
+                    progress(len(data))
+    finally:
+        if f_out:
+            f_out.close()
+    return restored
+
+
+#########################
+#   Dedup Chunk Store (content-defined chunking)
+#########################
+# Chunk size targets. Cuts land between DEDUP_MIN_CHUNK and DEDUP_MAX_CHUNK, near
+# DEDUP_AVG_CHUNK on average.
+DEDUP_MIN_CHUNK = 128 * 1024
+DEDUP_AVG_CHUNK = 512 * 1024
+DEDUP_MAX_CHUNK = 2 * 1024 * 1024
+
+
+def _cdc_bit_table():
+    # Byte values ranked by a fixed hash: the first half maps to 1, the rest to 0.
+    ranked = sorted(range(256), key=lambda b: hashlib.blake2b(bytes([b])).digest())
+    ones = set(ranked[:128])
+    return bytes.maketrans(bytes(range(256)), bytes(1 if b in ones else 0 for b in range(256)))
+
+
+# Each byte is projected to one bit by a fixed, balanced table; a cut falls
+# where the projected bits of the last bytes spell a pattern. As in FastCDC's
+# normalized chunking, a harder pattern (21 bits) is used before the average
+# size and an easier one (17 bits) after it. The table and patterns decide
+# where chunks are cut, so changing them stops reuse of already stored chunks.
+CDC_BIT_TABLE = _cdc_bit_table()
+CDC_HARD_PATTERN = bytes(int(c) for c in "101100111000101001101")
+CDC_EASY_PATTERN = bytes(int(c) for c in "01101001110010110")
+CDC_READ_SIZE = 8 * 1024 * 1024
+DEDUP_CHUNK_HEADER = struct.Struct("<BBI")  # codec, level, uncompressed size
+DEDUP_MANIFEST_FORMAT = "usc-dedup"
+# Store folder the GUI keeps next to its .uscm manifests.
+DEDUP_STORE_DIR = ".usc-store"
+
+
+def cdc_cut(bits, start, end):
+    """
+    Offset of the next cut after start, given bits (the projected data) up to end.
+    The caller guarantees end >= start + DEDUP_MAX_CHUNK unless the input ends there.
+    """
+    if end - start <= DEDUP_MIN_CHUNK:
+        return end
+    hard_end = min(start + DEDUP_AVG_CHUNK, end)
+    pos = bits.find(CDC_HARD_PATTERN, start + DEDUP_MIN_CHUNK - len(CDC_HARD_PATTERN), hard_end)
+    if pos >= 0:
+        return pos + len(CDC_HARD_PATTERN)
+    max_end = min(start + DEDUP_MAX_CHUNK, end)
+    pos = bits.find(CDC_EASY_PATTERN, hard_end - len(CDC_EASY_PATTERN), max_end)
+    if pos >= 0:
+        return pos + len(CDC_EASY_PATTERN)
+    return max_end
+
+
+def cdc_chunks(f_in, progress=None):
+    """
+    Yield content-defined chunks of f_in as bytes. Cuts depend only on the
+    data around them, so an insertion shifts at most the chunks it touches.
+    The projection and the pattern search run in C (bytes.translate/find), so no
+    Python code runs per byte.
+    """
+    buf = bytearray()
+    bits = bytearray()
+    start = 0
+    eof = False
+    while True:
+        while not eof and len(buf) - start < DEDUP_MAX_CHUNK:
+            data = f_in.read(CDC_READ_SIZE)
+            if not data:
+                eof = True
+                break
+            buf += data
+            bits += data.translate(CDC_BIT_TABLE)
+        if start >= len(buf):
+            return
+        cut = cdc_cut(bits, start, len(buf))
+        chunk = bytes(buf[start:cut])
+        if progress:
+            progress(len(chunk))
+        yield chunk
+        start = cut
+        if start >= CDC_READ_SIZE:
+            del buf[:start]
+            del bits[:start]
+            start = 0
+
+
+def chunk_digest(data):
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+class DedupStore:
+    """
+    Content-addressed chunk store: chunks/<2 hex>/<blake2b-256 hex>, each holding
+    a DEDUP_CHUNK_HEADER and the payload compressed by the adaptive codec selector.
+    files.json caches the chunk list of every archived path by size and mtime, so
+    unchanged files are not even re-read on the next run.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, "chunks"), exist_ok=True)
+        self.cache_path = os.path.join(root, "files.json")
+        try:
+            with open(self.cache_path) as f:
+                self.file_cache = json.load(f)
+        except (OSError, ValueError):
+            self.file_cache = {}
+
+    def chunk_path(self, digest):
+        return os.path.join(self.root, "chunks", digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self.chunk_path(digest))
+
+    def put(self, digest, data, ratio=5):
+        """Compress and store one chunk; returns the bytes written."""
+        codec, level, payload = adaptive_compress_chunk(memoryview(data), ratio)
+        path = self.chunk_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(DEDUP_CHUNK_HEADER.pack(codec, level, len(data)))
+            f.write(payload)
+        os.replace(tmp, path)
+        return DEDUP_CHUNK_HEADER.size + len(payload)
+
+    def get(self, digest):
+        with open(self.chunk_path(digest), 'rb') as f:
+            codec, _, usize = DEDUP_CHUNK_HEADER.unpack(_read_exact(f, DEDUP_CHUNK_HEADER.size))
+            data = decompress_chunk(codec, f.read(), usize)
+        if len(data) != usize or chunk_digest(data) != digest:
+            raise ValueError(f"Corrupt chunk {digest} in {self.root}")
+        return data
+
+    def cached_chunks(self, file_path):
+        """Chunk list from the last run if the file is unchanged and all its chunks are still stored."""
+        st = os.stat(file_path)
+        entry = self.file_cache.get(os.path.abspath(file_path))
+        if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            return None
+        if not all(self.has(digest) for digest, _ in entry["chunks"]):
+            return None
+        return entry["chunks"]
+
+    def remember(self, file_path, chunks):
+        st = os.stat(file_path)
+        self.file_cache[os.path.abspath(file_path)] = {
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunks": chunks,
+        }
+
+    def save(self):
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.file_cache, f)
+        os.replace(tmp, self.cache_path)
+
+
+def dedup_archive(selected_files, manifest_path, store_dir, ratio=5, workers=1, progress=None):
+    """
+    Archive files as a JSON manifest of chunk references into store_dir. Only
+    chunks the store doesn't have yet are compressed (on `workers` threads) and
+    written. Returns counters for the run.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = DedupStore(store_dir)
+    stats = {"new_chunks": 0, "reused_chunks": 0, "stored_bytes": 0, "unchanged_files": 0}
+    written = set()
+    entries = []
+    window = deque()
+    with worker_pool(ThreadPoolExecutor(max_workers=max(1, workers))) as pool:
+        def drain(limit):
+            while len(window) > limit:
+                stats["stored_bytes"] += window.popleft().result()
+
+        for file_path in selected_files:
+            chunks = store.cached_chunks(file_path)
+            if chunks is not None:
+                stats["unchanged_files"] += 1
+                stats["reused_chunks"] += len(chunks)
+                if progress:
+                    progress(os.path.getsize(file_path))
+            else:
+                chunks = []
+                with open(file_path, 'rb') as f_in:
+                    for data in cdc_chunks(f_in, progress):
+                        digest = chunk_digest(data)
+                        chunks.append([digest, len(data)])
+                        if digest in written or store.has(digest):
+                            stats["reused_chunks"] += 1
+                            continue
+                        written.add(digest)
+                        stats["new_chunks"] += 1
+                        window.append(pool.submit(store.put, digest, data, ratio))
+                        drain(2 * max(1, workers))
+                drain(0)
+                store.remember(file_path, chunks)
+            entries.append({"name": os.path.basename(file_path), "size": sum(n for _, n in chunks),
+                            "chunks": chunks})
+        drain(0)
+    store.save()
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    manifest = {
+        "format": DEDUP_MANIFEST_FORMAT,
+        "version": 1,
+        # Relative, so the manifest and its store can be moved together.
+        "store": os.path.relpath(os.path.abspath(store_dir), manifest_dir),
+        "files": entries,
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return stats
+
+
+def is_dedup_manifest(src):
+    if not isinstance(src, (str, os.PathLike)):
+        return False
+    with open(src, 'rb') as f:
+        return f.read(64).replace(b" ", b"").startswith(b'{"format":"' + DEDUP_MANIFEST_FORMAT.encode())
+
+
+def dedup_restore(manifest_path, out_dir, workers=1, progress=None, members=None):
+    """
+    Rebuild the files of a dedup manifest (or those matching the glob patterns in
+    members) from its chunk store. Returns the paths written.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != DEDUP_MANIFEST_FORMAT or manifest.get("version") != 1:
+        raise ValueError(f"{os.path.basename(manifest_path)} is not a dedup manifest")
+    store_dir = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), manifest["store"])
+    if not os.path.isdir(os.path.join(store_dir, "chunks")):
+        raise ValueError(f"Chunk store not found: {store_dir}")
+    store = DedupStore(store_dir)
+    outputs = []
+    with worker_pool(ThreadPoolExecutor(max_workers=max(1, workers))) as pool:
+        for entry in manifest["files"]:
+            if members is not None and not member_matches(entry["name"], members):
+                continue
+            out_path = safe_extract_path(out_dir, entry["name"])
+            window = deque()
+            with open(out_path, 'wb') as f_out:
+                for digest, _ in entry["chunks"]:
+                    window.append(pool.submit(store.get, digest))
+                    if len(window) > 2 * max(1, workers):
+                        data = window.popleft().result()
+                        f_out.write(data)
+                        if progress:
+                            progress(len(data))
+                while window:
+                    data = window.popleft().result()
+                    f_out.write(data)
+                    if progress:
+                        progress(len(data))
+            outputs.append(out_path)
+    return outputs
+
+
+#########################
+#   Split Parts
+#########################
+def open_source(src):
+    """Open a path for reading, or pass an already open (e.g. virtual) file through."""
+    if isinstance(src, (str, os.PathLike)):
+        return open(src, 'rb')
+    src.seek(0)
+    return contextlib.nullcontext(src)
+
+
+def source_name(src):
+    return os.fspath(src) if isinstance(src, (str, os.PathLike)) else src.name
+
+
+class ConcatenatedFile(io.RawIOBase):
+    """
+    Read-only, seekable view of several part files as one file, so zipfile, tarfile,
+    py7zr and friends can read a split archive without it being merged on disk.
+    Only one part is open at a time.
+    """
+
+    def __init__(self, paths, name=None):
+        super().__init__()
+        self.paths = list(paths)
+        self.starts = []
+        total = 0
+        for path in self.paths:
+            self.starts.append(total)
+            total += os.path.getsize(path)
+        self.size = total
+        self.name = name or self.paths[0]
+        self.pos = 0
+        self._idx = None
+        self._fh = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.pos = offset
+        return self.pos
+
+    def readinto(self, buffer):
+        # Fill the whole buffer across part boundaries; zipfile expects full reads.
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view) and self.pos < self.size:
+            idx = bisect.bisect_right(self.starts, self.pos) - 1
+            if idx != self._idx:
+                if self._fh:
+                    self._fh.close()
+                self._fh = open(self.paths[idx], 'rb')
+                self._idx = idx
+            self._fh.seek(self.pos - self.starts[idx])
+            n = self._fh.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+            self.pos += n
+        return filled
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        super().close()
+
+
+def copy_file_fast(f_in, f_out, length):
+    """
+    Append length bytes from f_in to f_out in the kernel where possible
+    (copy_file_range, then sendfile), falling back to a plain read/write loop.
+    Works on the raw descriptors, so neither file object may hold buffered data.
+    """
+    fd_in, fd_out = f_in.fileno(), f_out.fileno()
+    remaining = length
+    copiers = []
+    if hasattr(os, "copy_file_range"):
+        copiers.append(lambda n: os.copy_file_range(fd_in, fd_out, n))
+    if hasattr(os, "sendfile"):
+        copiers.append(lambda n: os.sendfile(fd_out, fd_in, None, n))
+    for copier in copiers:
+        try:
+            while remaining > 0:
+                n = copier(min(remaining, 1 << 30))
+                if n == 0:
+                    return length - remaining
+                remaining -= n
+            return length
+        except OSError:
+            continue
+    while remaining > 0:
+        data = os.read(fd_in, min(remaining, STREAM_BUFFER_SIZE))
+        if not data:
+            break
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd_out, view):]
+        remaining -= len(data)
+    return length - remaining
+
+
+def join_parts(part_paths, out_path, progress=None):
+    """Physically concatenate raw byte-slice parts (e.g. cloud split uploads)."""
+    with open(out_path, 'wb') as f_out:
+        for path in part_paths:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f_in:
+                copied = copy_file_fast(f_in, f_out, size)
+            if copied != size:
+                raise ValueError(f"Short copy from {os.path.basename(path)}")
+            if progress:
+                progress(size)
+    return out_path
+
+
+def is_zip_per_part(part_paths):
+    """
+    Older split output stored each slice as its own single-member zip. Slices of one
+    big zip can't pass is_zipfile on the first part, since the directory is at the end.
+    """
+    return len(part_paths) > 1 and zipfile.is_zipfile(part_paths[0])
+
+
+def join_zip_parts(part_paths, out_dir, progress=None):
+    """Stream the single member of every part zip into one output file, in order."""
+    target = None
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    with contextlib.ExitStack() as stack:
+        f_out = None
+        for path in part_paths:
+            with zipfile.ZipFile(path) as zf:
+                info = zf.infolist()[0]
+                if f_out is None:
+                    target = safe_extract_path(out_dir, info.filename)
+                    f_out = stack.enter_context(open(target, 'wb'))
+                with zf.open(info) as f_in:
+                    stream_copy(f_in, f_out, buffer, progress)
+    return target
+
+
+def zip_part_member(part_path):
+    """The file name an older per-part zip set restores, from its first part."""
+    with zipfile.ZipFile(part_path) as zf:
+        return zf.infolist()[0].filename
+
+
+# "name.part7.zip" -> prefix "name", part 7, extension ".zip" (extension may be empty).
+PART_NAME_RE = re.compile(r"^(?P<prefix>.+?)\.part(?P<num>\d+)(?P<ext>\..*)?$")
+
+
+def parse_part_name(name):
+    m = PART_NAME_RE.match(name)
+    if not m:
+        return None
+    return m.group("prefix"), int(m.group("num")), m.group("ext") or ""
+
+
+def scan_part_sets(dirname):
+    """
+    One os.scandir pass over a directory: {(prefix, ext): {part number: [file names]}}.
+    """
+    index = {}
+    with os.scandir(dirname or ".") as it:
+        for entry in it:
+            if ".part" not in entry.name:
+                continue
+            parsed = parse_part_name(entry.name)
+            if parsed is None or not entry.is_file():
+                continue
+            prefix, num, ext = parsed
+            index.setdefault((prefix, ext), {}).setdefault(num, []).append(entry.name)
+    return index
+
+
+def resolve_part_set(numbers, label):
+    """Ordered part names, or ValueError naming missing or duplicated part numbers."""
+    duplicates = sorted(n for n, names in numbers.items() if len(names) > 1)
+    missing = sorted(set(range(max(numbers) + 1)) - set(numbers))
+    problems = []
+    if missing:
+        problems.append(f"missing part(s) {', '.join(map(str, missing))}")
+    if duplicates:
+        problems.append(f"duplicate part(s) {', '.join(map(str, duplicates))}")
+    if problems:
+        raise ValueError(f"{label}: {'; '.join(problems)}")
+    return [numbers[n][0] for n in sorted(numbers)]
+
+
+def plan_extraction(selected_files):
+    """
+    Turn a selection into extraction jobs (source, extension, size). Each directory is
+    scanned once and each part or volume set becomes one job however many of its
+    parts were selected. Returns (jobs, problems); problems lists part sets that can't be used.
+    """
+    dir_index = {}
+    seen = set()
+    jobs = []
+    problems = []
+    for file_path in selected_files:
+        dirname, base = os.path.split(file_path)
+        volume = VOLUME_NAME_RE.match(base)
+        if volume and os.path.isfile(os.path.join(dirname, volume.group("stem") + ".uscv")):
+            # Any volume of a set stands for the whole set, via its index.
+            file_path = os.path.join(dirname, volume.group("stem") + ".uscv")
+        if file_path.endswith(".uscv"):
+            if file_path in seen:
+                continue
+            seen.add(file_path)
+            with open(file_path) as f:
+                volumes = [os.path.join(dirname, v["name"]) for v in json.load(f)["volumes"]]
+            jobs.append((file_path, ".uscv", sum(os.path.getsize(v) for v in volumes if os.path.isfile(v))))
+            continue
+        parsed = parse_part_name(base)
+        if parsed is None:
+            jobs.append((file_path, os.path.splitext(file_path)[1], os.path.getsize(file_path)))
+            continue
+        prefix, _, ext = parsed
+        key = (dirname, prefix, ext)
+        if key in seen:
+            continue
+        seen.add(key)
+        if dirname not in dir_index:
+            dir_index[dirname] = scan_part_sets(dirname)
+        label = prefix + ext
+        numbers = dir_index[dirname].get((prefix, ext))
+        if not numbers:
+            problems.append(f"{label}: no parts found")
+            continue
+        try:
+            names = resolve_part_set(numbers, label)
+        except ValueError as e:
+            problems.append(str(e))
+            continue
+        paths = [os.path.join(dirname, n) for n in names]
+        jobs.append((ConcatenatedFile(paths, os.path.join(dirname, label)), ext, sum(map(os.path.getsize, paths))))
+    return jobs, problems
+
+
+#########################
+#   Volume Sets
+#########################
+# A volume set is '<stem>.vol0.usc', '<stem>.vol1.usc', ... plus a small JSON
+# index '<stem>.uscv'. Every volume is a complete .usc container whose chunks
+# carry their real offsets within the member, so volumes are compressed,
+# uploaded and decoded independently and a member is restored from only the
+# volumes that hold it. Volumes are cut on chunk boundaries.
+VOLUME_INDEX_FORMAT = "usc-volumes"
+VOLUME_NAME_RE = re.compile(r"^(?P<stem>.+)\.vol(?P<num>\d+)\.usc$")
+# Chunk codec per algorithm; the adaptive engine picks per chunk instead.
+VOLUME_CODECS = {"zip": CODEC_ZLIB, "zstd": CODEC_ZSTD, "xz": CODEC_XZ, "7z": CODEC_XZ, "tar": CODEC_STORE}
+
+
+def plan_volumes(selected_files, part_size):
+    """
+    Group the selection into volumes of about part_size input bytes:
+    [[(path, name, offset, length), ...], ...]. Cuts only fall on chunk boundaries.
+    Members are named by basename, so those must be unique.
+    """
+    check_unique_names(selected_files)
+    chunk_size = min(AI_CHUNK_SIZE, part_size)
+    volumes = [[]]
+    filled = 0
+    for file_path in selected_files:
+        size = os.path.getsize(file_path)
+        name = os.path.basename(file_path)
+        start = 0
+        for offset, length in (plan_blocks(size, chunk_size) if size else [(0, 0)]):
+            if filled and filled + length > part_size:
+                if offset > start:
+                    volumes[-1].append((file_path, name, start, offset - start))
+                volumes.append([])
+                filled = 0
+                start = offset
+            filled += length
+        volumes[-1].append((file_path, name, start, size - start))
+    return volumes
+
+
+def _write_volume(job):
+    """
+    Worker: compress one volume's pieces into a standalone .usc container.
+    Returns the source bytes it covers and the digest of the volume file.
+    """
+    volume_path, pieces, codec, level, ratio, chunk_size = job
+    with open(volume_path, 'wb') as f:
+        f_out = HashingWriter(f)
+        writer = UscWriter(f_out)
+        for file_path, name, offset, length in pieces:
+            writer.begin_member(name, os.path.getsize(file_path), offset)
+            for view in file_slices(file_path, chunk_size, offset, length):
+                if codec is None:
+                    chunk_codec, chunk_level, payload = adaptive_compress_chunk(view, ratio)
+                else:
+                    chunk_codec, chunk_level, payload = codec, level, compress_chunk(codec, level, view)
+                    if codec != CODEC_STORE and len(payload) >= len(view):
+                        chunk_codec, chunk_level, payload = CODEC_STORE, 0, bytes(view)
+                writer.add_chunk(chunk_codec, chunk_level, len(view), zlib.crc32(view), payload)
+        writer.close()
+    return sum(length for _, _, _, length in pieces), f_out.digest()
+
+
+def volume_compress(selected_files, index_path, part_size, algorithm="zip", level=5, adaptive=False, ai_ratio=5,
+                    workers=1, progress=None):
+    """
+    Write the selection as a volume set next to index_path (a .uscv), compressing
+    volumes in parallel. The index is written last, so its presence means the set
+    is complete. Returns the volume paths followed by the index path.
+    """
+    if not adaptive and algorithm not in VOLUME_CODECS:
+        raise ValueError(f"{algorithm} has no .usc chunk codec; use {', '.join(VOLUME_CODECS)} or the adaptive engine.")
+    codec = None if adaptive else VOLUME_CODECS[algorithm]
+    stem = index_path[:-len(".uscv")] if index_path.endswith(".uscv") else index_path
+    plan = plan_volumes(selected_files, part_size)
+    paths = [f"{stem}.vol{i}.usc" for i in range(len(plan))]
+    jobs = [(path, pieces, codec, level, ai_ratio, min(AI_CHUNK_SIZE, part_size)) for path, pieces in zip(paths, plan)]
+    digests = []
+
+    def collect(results):
+        for done, digest in results:
+            digests.append(digest)
+            if progress:
+                progress(done)
+
+    if workers <= 1:
+        collect(map(_write_volume, jobs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with worker_pool(ProcessPoolExecutor(max_workers=workers)) as pool:
+            collect(pool.map(_write_volume, jobs))
+
+    members = {}
+    for number, pieces in enumerate(plan):
+        for file_path, name, _, _ in pieces:
+            entry = members.setdefault(name, {"name": name, "size": os.path.getsize(file_path), "volumes": []})
+            entry["volumes"].append(number)
+    index = {
+        "format": VOLUME_INDEX_FORMAT,
+        "version": 1,
+        "volumes": [{"name": os.path.basename(p), "size": os.path.getsize(p), "digest": d}
+                    for p, d in zip(paths, digests)],
+        "members": list(members.values()),
+    }
+    tmp = index_path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, index_path)
+    return paths + [index_path]
+
+
+def is_volume_index(src):
+    if not isinstance(src, (str, os.PathLike)):
+        return False
+    with open(src, 'rb') as f:
+        return f.read(64).replace(b" ", b"").replace(b"\n", b"").startswith(
+            b'{"format":"' + VOLUME_INDEX_FORMAT.encode())
+
+
+def volume_restore(index_path, out_dir, workers=1, members=None, progress=None):
+    """
+    Restore a volume set, decoding chunks from all volumes in parallel. With
+    members (glob patterns) only the matching members are restored, and only the
+    volumes holding them are opened. Returns the paths written.
+    """
+    with open(index_path) as f:
+        index = json.load(f)
+    folder = os.path.dirname(index_path)
+    wanted = [m for m in index["members"] if members is None or member_matches(m["name"], members)]
+    needed = sorted({number for m in wanted for number in m["volumes"]})
+    missing = [index["volumes"][n]["name"] for n in needed
+               if not os.path.isfile(os.path.join(folder, index["volumes"][n]["name"]))]
+    if missing:
+        raise ValueError(f"{os.path.basename(index_path)}: missing volume(s) {', '.join(missing)}")
+    truncated = [index["volumes"][n]["name"] for n in needed
+                 if os.path.getsize(os.path.join(folder, index["volumes"][n]["name"])) != index["volumes"][n]["size"]]
+    if truncated:
+        raise ValueError(f"{os.path.basename(index_path)}: volume(s) {', '.join(truncated)} changed size")
+
+    restored = {}
+    for member in wanted:
+        target = safe_extract_path(out_dir, member["name"])
+        with open(target, 'wb') as f_out:
+            f_out.truncate(member["size"])
+        restored[member["name"]] = target
+    jobs = []
+    for number in needed:
+        volume_path = os.path.join(folder, index["volumes"][number]["name"])
+        with UscReader(volume_path) as reader:
+            for member in reader.members:
+                name = member.name
+                if name not in restored:
+                    continue
+                problem = usc_member_problem(member)
+                if problem:
+                    raise ValueError(f"{os.path.basename(volume_path)}: {problem}")
+                for c in member.chunks:
+                    fields = (c.payload_offset, c.member_offset, c.usize, c.csize, c.codec, c.level, c.crc)
+                    jobs.append((volume_path, reader.base, fields, restored[name]))
+    if workers <= 1:
+        for job in jobs:
+            usize = _usc_extract_job(job)
+            if progress:
+                progress(usize)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with worker_pool(ProcessPoolExecutor(max_workers=workers)) as pool:
+            for usize in pool.map(_usc_extract_job, jobs, chunksize=4):
+                if progress:
+                    progress(usize)
+    return list(restored.values())
+
+
+#########################
+#   Incremental ZIP
+#########################
+INCREMENTAL_MANIFEST_SUFFIX = ".manifest.json"
+# Once superseded members take up more than this share of the archive, the next
+# update rewrites it compactly instead of appending.
+INCREMENTAL_MAX_DEAD = 0.25
+
+
+def file_crc32(path, buffer):
+    crc = 0
+    with open(path, 'rb') as f:
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                return crc
+            crc = zlib.crc32(view[:n], crc)
+
+
+def load_zip_manifest(out_path):
+    """
+    The manifest written by the last incremental run, or None when it is missing
+    or the archive was modified since (its size or mtime no longer match).
+    """
+    try:
+        with open(out_path + INCREMENTAL_MANIFEST_SUFFIX) as f:
+            manifest = json.load(f)
+        st = os.stat(out_path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("archive_size") != st.st_size or manifest.get("archive_mtime_ns") != st.st_mtime_ns:
+        return None
+    return manifest
+
+
+def save_zip_manifest(out_path, sources, dead_bytes):
+    """Record (path, size, mtime_ns, crc32, compressed offset and size) for every member."""
+    members = {}
+    with zipfile.ZipFile(out_path) as zf:
+        for info in zf.infolist():
+            path = sources.get(info.filename)
+            if path is None:
+                continue
+            st = os.stat(path)
+            members[info.filename] = {
+                "path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                "crc32": info.CRC, "header_offset": info.header_offset, "compress_size": info.compress_size,
+            }
+    st = os.stat(out_path)
+    manifest = {"archive_size": st.st_size, "archive_mtime_ns": st.st_mtime_ns,
+                "dead_bytes": dead_bytes, "members": members}
+    tmp = out_path + INCREMENTAL_MANIFEST_SUFFIX + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, out_path + INCREMENTAL_MANIFEST_SUFFIX)
+
+
+def zip_member_span(info):
+    """Bytes a member occupies in the archive body: local header, data and data descriptor."""
+    extra = len(info.filename.encode("utf-8")) + len(info.extra)
+    descriptor = 24 if info.flag_bits & 0x08 else 0
+    return zipfile.sizeFileHeader + extra + info.compress_size + descriptor
+
+
+def zip_copy_raw_member(zf, src, info):
+    """
+    Copy one member's compressed bytes from the open raw file src (another ZIP)
+    into zf, without recompressing. The local header is written afresh.
+    """
+    src.seek(info.header_offset)
+    header = _read_exact(src, zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    zinfo.create_system = info.create_system
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    # Sizes go in the new local header, so no data descriptor follows.
+    zinfo.flag_bits = info.flag_bits & ~0x08
+    zip_begin_raw_member(zf, zinfo, None)
+    zf.fp.flush()
+    start = zf.fp.tell()
+    src.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+    os.lseek(zf.fp.fileno(), start, os.SEEK_SET)
+    if copy_file_fast(src, zf.fp, info.compress_size) != info.compress_size:
+        raise ValueError(f"Truncated member {info.filename} in the archive being updated")
+    zf.fp.seek(start + info.compress_size)
+    zip_end_raw_member(zf, zinfo, None)
+    return info.compress_size
+
+
+def incremental_zip(selected_files, out_path, level=5, workers=1, progress=None):
+    """
+    Bring out_path up to date with the selection using its manifest
+    (<archive>.manifest.json). Files whose size and mtime match the manifest are
+    kept as they are; a file with a new mtime but the same size is kept when its
+    CRC-32 still matches the member's. Only new or changed files are deflated.
+
+    Normally the update happens in place: changed members are dropped from the
+    central directory and the new data is appended over the old directory, so a
+    small change to a huge archive costs seconds. An interruption during that
+    append can leave the archive unreadable. Once superseded members exceed
+    INCREMENTAL_MAX_DEAD of the archive, it is rewritten compactly instead into a
+    temp file, with unchanged members copied as raw compressed bytes.
+    Returns counters for the run.
+    """
+    stats = {"reused_members": 0, "encoded_members": 0, "removed_members": 0, "mode": "full"}
+    sources = {os.path.basename(p): p for p in selected_files}
+    manifest = load_zip_manifest(out_path)
+    if manifest is None:
+        zip_files(selected_files, out_path, level, workers, progress=progress)
+        stats["encoded_members"] = len(selected_files)
+        save_zip_manifest(out_path, sources, 0)
+        return stats
+
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    with zipfile.ZipFile(out_path) as old:
+        infos = {info.filename: info for info in old.infolist()}
+    keep, changed = [], []
+    for file_path in selected_files:
+        arcname = os.path.basename(file_path)
+        entry = manifest["members"].get(arcname)
+        info = infos.get(arcname)
+        st = os.stat(file_path)
+        same = (entry is not None and info is not None and entry["path"] == os.path.abspath(file_path)
+                and entry["size"] == st.st_size and entry["crc32"] == info.CRC)
+        if same and entry["mtime_ns"] != st.st_mtime_ns:
+            same = file_crc32(file_path, buffer) == info.CRC
+        if same:
+            keep.append(file_path)
+        else:
+            changed.append(file_path)
+    stale = [name for name in infos if name not in sources or sources[name] in changed]
+    stats["reused_members"] = len(keep)
+    stats["encoded_members"] = len(changed)
+    stats["removed_members"] = len([name for name in infos if name not in sources])
+
+    dead = manifest.get("dead_bytes", 0) + sum(zip_member_span(infos[name]) for name in stale)
+    if dead <= INCREMENTAL_MAX_DEAD * os.path.getsize(out_path):
+        stats["mode"] = "append"
+        with zipfile.ZipFile(out_path, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+            for name in stale:
+                zf.filelist.remove(zf.NameToInfo.pop(name))
+            # Make close() rewrite the central directory even if nothing is appended.
+            zf._didModify = True
+            zip_add_files(zf, changed, level, workers, progress)
+        if progress:
+            progress(sum(os.path.getsize(p) for p in keep))
+    else:
+        stats["mode"] = "compact"
+        dead = 0
+        tmp_path = out_path + ".updating"
+        try:
+            with open(out_path, 'rb', buffering=0) as src, \
+                    zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+                for file_path in keep:
+                    zip_copy_raw_member(zf, src, infos[os.path.basename(file_path)])
+                    if progress:
+                        progress(os.path.getsize(file_path))
+                zip_add_files(zf, changed, level, workers, progress)
+            os.replace(tmp_path, out_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    save_zip_manifest(out_path, sources, dead)
+    return stats
+
+
+#########################
+#   Auto Tuning
+#########################
+# (algorithm, level) pairs tried on the sample. 7z uses the same LZMA2 as xz but
+# can't write in parallel, so xz stands in for it.
+AUTO_CANDIDATES = [("zip", 1), ("zip", 6), ("zip", 9), ("zstd", 1), ("zstd", 3), ("zstd", 9),
+                   ("brotli", 1), ("brotli", 5), ("brotli", 9), ("xz", 1), ("xz", 6), ("xz", 9)]
+AUTO_TARGETS = ["speed", "ratio:<floor>", "time:<seconds>"]
+# Bytes sampled per file type, taken as AUTO_SLICE_SIZE slices spread over the files.
+AUTO_SAMPLE_SIZE = 2 * 1024 * 1024
+AUTO_SLICE_SIZE = 256 * 1024
+# "speed" still wants some compression; above this ratio data counts as incompressible.
+AUTO_MIN_GAIN = 0.97
+# Parallel speed-up per extra worker, and the share of free RAM the workers may use.
+AUTO_SCALING = 0.85
+AUTO_MEMORY_SHARE = 0.5
+# Local-header, central-directory and zip64 bytes per ZIP member, plus the name twice.
+ZIP_MEMBER_OVERHEAD = 96
+# What a tar header adds per file once the whole stream is compressed.
+TAR_MEMBER_OVERHEAD = 16
+AUTO_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".usc-autotune.json")
+
+
+def system_resources():
+    """(logical CPUs, total RAM, available RAM); RAM is None without psutil."""
+    try:
+        import psutil
+    except ImportError:
+        return os.cpu_count() or 1, None, None
+    memory = psutil.virtual_memory()
+    return psutil.cpu_count(logical=True) or 1, memory.total, memory.available
+
+
+def parse_auto_target(target):
+    """'speed', 'ratio:0.4' or 'time:60' -> (kind, value)."""
+    kind, _, value = (target or "speed").partition(":")
+    if kind == "speed" and not value:
+        return kind, None
+    if kind in ("ratio", "time") and value:
+        try:
+            return kind, float(value)
+        except ValueError:
+            pass
+    raise ValueError(f"Unknown auto target '{target}' (use {', '.join(AUTO_TARGETS)})")
+
+
+def auto_sample(paths):
+    """Up to AUTO_SAMPLE_SIZE bytes from paths, as slices spread evenly over each file."""
+    total = sum(os.path.getsize(p) for p in paths)
+    budget = AUTO_SAMPLE_SIZE
+    pieces = []
+    for path in paths:
+        size = os.path.getsize(path)
+        share = max(AUTO_SLICE_SIZE, AUTO_SAMPLE_SIZE * size // total) if total else 0
+        take = min(size, share, budget)
+        with open(path, 'rb') as f:
+            if take == size:
+                pieces.append(f.read())
+            else:
+                slices = max(1, take // AUTO_SLICE_SIZE)
+                for i in range(slices):
+                    f.seek((size - AUTO_SLICE_SIZE) * i // max(1, slices - 1) if slices > 1 else 0)
+                    pieces.append(f.read(AUTO_SLICE_SIZE))
+        budget -= take
+        if budget <= 0:
+            break
+    return pieces
+
+
+def auto_probe(pieces):
+    """Compress the sample with every available candidate: {'algo-level': [ratio, single-thread MB/s]}."""
+    codecs = {"zip": lambda data, level: zlib.compress(data, level)}
+    if ZSTD_AVAILABLE:
+        codecs["zstd"] = lambda data, level: zstd.ZstdCompressor(level=level).compress(data)
+    if BROTLI_AVAILABLE:
+        codecs["brotli"] = lambda data, level: brotli.compress(data, quality=level)
+    if LZMA_AVAILABLE:
+        codecs["xz"] = lambda data, level: lzma.compress(data, preset=level)
+    size = sum(len(p) for p in pieces)
+    joined = b"".join(pieces)
+    results = {}
+    for algorithm, level in AUTO_CANDIDATES:
+        if algorithm not in codecs or not size:
+            continue
+        start = time.perf_counter()
+        # ZIP compresses each member on its own; the others see one solid stream.
+        if algorithm == "zip":
+            packed = sum(len(codecs["zip"](p, level)) for p in pieces)
+        else:
+            packed = len(codecs[algorithm](joined, level))
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        results[f"{algorithm}-{level}"] = [packed / size, size / (1024 * 1024) / elapsed]
+    return results
+
+
+def auto_worker_memory(algorithm, level):
+    """Rough bytes one worker needs for algorithm at level."""
+    if algorithm == "xz":
+        # An LZMA2 encoder needs about 11.5x its dictionary, plus the block being compressed.
+        return XZ_PRESET_DICT[level] * 23 // 2 + xz_block_size(level)
+    if algorithm == "zstd":
+        return zstd.ZstdCompressionParameters.from_level(level).estimated_compression_context_size()
+    if algorithm == "zip":
+        # A worker process: the interpreter plus the block in and out.
+        return 32 * 1024 * 1024 + 2 * PARALLEL_BLOCK_SIZE
+    return 0
+
+
+def auto_tune(paths, target="speed", cache_path=AUTO_CACHE_PATH, refresh=False):
+    """
+    Pick the algorithm, level and worker count for paths. Each file type
+    (extension) is probed once on a sample and the per-type ratios and speeds
+    are cached in cache_path; the estimate for the whole selection weighs them
+    by bytes, scales by the workers the CPUs and free RAM allow, and applies
+    target: 'speed' (fastest that still compresses), 'ratio:<floor>' (fastest
+    at or below that output/input ratio) or 'time:<seconds>' (best ratio that
+    fits the budget).
+    """
+    kind, value = parse_auto_target(target)
+    paths = [os.fspath(p) for p in paths]
+    by_type = {}
+    for path in paths:
+        by_type.setdefault(os.path.splitext(path)[1].lower(), []).append(path)
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable auto-tune cache {cache_path}: {e}")
+    probed = []
+    for ext, files in by_type.items():
+        if refresh or ext not in cache:
+            cache[ext] = auto_probe(auto_sample(files))
+            probed.append(ext)
+    if probed and cache_path:
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(cache, f, indent=1)
+        except OSError as e:
+            logging.warning(f"Could not save auto-tune cache {cache_path}: {e}")
+
+    cpus, _, available = system_resources()
+    sizes = {ext: sum(os.path.getsize(p) for p in files) for ext, files in by_type.items()}
+    total = sum(sizes.values())
+    zip_overhead = sum(ZIP_MEMBER_OVERHEAD + 2 * len(os.path.basename(p).encode()) for p in paths)
+    plans = []
+    for algorithm, level in AUTO_CANDIDATES:
+        key = f"{algorithm}-{level}"
+        if not all(key in cache[ext] for ext in by_type):
+            continue
+        if algorithm == "brotli":
+            units = 1
+        elif algorithm == "xz":
+            units = sum(math.ceil(size / xz_block_size(level)) for size in sizes.values())
+        else:
+            units = sum(max(1, math.ceil(os.path.getsize(p) / PARALLEL_BLOCK_SIZE)) for p in paths)
+        workers = max(1, min(cpus, units))
+        memory = auto_worker_memory(algorithm, level)
+        if available and memory:
+            workers = max(1, min(workers, int(available * AUTO_MEMORY_SHARE // memory)))
+        speedup = 1 + (workers - 1) * AUTO_SCALING
+        seconds = sum(sizes[ext] / (1024 * 1024) / cache[ext][key][1] for ext in by_type) / speedup
+        packed = sum(sizes[ext] * cache[ext][key][0] for ext in by_type)
+        if algorithm == "zip":
+            packed += zip_overhead
+        elif len(paths) > 1:
+            packed += TAR_MEMBER_OVERHEAD * len(paths)
+        plans.append({"algorithm": algorithm, "level": level, "workers": workers,
+                      "estimated_ratio": packed / total if total else 1.0, "estimated_seconds": seconds})
+    if not plans:
+        raise RuntimeError("No compressor could be probed for auto mode.")
+
+    fastest = min(plans, key=lambda p: p["estimated_seconds"])
+    if kind == "speed":
+        fitting = [p for p in plans if p["estimated_ratio"] <= AUTO_MIN_GAIN]
+        choice = min(fitting, key=lambda p: p["estimated_seconds"]) if fitting else fastest
+    elif kind == "ratio":
+        fitting = [p for p in plans if p["estimated_ratio"] <= value]
+        choice = (min(fitting, key=lambda p: p["estimated_seconds"]) if fitting
+                  else min(plans, key=lambda p: p["estimated_ratio"]))
+    else:
+        fitting = [p for p in plans if p["estimated_seconds"] <= value]
+        choice = min(fitting, key=lambda p: p["estimated_ratio"]) if fitting else fastest
+    logging.info(f"Auto ({target}): {choice['algorithm']} level {choice['level']}, {choice['workers']} workers, "
+                 f"~{choice['estimated_ratio']:.2f} ratio in ~{choice['estimated_seconds']:.1f}s")
+    return dict(choice, target=target, met_target=bool(fitting) or kind == "speed",
+                probed_types=probed, cached_types=[ext for ext in by_type if ext not in probed])
+
+
+#########################
+#   Library API (no GUI)
+#########################
+ALGORITHMS = ["zip", "zstd", "brotli", "7z", "xz", "tar"]
+
+
+def zip_files(selected_files, out_path, level=5, workers=1, zstd_dictionary=False, progress=None):
+    """
+    ZIP the selection. With one worker each file is streamed through a reusable buffer,
+    so peak memory stays flat; more workers deflate in parallel via parallel_zip.
+    zstd_dictionary switches to the dictionary-trained mode for many small files.
+    """
+    if zstd_dictionary:
+        return zip_with_zstd_dictionary(selected_files, out_path, level, progress)
+    if workers > 1:
+        return parallel_zip(selected_files, out_path, level, workers, progress)
+    with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        return zip_add_files(zf, selected_files, level, workers, progress)
+
+
+def zip_add_files(zf, selected_files, level=5, workers=1, progress=None):
+    """Append files to an open ZipFile, streamed with one worker or deflated in parallel with more."""
+    if workers > 1:
+        return parallel_zip_into(zf, selected_files, level, workers, progress)
+    buffer = bytearray(STREAM_BUFFER_SIZE)
+    total = 0
+    for file_path in selected_files:
+        arcname = os.path.basename(file_path)
+        with open(file_path, 'rb') as fin, zf.open(arcname, 'w', force_zip64=True) as fout:
+            total += stream_copy(fin, fout, buffer, progress)
+    return total
+
+
+def tar_files(selected_files, out_path, progress=None):
+    """Plain (uncompressed) .tar of the selection."""
+    if not TAR_AVAILABLE:
+        raise RuntimeError("Install Python's tarfile or ensure it's available.")
+    total = 0
+    with tarfile.open(out_path, 'w') as tf:
+        for file_path in selected_files:
+            tarinfo = tf.gettarinfo(file_path, arcname=os.path.basename(file_path))
+            with open(file_path, 'rb') as f_in:
+                tf.addfile(tarinfo, ProgressReader(f_in, progress))
+            total += tarinfo.size
+    return total
+
+
+def sevenz_filters(level):
+    """Map the 1..9 level scale to a py7zr filter chain: LZMA2 at that preset, 0 = store."""
+    if level <= 0:
+        return [{"id": py7zr.FILTER_COPY}]
+    preset = min(level, 9) | (py7zr.PRESET_EXTREME if level >= 9 else 0)
+    return [{"id": py7zr.FILTER_LZMA2, "preset": preset}]
+
+
+# py7zr releases [first, last) whose writer internals sevenz_start_block() relies on.
+SEVENZ_BLOCK_VERSIONS = ((0, 20), (2, 0))
+
+
+def sevenz_can_start_block(archive):
+    """True if this py7zr has the writer internals sevenz_start_block() uses."""
+    try:
+        version = tuple(int(part) for part in py7zr.__version__.split(".")[:2])
+    except (AttributeError, ValueError):
+        return False
+    first, last = SEVENZ_BLOCK_VERSIONS
+    if not first <= version < last:
+        return False
+    streams = getattr(archive.header, "main_streams", None)
+    unpackinfo = getattr(streams, "unpackinfo", None)
+    return (bool(getattr(unpackinfo, "folders", None)) and hasattr(archive.worker, "flush_archive")
+            and hasattr(archive.header, "_initialized"))
+
+
+def sevenz_start_block(archive):
+    """
+    Close the current solid block of a SevenZipFile being written; the next file
+    opens a new one. The finished block's encoder is dropped so only one is alive.
+    This reaches into py7zr's writer, so check sevenz_can_start_block() first.
+    """
+    folder = archive.header.main_streams.unpackinfo.folders[-1]
+    archive.worker.flush_archive(archive.fp, folder)
+    folder.compressor = None
+    archive.header._initialized = False
+
+
+def sevenz_source(file_path, progress):
+    """
+    file_path as a pathlib path whose open() reports every read to progress, so
+    py7zr's chunked reads of a large file show up as progress (and a cancelled
+    job stops mid-file instead of after it).
+    """
+    import pathlib
+
+    class ProgressPath(type(pathlib.Path())):
+        def open(self, *args, **kwargs):
+            return ProgressReader(super().open(*args, **kwargs), progress)
+
+    return ProgressPath(file_path)
+
+
+def sevenz_files(selected_files, out_path, level=5, solid_block_mb=0, progress=None):
+    """
+    Native .7z of the selection. solid_block_mb 0 keeps everything in one solid
+    block (best ratio), -1 gives every file its own block, and N starts a new block
+    after about N MB so a single file can be extracted without decoding the rest.
+    With a py7zr whose internals aren't known to work, it falls back to one block.
+    """
+    if not SEVENZ_AVAILABLE:
+        raise RuntimeError("Install py7zr to handle .7z.")
+    block_limit = solid_block_mb * 1024 * 1024
+    block_bytes = 0
+    total = 0
+    check = progress_check(progress)
+    with py7zr.SevenZipFile(out_path, 'w', filters=sevenz_filters(level)) as archive:
+        for file_path in selected_files:
+            check()
+            size = os.path.getsize(file_path)
+            if size and block_bytes and (solid_block_mb < 0 or (block_limit and block_bytes >= block_limit)):
+                if sevenz_can_start_block(archive):
+                    sevenz_start_block(archive)
+                else:
+                    logging.warning(f"py7zr {getattr(py7zr, '__version__', '?')} can't start new solid blocks; "
+                                    "writing one solid block")
+                    solid_block_mb, block_limit = 0, 0
+                block_bytes = 0
+            reported = [0]
+
+            def report(nbytes):
+                reported[0] += nbytes
+                if progress:
+                    progress(nbytes)
+
+            archive.write(sevenz_source(file_path, report), os.path.basename(file_path))
+            if progress and size > reported[0]:
+                progress(size - reported[0])
+            block_bytes += size
+            total += size
+    return total
+
+
+def compress_format(selected_files, out_path, out_ext, level=5, workers=1, long_distance=False,
+                    zstd_dictionary=False, solid_block_mb=0, progress=None):
+    """
+    Dispatch to the writer for out_ext (zip, tar, 7z, zst, br, xz).
+    """
+    if out_ext == "zip":
+        return zip_files(selected_files, out_path, level, workers, zstd_dictionary, progress)
+    if out_ext == "tar":
+        return tar_files(selected_files, out_path, progress)
+    if out_ext == "7z":
+        return sevenz_files(selected_files, out_path, level, solid_block_mb, progress)
+    if out_ext in ("zst", "br", "xz"):
+        algo = {"zst": "zstd", "br": "brotli", "xz": "xz"}[out_ext]
+        return stream_compress_files(algo, selected_files, out_path, level, workers, long_distance, progress)
+    raise ValueError(f"No full implementation for .{out_ext} compression yet.")
+
+
+def open_sink(dst):
+    """Open a path for writing, or pass an already open file object through."""
+    if isinstance(dst, (str, os.PathLike)):
+        return open(dst, 'wb')
+    return contextlib.nullcontext(dst)
+
+
+# Formats a split part can be written in: each part is a standalone archive or frame.
+SPLIT_EXTENSIONS = ("usc", "zip", "zst", "br", "xz")
+
+
+def compress_part(chunk_data, out_file, out_ext, level, base_name, use_ai=False, ai_ratio=5, check=None):
+    """
+    For the split approach: compress one slice of base_name (bytes or a
+    memoryview, which is never copied) into out_file (a path or a writable file object).
+    check() is called between xz blocks (see open_stream_writer).
+    """
+    if use_ai:
+        # A standalone .usc container; merged parts decode back to back.
+        view = memoryview(chunk_data)
+        with open_sink(out_file) as f_out:
+            writer = UscWriter(f_out)
+            chunks = (view[i:i + AI_CHUNK_SIZE] for i in range(0, len(view), AI_CHUNK_SIZE))
+            write_usc_member(writer, base_name, len(view), chunks, ai_ratio)
+            writer.close()
+    elif out_ext == "zip":
+        with zipfile.ZipFile(out_file, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(base_name, chunk_data)
+    elif out_ext in ("zst", "br", "xz"):
+        # Each part is a complete frame, so .zst and .xz parts also decode when concatenated.
+        algo = {"zst": "zstd", "br": "brotli", "xz": "xz"}[out_ext]
+        with open_sink(out_file) as f, open_stream_writer(algo, f, level, check=check) as writer:
+            writer.write(chunk_data)
+    else:
+        raise ValueError(f"{out_ext} parts aren't supported; split as {', '.join(SPLIT_EXTENSIONS)}.")
+
+
+def split_and_compress(file_path, part_size, out_dir, out_ext, level=5, use_ai=False, ai_ratio=5, progress=None):
+    """
+    Cut file_path into part_size slices written as '<name>.partN.<ext>' in out_dir.
+    Slices are views of the mapped file (see file_slices), not copies.
+    """
+    base_name = os.path.basename(file_path)
+    # An empty file still gets one (empty) part.
+    slices = file_slices(file_path, part_size) if os.path.getsize(file_path) else [memoryview(b"")]
+    parts = []
+    for part_idx, view in enumerate(slices):
+        part_out = os.path.join(out_dir, f"{base_name}.part{part_idx}.{out_ext}")
+        compress_part(view, part_out, out_ext, level, base_name, use_ai, ai_ratio, progress_check(progress))
+        parts.append(part_out)
+        if progress:
+            progress(len(view))
+    return parts
+
+
+def compress_targets(paths, output, out_ext, split_mb=0, volumes=False):
+    """Every file a compress() run with these settings writes, however far it got."""
+    part_size = split_mb * 1024 * 1024
+    if volumes:
+        stem = output[:-len(".uscv")]
+        count = len(plan_volumes(paths, part_size))
+        return [f"{stem}.vol{i}.usc" for i in range(count)] + [output + ".tmp", output]
+    if split_mb > 0:
+        out_dir = os.path.dirname(os.path.abspath(output))
+        return [os.path.join(out_dir, f"{os.path.basename(p)}.part{i}.{out_ext}")
+                for p in paths for i in range(max(1, -(-os.path.getsize(p) // part_size)))]
+    return [output]
+
+
+def remove_outputs(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def compress(paths, output, algorithm="zip", level=5, split_mb=0, workers=1, adaptive=False, ai_ratio=5,
+             long_distance=False, zstd_dictionary=False, dedup_store=None, incremental=False, solid_block_mb=0,
+             auto_target="speed", volumes=False, progress=None, on_status=None,
+             status_interval=PROGRESS_INTERVAL):
+    """
+    Compress files without any GUI. 'adaptive' selects the per-chunk .usc engine
+    (ratio 1..10); split_mb > 0 writes '<name>.partN.<ext>' files next to output,
+    or with volumes a set of independently decodable .usc volumes of split_mb
+    input each plus a .uscv index (output gets that extension).
+    With dedup_store, output is a .uscm manifest and only chunks new to that
+    store are compressed (with the adaptive engine at ai_ratio) and written.
+    incremental updates an existing ZIP, re-encoding only changed files.
+    solid_block_mb sets the .7z solid block size (0 = one block, -1 = per file).
+    algorithm "auto" lets auto_tune() pick algorithm, level and workers for
+    auto_target; output then gets the picked format's extension.
+    on_status(snapshot) gets ProgressTracker snapshots (MB/s, ratio, ETA) every
+    status_interval seconds from a background thread, plus a final one.
+    Returns a stats dict; raises on failure.
+    """
+    paths = [os.fspath(p) for p in paths]
+    if algorithm not in ALGORITHMS and algorithm != "auto":
+        raise ValueError(f"Unknown algorithm '{algorithm}' (choose from {', '.join(ALGORITHMS)} or auto)")
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        raise FileNotFoundError(f"Not a file: {', '.join(missing)}")
+    output = os.fspath(output)
+    plan = None
+    if algorithm == "auto" and not adaptive:
+        plan = auto_tune(paths, auto_target)
+        algorithm, level, workers = plan["algorithm"], plan["level"], plan["workers"]
+        extension = "." + ALGO_EXTENSIONS.get(algorithm, algorithm)
+        if not output.endswith(extension):
+            output = os.path.splitext(output)[0] + extension
+    out_ext = "usc" if adaptive else ALGO_EXTENSIONS.get(algorithm, algorithm)
+    input_bytes = sum(os.path.getsize(p) for p in paths)
+    if dedup_store and split_mb > 0:
+        raise ValueError("Dedup archives can't be split; the chunk store already holds the data in pieces.")
+    if volumes and (split_mb <= 0 or dedup_store or incremental):
+        raise ValueError("Volume sets need a split size and can't be combined with dedup or incremental updates.")
+    if split_mb > 0 and not volumes and out_ext not in SPLIT_EXTENSIONS:
+        raise ValueError(f"{algorithm} archives can't be split; use zip, zstd, brotli, xz, the adaptive engine "
+                         "or a volume set.")
+    if volumes and not output.endswith(".uscv"):
+        output = os.path.splitext(output)[0] + ".uscv"
+    if incremental and (algorithm != "zip" or adaptive or split_mb > 0 or dedup_store or zstd_dictionary):
+        raise ValueError("Incremental updates work on plain (unsplit) ZIP archives only.")
+
+    tracker = None
+    if on_status:
+        # Only a single archive that grows as it is written gives a live ratio.
+        plain = not (dedup_store or incremental or split_mb > 0)
+        tracker = ProgressTracker(input_bytes, output_size_probe(output) if plain else None,
+                                  "Compressing", progress)
+        tracker.report_every(on_status, status_interval)
+        progress = tracker
+    start = time.perf_counter()
+    try:
+        dedup_stats = None
+        if dedup_store:
+            dedup_stats = dedup_archive(paths, output, dedup_store, ai_ratio, workers, progress)
+            outputs = [output]
+        elif incremental:
+            update_stats = incremental_zip(paths, output, level, workers, progress)
+            outputs = [output]
+        elif volumes:
+            outputs = volume_compress(paths, output, split_mb * 1024 * 1024, algorithm, level, adaptive, ai_ratio,
+                                      workers, progress)
+        elif split_mb > 0:
+            out_dir = os.path.dirname(os.path.abspath(output))
+            outputs = []
+            for file_path in paths:
+                outputs += split_and_compress(file_path, split_mb * 1024 * 1024, out_dir, out_ext, level,
+                                              adaptive, ai_ratio, progress)
+        elif adaptive:
+            adaptive_compress_files(paths, output, ai_ratio, workers, progress)
+            outputs = [output]
+        else:
+            compress_format(paths, output, out_ext, level, workers, long_distance, zstd_dictionary, solid_block_mb,
+                            progress)
+            outputs = [output]
+    except BaseException:
+        # A cancelled job leaves nothing half-written behind (an incremental update keeps its archive).
+        if job_cancelled(progress) and not incremental:
+            remove_outputs(compress_targets(paths, output, out_ext, split_mb, volumes))
+        raise
+    finally:
+        if tracker:
+            tracker.stop()
+    elapsed = time.perf_counter() - start
+
+    if dedup_stats:
+        label = f"dedup ratio {ai_ratio}"
+    else:
+        label = f"adaptive ratio {ai_ratio}" if adaptive else f"{algorithm} level {level}"
+    log_throughput(f"Compress ({label}, {workers} workers)", input_bytes, elapsed)
+    output_bytes = sum(os.path.getsize(o) for o in outputs)
+    if dedup_stats:
+        # What this run added to disk: the manifest plus the new chunks.
+        output_bytes += dedup_stats["stored_bytes"]
+    stats = {
+        "operation": "compress",
+        "algorithm": "dedup" if dedup_stats else "adaptive" if adaptive else algorithm,
+        "level": ai_ratio if adaptive or dedup_stats else level,
+        "workers": workers,
+        "files": len(paths),
+        "outputs": outputs,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "ratio": output_bytes / input_bytes if input_bytes else 0.0,
+        "seconds": elapsed,
+        "mb_per_s": input_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+    if dedup_stats:
+        stats.update(dedup_stats)
+    if incremental:
+        stats.update(update_stats)
+    if plan:
+        stats["auto"] = plan
+    return stats
+
+
+# A parallel unzip job covers members worth about this many compressed bytes.
+UNZIP_BATCH_BYTES = 64 * 1024 * 1024
+UNZIP_BATCH_MEMBERS = 256
+
+
+def zip_member_target(out_dir, name):
+    """Where ZipFile.extract writes a member: drive, '', '.' and '..' components are dropped."""
+    arcname = name.replace("/", os.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [p for p in arcname.split(os.sep) if p not in ("", os.curdir, os.pardir)]
+    return os.path.normpath(os.path.join(out_dir, *parts))
+
+
+def _unzip_batch(job):
+    """Worker: extract a batch of members through this process's own archive handle."""
+    source, names, out_dir = job
+    f = ConcatenatedFile(source) if isinstance(source, list) else open(source, 'rb')
+    total = 0
+    with f, zipfile.ZipFile(f) as zf:
+        for name in names:
+            info = zf.getinfo(name)
+            zf.extract(info, out_dir)
+            total += info.file_size
+    return total
+
+
+def unzip_archive(src, out_dir, workers=1, progress=None, members=None):
+    """
+    Extract a ZIP, or only the members matching the glob patterns in members; those
+    are found in the central directory and read straight from their offsets. With
+    workers > 1 the members are split into batches of similar compressed size and
+    extracted by a process pool, each worker opening its own handle on the archive
+    (or on its split parts), so many-member archives scale with cores.
+    """
+    with open_source(src) as f, zipfile.ZipFile(f, 'r') as zf:
+        if is_zstd_dictionary_zip(zf):
+            return unzip_with_zstd_dictionary(zf, out_dir, progress, members)
+        infos = zf.infolist()
+        if members is not None:
+            infos = [info for info in infos if member_matches(info.filename, members)]
+        workers = min(workers, os.cpu_count() or 1)
+        if workers <= 1 or len(infos) < 2:
+            zf.extractall(out_dir, infos)
+            if progress:
+                progress(sum(info.file_size for info in infos))
+            return [os.path.join(out_dir, info.filename) for info in infos]
+
+    # Create every folder up front so workers never race on makedirs.
+    for info in infos:
+        target = zip_member_target(out_dir, info.filename)
+        os.makedirs(target if info.is_dir() else os.path.dirname(target), exist_ok=True)
+    source = src.paths if isinstance(src, ConcatenatedFile) else os.fspath(src)
+    batch_bytes = min(UNZIP_BATCH_BYTES, max(1, sum(i.compress_size for i in infos) // (workers * 4)))
+    jobs, names, size = [], [], 0
+    for info in infos:
+        if info.is_dir():
+            continue
+        names.append(info.filename)
+        size += info.compress_size
+        if size >= batch_bytes or len(names) >= UNZIP_BATCH_MEMBERS:
+            jobs.append((source, names, out_dir))
+            names, size = [], 0
+    if names:
+        jobs.append((source, names, out_dir))
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with worker_pool(ProcessPoolExecutor(max_workers=min(workers, len(jobs)) or 1)) as pool:
+        for fut in as_completed([pool.submit(_unzip_batch, job) for job in jobs]):
+            extracted = fut.result()
+            if progress:
+                progress(extracted)
+    return [os.path.join(out_dir, info.filename) for info in infos]
+
+
+def untar_archive(src, out_dir, members=None):
+    """
+    Extract a .tar. With members (glob patterns), only the matching members are
+    extracted, seeking to each header found through the cached tar_index.
+    """
+    if not TAR_AVAILABLE:
+        raise RuntimeError("Python's tarfile not available or error importing.")
+    if members is not None:
+        with open_source(src) as f:
+            return tar_extract_members(f, src, out_dir, members)
+    with open_source(src) as f, tarfile.open(fileobj=f, mode='r') as tf:
+        tf.extractall(path=out_dir)
+        return [os.path.join(out_dir, n) for n in tf.getnames()]
+
+
+def un7z_archive(src, out_dir, members=None):
+    """
+    Extract a .7z. Given a path, py7zr decodes independent solid blocks on
+    separate threads; split parts arrive as one stream and decode in order.
+    With members (glob patterns) only the folders holding matching members are
+    decoded.
+    """
+    if not SEVENZ_AVAILABLE:
+        raise RuntimeError("Install py7zr to handle .7z.")
+    if not isinstance(src, (str, os.PathLike)):
+        src.seek(0)
+    with py7zr.SevenZipFile(src, 'r') as archive:
+        names = archive.getnames()
+        if members is None:
+            archive.extractall(path=out_dir)
+        else:
+            names = [n for n in names if member_matches(n, members)]
+            if names:
+                archive.extract(path=out_dir, targets=names)
+    return [os.path.join(out_dir, n) for n in names]
+
+
+def unxz_file(src, out_dir, workers=1, progress=None, members=None):
+    """
+    Stream-decompress a .xz through a fixed buffer, so memory stays constant.
+    A tar payload (.tar.xz) is unpacked on the fly; anything else is written
+    next to the archive name without its extension, decoding the blocks of a
+    multi-block file on `workers` threads when its index allows it. With members
+    (glob patterns) a multi-block .tar.xz decodes only the blocks holding the
+    matching members, found through the cached tar_index.
+    """
+    if not LZMA_AVAILABLE:
+        raise RuntimeError("Install python-lzma or ensure it's available to handle .xz.")
+    if members is not None:
+        reader = open_xz_reader(src)
+        if reader:
+            with reader, XzFile(reader) as f:
+                if looks_like_tar(f.read(512)):
+                    return tar_extract_members(f, src, out_dir, members)
+    with open_source(src) as f, lzma.open(f, 'rb') as f_in:
+        head = f_in.read(512)
+        stream = PrefixedReader(head, f_in)
+        if looks_like_tar(head):
+            return untar_stream(stream, out_dir, members)
+        base = os.path.basename(source_name(src))
+        base = base[:-len('.xz')] if base.endswith('.xz') else base
+        if members is not None and not member_matches(base, members):
+            return []
+        out_name = os.path.join(out_dir, base)
+        reader = open_xz_reader(src) if workers > 1 else None
+        if reader:
+            with reader:
+                xz_decompress_parallel(reader, out_name, workers, progress)
+                return [out_name]
+        with open(out_name, 'wb') as f_out:
+            stream_copy(stream, f_out, bytearray(STREAM_BUFFER_SIZE), progress)
+    return [out_name]
+
+
+def decompress_source(src, extension, out_dir, workers=1, progress=None, members=None):
+    """
+    Decompress one archive (a path, or a ConcatenatedFile over split parts) into
+    out_dir; with members (glob patterns), only the matching members. Native .usc
+    archives are recognised by their header, whatever their name. Returns the paths written.
+    """
+    if isinstance(src, ConcatenatedFile) and extension == "":
+        # Raw byte-slice parts (cloud split) are the original file.
+        name = os.path.basename(src.name)
+        if members is not None and not member_matches(name, members):
+            return []
+        return [join_parts(src.paths, safe_extract_path(out_dir, name), progress)]
+    if isinstance(src, ConcatenatedFile) and is_zip_per_part(src.paths):
+        if members is not None and not member_matches(zip_part_member(src.paths[0]), members):
+            return []
+        return [join_zip_parts(src.paths, out_dir, progress)]
+    if extension == ".uscm" or is_dedup_manifest(src):
+        return dedup_restore(src, out_dir, workers, progress, members)
+    if extension == ".uscv" or is_volume_index(src):
+        return volume_restore(src, out_dir, workers, members, progress)
+    if extension == ".usc" or is_usc_file(src):
+        return adaptive_decompress_file(src, out_dir, workers, progress, members)
+    if extension == ".zip":
+        return unzip_archive(src, out_dir, workers, progress, members)
+    if extension == ".tar":
+        return untar_archive(src, out_dir, members)
+    if extension == ".7z":
+        return un7z_archive(src, out_dir, members)
+    if extension == ".xz":
+        return unxz_file(src, out_dir, workers, progress, members)
+    if extension in (".zst", ".br"):
+        return stream_decompress_file("zstd" if extension == ".zst" else "brotli", src, out_dir, progress, members)
+    raise ValueError(f"Unrecognised archive format: {os.path.basename(source_name(src))}")
+
+
+def extract(paths, out_dir, workers=1, progress=None, on_status=None, status_interval=PROGRESS_INTERVAL,
+            members=None):
+    """
+    Extract archives (split part sets included) without any GUI. With members (glob
+    patterns, e.g. ["etc/app.conf", "logs/*.log"]) only the matching members are
+    written, seeking straight to them where the format allows; a folder name matches
+    everything under it. progress(nbytes) is called with each archive's on-disk
+    size as it completes; on_status(snapshot) works as in compress(). Returns a stats dict.
+    """
+    jobs, problems = plan_extraction([os.fspath(p) for p in paths])
+    if problems:
+        for source, _, _ in jobs:
+            if isinstance(source, ConcatenatedFile):
+                source.close()
+        raise ValueError("\n".join(problems))
+    os.makedirs(out_dir, exist_ok=True)
+    input_bytes = sum(size for _, _, size in jobs)
+    tracker = None
+    if on_status:
+        tracker = ProgressTracker(input_bytes, label="Extracting", forward=progress)
+        tracker.report_every(on_status, status_interval)
+        progress = tracker
+    outputs = []
+    start = time.perf_counter()
+    try:
+        for source, ext, size in jobs:
+            try:
+                outputs += decompress_source(source, ext, out_dir, workers, members=members)
+            finally:
+                if isinstance(source, ConcatenatedFile):
+                    source.close()
+            if progress:
+                progress(size)
+    finally:
+        if tracker:
+            tracker.stop()
+    if members is not None and not outputs:
+        raise ValueError(f"No members match {', '.join(members)}")
+    elapsed = time.perf_counter() - start
+    log_throughput(f"Extract ({len(jobs)} archives)", input_bytes, elapsed)
+    return {
+        "operation": "extract",
+        "archives": len(jobs),
+        "outputs": outputs,
+        "input_bytes": input_bytes,
+        "seconds": elapsed,
+        "mb_per_s": input_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+#########################
+#   Listing and Member Extraction
+#########################
+# Plain tar has no central directory. The header offsets found by one scan are
+# kept here, one JSON file per archive, and reused while the archive is unchanged.
+TAR_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".usc-tar-index")
+
+
+def member_matches(name, patterns):
+    """True if a member name matches one of the glob patterns, or lies in a folder one names."""
+    name = name.rstrip("/")
+    for pattern in patterns:
+        pattern = pattern.rstrip("/")
+        if fnmatch.fnmatchcase(name, pattern) or name.startswith(pattern + "/"):
+            return True
+    return False
+
+
+def source_stamp(src):
+    """[path, size, mtime] of every file behind a source; a cached index is valid while it's unchanged."""
+    paths = src.paths if isinstance(src, ConcatenatedFile) else [os.fspath(src)]
+    return [[os.path.abspath(p), os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths]
+
+
+def tar_index(f, src, index_dir=TAR_INDEX_DIR):
+    """
+    [(name, header offset, size, is_dir), ...] for the tar in the seekable file f.
+    The scan reads only the headers, seeking over member data, and is cached in
+    index_dir under src's path, size and mtime.
+    """
+    stamp = source_stamp(src)
+    cache_path = os.path.join(index_dir, hashlib.sha1(json.dumps(stamp[0][0]).encode()).hexdigest() + ".json")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f_cache:
+                cached = json.load(f_cache)
+            if cached["stamp"] == stamp:
+                return [tuple(entry) for entry in cached["members"]]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable tar index {cache_path}: {e}")
+    f.seek(0)
+    with tarfile.open(fileobj=f, mode='r:') as tf:
+        entries = [(info.name, info.offset, info.size, info.isdir()) for info in tf]
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        tmp = f"{cache_path}.tmp"
+        with open(tmp, 'w') as f_cache:
+            json.dump({"stamp": stamp, "members": entries}, f_cache)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        logging.warning(f"Could not save tar index {cache_path}: {e}")
+    return entries
+
+
+def tar_extract_members(f, src, out_dir, members, index_dir=TAR_INDEX_DIR):
+    """
+    Extract the members of the tar in the seekable file f that match the glob
+    patterns, reading each one's header and data straight from its offset in
+    tar_index. Returns the paths written.
+    """
+    wanted = [(name, offset) for name, offset, _, _ in tar_index(f, src, index_dir) if member_matches(name, members)]
+    f.seek(0)
+    with tarfile.open(fileobj=f, mode='r:') as tf:
+        for name, offset in wanted:
+            f.seek(offset)
+            tf.extract(tarfile.TarInfo.fromtarfile(tf), out_dir)
+    return [os.path.join(out_dir, name) for name, _ in wanted]
+
+
+def member_entry(name, size, packed=None, is_dir=False):
+    return {"name": name, "size": size, "packed": packed, "dir": is_dir}
+
+
+def tar_stream_entries(stream):
+    """Entries of a forward-only tar stream; only its headers are parsed, but all of it is read."""
+    with tarfile.open(fileobj=stream, mode='r|', bufsize=STREAM_BUFFER_SIZE) as tf:
+        return [member_entry(info.name, info.size, None, info.isdir()) for info in tf]
+
+
+def usc_entries(f):
+    """Entries of a .usc file from its container indexes; a member split across containers is summed."""
+    entries = {}
+    for _, flags, index in reversed(list(usc_indexes(f))):
+        for member in usc_index_members(index, flags):
+            entry = entries.setdefault(member.name, member_entry(member.name, 0, 0))
+            entry["size"] += member.size
+            entry["packed"] += sum(c.csize for c in member.chunks)
+    return list(entries.values())
+
+
+def archive_entries(src, extension):
+    """
+    The members of one archive (a path or a ConcatenatedFile) as dicts with name,
+    size, packed (compressed size, None when the format doesn't say) and dir. Only
+    directories and headers are read: the zip central directory, 7z headers, the
+    .usc, .uscv and .uscm indexes, and tar headers through tar_index (a multi-block
+    .tar.xz included). A tar inside .zst, .br or a one-block .xz has no index, so
+    its headers are found by reading the stream through.
+    """
+    if isinstance(src, ConcatenatedFile) and extension == "":
+        return [member_entry(os.path.basename(src.name), src.size)]
+    if isinstance(src, ConcatenatedFile) and is_zip_per_part(src.paths):
+        size = packed = 0
+        for path in src.paths:
+            with zipfile.ZipFile(path) as zf:
+                info = zf.infolist()[0]
+                size, packed = size + info.file_size, packed + info.compress_size
+        return [member_entry(zip_part_member(src.paths[0]), size, packed)]
+    if extension == ".uscm" or is_dedup_manifest(src):
+        with open(src) as f:
+            return [member_entry(e["name"], e["size"]) for e in json.load(f)["files"]]
+    if extension == ".uscv" or is_volume_index(src):
+        with open(src) as f:
+            return [member_entry(m["name"], m["size"]) for m in json.load(f)["members"]]
+    if extension == ".usc" or is_usc_file(src):
+        with open_source(src) as f:
+            return usc_entries(f)
+    if extension == ".zip":
+        with open_source(src) as f, zipfile.ZipFile(f) as zf:
+            if not is_zstd_dictionary_zip(zf):
+                return [member_entry(i.filename, i.file_size, i.compress_size, i.is_dir()) for i in zf.infolist()]
+            entries = []
+            for info in zf.infolist():
+                if info.filename == ZSTD_DICT_MEMBER:
+                    continue
+                if info.is_dir() or not info.filename.endswith(".zst"):
+                    entries.append(member_entry(info.filename, info.file_size, info.compress_size, info.is_dir()))
+                    continue
+                with zf.open(info) as f_in:
+                    size = zstd.frame_content_size(f_in.read(18)) if ZSTD_AVAILABLE else -1
+                entries.append(member_entry(info.filename[:-len(".zst")], size if size >= 0 else None,
+                                            info.compress_size))
+            return entries
+    if extension == ".tar":
+        with open_source(src) as f:
+            return [member_entry(name, size, None, is_dir) for name, _, size, is_dir in tar_index(f, src)]
+    if extension == ".7z":
+        if not SEVENZ_AVAILABLE:
+            raise RuntimeError("Install py7zr to handle .7z.")
+        if not isinstance(src, (str, os.PathLike)):
+            src.seek(0)
+        with py7zr.SevenZipFile(src, 'r') as archive:
+            return [member_entry(i.filename, i.uncompressed, i.compressed, i.is_directory) for i in archive.list()]
+    if extension == ".xz":
+        reader = open_xz_reader(src)
+        if reader:
+            with reader, XzFile(reader) as f:
+                if looks_like_tar(f.read(512)):
+                    return [member_entry(name, size, None, is_dir) for name, _, size, is_dir in tar_index(f, src)]
+                size = reader.size
+        else:
+            size = None
+        with open_source(src) as f, lzma.open(f, 'rb') as f_in:
+            head = f_in.read(512)
+            if looks_like_tar(head):
+                return tar_stream_entries(PrefixedReader(head, f_in))
+        base = os.path.basename(source_name(src))
+        packed = os.path.getsize(src) if isinstance(src, (str, os.PathLike)) else src.size
+        return [member_entry(base[:-len(".xz")] if base.endswith(".xz") else base, size, packed)]
+    if extension in (".zst", ".br"):
+        with open_source(src) as f:
+            reader = open_stream_reader("zstd" if extension == ".zst" else "brotli", f)
+            head = reader.read(512)
+            if looks_like_tar(head):
+                return tar_stream_entries(PrefixedReader(head, reader))
+            f.seek(0)
+            size = zstd.frame_content_size(f.read(18)) if extension == ".zst" else -1
+        packed = os.path.getsize(src) if isinstance(src, (str, os.PathLike)) else src.size
+        return [member_entry(os.path.splitext(os.path.basename(source_name(src)))[0],
+                             size if size >= 0 else None, packed)]
+    raise ValueError(f"Unrecognised archive format: {os.path.basename(source_name(src))}")
+
+
+def list_archives(paths):
+    """
+    List the members of archives (split part sets included) from their directories
+    and headers, without extracting anything. Returns a stats dict.
+    """
+    jobs, problems = plan_extraction([os.fspath(p) for p in paths])
+    if problems:
+        for source, _, _ in jobs:
+            if isinstance(source, ConcatenatedFile):
+                source.close()
+        raise ValueError("\n".join(problems))
+    archives = []
+    start = time.perf_counter()
+    for source, ext, size in jobs:
+        try:
+            archives.append({"archive": source_name(source), "size": size, "members": archive_entries(source, ext)})
+        finally:
+            if isinstance(source, ConcatenatedFile):
+                source.close()
+    return {"operation": "list", "archives": archives, "seconds": time.perf_counter() - start}
+
+
+def listing_table(stats):
+    """The members of each listed archive as fixed-width text: size, compressed size, name."""
+    lines = []
+    for archive in stats["archives"]:
+        lines.append(f"{archive['archive']}:")
+        for entry in archive["members"]:
+            size = "-" if entry["size"] is None else entry["size"]
+            packed = "-" if entry["packed"] is None else entry["packed"]
+            lines.append(f"{size:>14} {packed:>14}  {entry['name']}{'/' if entry['dir'] else ''}")
+    return "\n".join(lines)
+
+
+#########################
+#   Verification
+#########################
+# A verification task covers chunks or members worth about this many compressed bytes.
+VERIFY_BATCH_BYTES = 64 * 1024 * 1024
+
+
+def _drain(f):
+    """Read a decoder to the end; decoders check their own checksums on the way."""
+    total = 0
+    while True:
+        data = f.read(STREAM_BUFFER_SIZE)
+        if not data:
+            return total
+        total += len(data)
+
+
+def _open_checked(source):
+    """A path, or the part paths of a split set, opened for reading."""
+    return ConcatenatedFile(source) if isinstance(source, list) else open(source, 'rb')
+
+
+def _verify_task(task):
+    """Worker: run one verification task. Returns the problems found (empty when intact)."""
+    kind, source, detail = task
+    try:
+        if kind == "usc-chunks":
+            path, base = source
+            problems = []
+            with open(path, 'rb') as f:
+                for name, fields in detail:
+                    c = UscChunk(*fields)
+                    f.seek(base + c.payload_offset)
+                    try:
+                        _decode_usc_chunk(c.codec, _read_exact(f, c.csize), c.usize, c.crc)
+                    except Exception as e:
+                        problems.append(f"{name}: chunk at offset {c.member_offset}: {str(e) or type(e).__name__}")
+            return problems
+        elif kind == "usc-stream":
+            with _open_checked(source) as f:
+                for _ in read_usc_stream(f, detail):
+                    pass
+        elif kind == "zip-members":
+            with _open_checked(source) as f, zipfile.ZipFile(f) as zf:
+                for name in detail:
+                    with zf.open(name) as member:
+                        _drain(member)
+        elif kind == "tar":
+            with _open_checked(source) as f, tarfile.open(fileobj=f, mode='r|', bufsize=STREAM_BUFFER_SIZE) as tf:
+                for member in tf:
+                    if member.isfile():
+                        _drain(tf.extractfile(member))
+        elif kind == "7z":
+            with _open_checked(source) as f, py7zr.SevenZipFile(f, 'r') as archive:
+                bad = archive.testzip()
+            if bad:
+                return [f"{bad}: CRC mismatch"]
+        elif kind == "xz":
+            with _open_checked(source) as f, lzma.open(f, 'rb') as f_in:
+                _drain(f_in)
+        elif kind == "stream":
+            with _open_checked(source) as f:
+                _drain(open_stream_reader(detail, f))
+        elif kind == "digest":
+            if not file_matches_digest(source, detail):
+                return [f"{os.path.basename(source)} doesn't match its recorded digest"]
+        elif kind == "dedup-chunks":
+            store = DedupStore(source)
+            for digest in detail:
+                store.get(digest)
+        else:
+            raise ValueError(f"Unknown verification task '{kind}'")
+    except Exception as e:
+        return [str(e) or type(e).__name__]
+    return []
+
+
+def _batches(items, weight, limit=VERIFY_BATCH_BYTES):
+    """Split items into runs whose weight(item) adds up to about limit; yields (run, run weight)."""
+    run, total = [], 0
+    for item in items:
+        run.append(item)
+        total += weight(item)
+        if total >= limit:
+            yield run, total
+            run, total = [], 0
+    if run:
+        yield run, total
+
+
+def verify_plan(source, extension):
+    """
+    What protects one archive and how to check it: (checks, problems found
+    while planning, tasks). Each task is (weight in archive bytes, task for
+    _verify_task); large archives are cut into many tasks. checks starts with
+    "none" when the file data carries no checksum (see unchecked()).
+    """
+    ref = source.paths if isinstance(source, ConcatenatedFile) else source
+    name = os.path.basename(source_name(source))
+    if isinstance(source, ConcatenatedFile) and extension == "":
+        return "none (raw byte-slice parts)", [], []
+    if isinstance(source, ConcatenatedFile) and is_zip_per_part(source.paths):
+        tasks = []
+        for path in source.paths:
+            with zipfile.ZipFile(path) as zf:
+                tasks.append((os.path.getsize(path), ("zip-members", path, zf.namelist())))
+        return "crc32 per member", [], tasks
+    if extension == ".uscm" or is_dedup_manifest(source):
+        with open(source) as f:
+            manifest = json.load(f)
+        store_dir = os.path.join(os.path.dirname(os.path.abspath(source)), manifest["store"])
+        if not os.path.isdir(os.path.join(store_dir, "chunks")):
+            return "blake2b per chunk", [f"Chunk store not found: {store_dir}"], []
+        chunks = {digest: size for entry in manifest["files"] for digest, size in entry["chunks"]}
+        tasks = [(total, ("dedup-chunks", store_dir, run))
+                 for run, total in _batches(sorted(chunks), chunks.get)]
+        return "blake2b per chunk", [], tasks
+    if extension == ".uscv" or is_volume_index(source):
+        with open(source) as f:
+            index = json.load(f)
+        folder = os.path.dirname(source)
+        problems, tasks = [], []
+        for volume in index["volumes"]:
+            path = os.path.join(folder, volume["name"])
+            if not os.path.isfile(path):
+                problems.append(f"missing volume {volume['name']}")
+                continue
+            if os.path.getsize(path) != volume["size"]:
+                problems.append(f"volume {volume['name']} changed size")
+                continue
+            if "digest" in volume:
+                tasks.append((0, ("digest", path, volume["digest"])))
+            _, volume_problems, volume_tasks = verify_plan(path, ".usc")
+            problems += volume_problems
+            tasks += volume_tasks
+        return "volume digests, crc32 per chunk and member", problems, tasks
+    if extension == ".usc" or is_usc_file(source):
+        checks = "crc32 per chunk and member"
+        if isinstance(source, str):
+            try:
+                reader = UscReader(source)
+            except ValueError:
+                reader = None
+            if reader and reader.base == 0:
+                with reader:
+                    problems = [p for p in map(usc_member_problem, reader.members) if p]
+                    chunks = [(m.name, (c.payload_offset, c.member_offset, c.usize, c.csize, c.codec, c.level, c.crc))
+                              for m in reader.members for c in m.chunks]
+                    tasks = [(total, ("usc-chunks", (source, reader.base), run))
+                             for run, total in _batches(chunks, lambda chunk: chunk[1][3])]
+                return checks, problems, tasks
+            if reader:
+                reader.close()
+        # Merged parts and split sets are checked front to back, index by index.
+        return checks, [], [(0, ("usc-stream", ref, name))]
+    if extension == ".zip":
+        with open_source(source) as f, zipfile.ZipFile(f) as zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+        tasks = [(total, ("zip-members", ref, [i.filename for i in run]))
+                 for run, total in _batches(infos, lambda i: i.compress_size)]
+        return "crc32 per member", [], tasks
+    single = {
+        ".tar": ("none (tar header checksums only)", "tar", None),
+        ".7z": ("crc32 per file", "7z", None),
+        ".xz": ("xz block checks", "xz", None),
+        ".zst": ("xxh64 per zstd frame", "stream", "zstd"),
+        ".br": ("none (brotli decode only)", "stream", "brotli"),
+    }
+    if extension in single:
+        checks, kind, detail = single[extension]
+        return checks, [], [(0, (kind, ref, detail))]
+    return "unknown", [f"Unrecognised archive format: {name}"], []
+
+
+def unchecked(checks):
+    """True when verify_plan() found no checksum over the file data, so decoding proves nothing."""
+    return checks is not None and checks.startswith("none")
+
+
+def verify(paths, workers=1, progress=None, on_status=None, status_interval=PROGRESS_INTERVAL):
+    """
+    Check archives (split sets, volume sets and dedup manifests included) against
+    the checksums stored in them, decoding in memory and writing nothing to disk.
+    The chunks and members of all archives are checked on a pool of `workers`
+    processes. progress(nbytes) counts archive bytes; on_status works as in
+    compress(). Returns a stats dict; an archive's "ok" is False if it has a
+    problem and None if it decoded but holds no checksum to check (brotli,
+    plain tar, raw parts). The overall "ok" is the worst of those.
+    """
+    jobs, problems = plan_extraction([os.fspath(p) for p in paths])
+    archives = [{"archive": problem.split(":", 1)[0], "checks": None, "ok": False, "problems": [problem]}
+                for problem in problems]
+    tasks = []
+    input_bytes = 0
+    for source, ext, size in jobs:
+        entry = {"archive": source_name(source), "checks": None, "ok": True, "problems": []}
+        archives.append(entry)
+        input_bytes += size
+        try:
+            entry["checks"], entry["problems"], planned = verify_plan(source, ext)
+        except Exception as e:
+            entry["problems"], planned = [str(e)], []
+        finally:
+            if isinstance(source, ConcatenatedFile):
+                source.close()
+        if not planned:
+            planned = [(0, None)]
+        # Whatever the tasks don't cover (headers, indexes) is counted with the first one.
+        planned[0] = (planned[0][0] + size - sum(weight for weight, _ in planned), planned[0][1])
+        tasks += [(entry, weight, task) for weight, task in planned]
+
+    tracker = None
+    if on_status:
+        tracker = ProgressTracker(input_bytes, label="Verifying", forward=progress)
+        tracker.report_every(on_status, status_interval)
+        progress = tracker
+
+    def record(entry, weight, found):
+        entry["problems"] += found
+        if progress:
+            progress(weight)
+
+    start = time.perf_counter()
+    try:
+        runnable = [(entry, weight, task) for entry, weight, task in tasks if task is not None]
+        for entry, weight, task in tasks:
+            if task is None:
+                record(entry, weight, [])
+        if workers <= 1:
+            for entry, weight, task in runnable:
+                record(entry, weight, _verify_task(task))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with worker_pool(ProcessPoolExecutor(max_workers=workers)) as pool:
+                futures = {pool.submit(_verify_task, task): (entry, weight) for entry, weight, task in runnable}
+                for fut in as_completed(futures):
+                    record(*futures[fut], fut.result())
+    finally:
+        if tracker:
+            tracker.stop()
+    elapsed = time.perf_counter() - start
+    for entry in archives:
+        entry["ok"] = False if entry["problems"] else None if unchecked(entry["checks"]) else True
+        if entry["ok"] is None:
+            logging.warning(f"Verify {os.path.basename(entry['archive'])}: no checksum stored, only decoded")
+        for problem in entry["problems"]:
+            logging.error(f"Verify {os.path.basename(entry['archive'])}: {problem}")
+    log_throughput(f"Verify ({len(archives)} archives, {workers} workers)", input_bytes, elapsed)
+    return {
+        "operation": "verify",
+        "ok": False if any(e["ok"] is False for e in archives) else all(e["ok"] for e in archives) or None,
+        "archives": archives,
+        "input_bytes": input_bytes,
+        "seconds": elapsed,
+        "mb_per_s": input_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+#########################
+#   Cloud Uploads
+#########################
+UPLOAD_RETRIES = 5
+UPLOAD_RETRY_DELAY = 1.0      # first backoff, doubled per attempt
+UPLOAD_RETRY_MAX_DELAY = 60.0
+UPLOAD_WORKERS = 4
+
+
+class FileRange(io.RawIOBase):
+    """
+    Seekable read-only window [start, start + size) of a file, so one part of a
+    big file can be streamed to an uploader without reading it into memory.
+    progress(nbytes) only sees bytes past the furthest point read so far, so
+    resumable re-reads and retries are not counted twice.
+    """
+
+    def __init__(self, path, start, size, progress=None):
+        super().__init__()
+        self.name = path
+        self.start = start
+        self.size = size
+        self.pos = 0
+        self.high = 0
+        self.progress = progress
+        self._fh = open(path, 'rb')
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.pos = offset
+        return self.pos
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        want = max(0, min(len(view), self.size - self.pos))
+        if not want:
+            return 0
+        self._fh.seek(self.start + self.pos)
+        n = self._fh.readinto(view[:want])
+        self.pos += n
+        if self.pos > self.high:
+            if self.progress:
+                self.progress(self.pos - self.high)
+            self.high = self.pos
+        return n
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        super().close()
+
+
+class DriveUploader:
+    """
+    Uploads streams to Google Drive through pydrive2. The stream is handed to
+    pydrive2 as the file content, so the Drive client sends it as a chunked
+    resumable upload straight from disk.
+    """
+
+    def __init__(self, gdrive, folder_id=None):
+        self.gdrive = gdrive
+        self.folder_id = folder_id
+
+    def upload(self, name, stream, size):
+        metadata = {'title': name}
+        if self.folder_id:
+            metadata['parents'] = [{'id': self.folder_id}]
+        drive_file = self.gdrive.CreateFile(metadata)
+        drive_file.content = stream
+        drive_file.dirty['content'] = True
+        drive_file.Upload(param={'supportsAllDrives': True})
+        return drive_file['id']
+
+
+class LocalDirUploader:
+    """
+    Stand-in for Drive that "uploads" into a local directory. Parts are written
+    to a temporary name and renamed once complete, like a committed upload.
+    """
+
+    def __init__(self, dest_dir):
+        self.dest_dir = dest_dir
+        os.makedirs(dest_dir, exist_ok=True)
+
+    def upload(self, name, stream, size):
+        target = safe_extract_path(self.dest_dir, name)
+        tmp = f"{target}.uploading-{threading.get_ident()}"
+        with open(tmp, 'wb') as f_out:
+            copied = stream_copy(stream, f_out, bytearray(STREAM_BUFFER_SIZE))
+        if copied != size:
+            os.remove(tmp)
+            raise IOError(f"short upload for {name}: {copied} of {size} bytes")
+        os.replace(tmp, target)
+        return target
+
+
+def connect_google_drive():
+    """
+    Authenticate with Google Drive (client_secrets.json, browser login) and
+    return a pydrive2 GoogleDrive client.
+    """
+    if not PYDRIVE_AVAILABLE:
+        raise RuntimeError("pydrive2 is not installed; Google Drive uploads are unavailable.")
     from pydrive2.auth import GoogleAuth
     from pydrive2.drive import GoogleDrive
-    PYDRIVE_AVAILABLE = True
-except ImportError:
-    PYDRIVE_AVAILABLE = False
+    gauth = GoogleAuth()
+    gauth.LocalWebserverAuth()
+    return GoogleDrive(gauth)
+
+
+def call_with_retries(fn, label, retries=None, delay=None):
+    """
+    Call fn() until it succeeds, sleeping with exponential backoff and jitter
+    between failed attempts. The last error is re-raised.
+    """
+    retries = UPLOAD_RETRIES if retries is None else retries
+    delay = UPLOAD_RETRY_DELAY if delay is None else delay
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = min(UPLOAD_RETRY_MAX_DELAY, delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            logging.warning(f"{label} failed ({e}); retry {attempt + 1}/{retries} in {wait:.1f}s")
+            time.sleep(wait)
+
+
+def load_upload_journal(journal_path, file_path, part_size, kind="raw"):
+    """
+    Confirmed parts from a previous run, as {index: remote_id}. A journal written
+    for a different file, size, mtime, part size or kind (raw or a codec) is ignored.
+    """
+    st = os.stat(file_path)
+    try:
+        with open(journal_path) as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (journal.get("source") != os.path.abspath(file_path) or journal.get("size") != st.st_size
+            or journal.get("mtime_ns") != st.st_mtime_ns or journal.get("part_size") != part_size
+            or journal.get("kind", "raw") != kind):
+        return {}
+    return {int(idx): remote_id for idx, remote_id in journal.get("parts", {}).items()}
+
+
+def save_upload_journal(journal_path, file_path, part_size, parts, kind="raw"):
+    st = os.stat(file_path)
+    journal = {
+        "source": os.path.abspath(file_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "part_size": part_size,
+        "kind": kind,
+        "parts": {str(idx): remote_id for idx, remote_id in sorted(parts.items())},
+    }
+    tmp = f"{journal_path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(journal, f, indent=1)
+    os.replace(tmp, journal_path)
+
+
+def upload_file(file_path, uploader, part_size=0, workers=UPLOAD_WORKERS, journal_path=None, progress=None):
+    """
+    Upload file_path through uploader, split into part_size byte slices named
+    <name>.partN (or as one object when part_size is 0). Up to `workers` parts
+    stream concurrently, each retried with backoff. Confirmed parts are recorded
+    in a JSON journal (default <file>.upload.json) so an interrupted upload
+    resumes where it stopped; the journal is removed once everything is sent.
+    Returns a stats dict.
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    file_size = os.path.getsize(file_path)
+    base_name = os.path.basename(file_path)
+    part_size = part_size if part_size > 0 else max(file_size, 1)
+    num_parts = max(1, math.ceil(file_size / part_size))
+    journal_path = journal_path or f"{file_path}.upload.json"
+    done = load_upload_journal(journal_path, file_path, part_size)
+    if done:
+        logging.info(f"Resuming upload of {base_name}: {len(done)}/{num_parts} parts already confirmed")
+
+    def part_name(idx):
+        return base_name if num_parts == 1 else f"{base_name}.part{idx}"
+
+    def part_range(idx):
+        start = idx * part_size
+        return start, min(part_size, file_size - start)
+
+    skipped_bytes = sum(part_range(idx)[1] for idx in done if idx < num_parts)
+    if progress and skipped_bytes:
+        progress(skipped_bytes)
+    # A progress callback may touch non-thread-safe state (the GUI), so workers
+    # report through a lock.
+    lock = threading.Lock()
+
+    def report(n):
+        if progress:
+            with lock:
+                progress(n)
+
+    def send(idx):
+        start, size = part_range(idx)
+        with FileRange(file_path, start, size, report) as stream:
+            def attempt():
+                stream.seek(0)
+                return uploader.upload(part_name(idx), stream, size)
+            return call_with_retries(attempt, f"Upload of {part_name(idx)}")
+
+    pending = [idx for idx in range(num_parts) if idx not in done]
+    start_time = time.perf_counter()
+    with worker_pool(ThreadPoolExecutor(max_workers=max(1, workers))) as pool:
+        in_flight = {pool.submit(send, idx): idx for idx in pending}
+        error = None
+        while in_flight and error is None:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            if any(fut.exception() for fut in finished):
+                # Stop queueing parts, but journal every part that still gets confirmed.
+                for fut in in_flight:
+                    fut.cancel()
+                finished = wait(in_flight)[0]
+            for fut in finished:
+                idx = in_flight.pop(fut)
+                if fut.cancelled():
+                    continue
+                if fut.exception():
+                    error = error or fut.exception()
+                else:
+                    done[idx] = fut.result()
+            save_upload_journal(journal_path, file_path, part_size, done)
+        if error is not None:
+            raise RuntimeError(f"Upload of {base_name} stopped after {len(done)}/{num_parts} parts: {error}") from error
+    elapsed = time.perf_counter() - start_time
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    sent_bytes = file_size - skipped_bytes
+    log_throughput(f"Upload ({len(pending)} parts, {workers} workers)", sent_bytes, elapsed)
+    return {
+        "operation": "upload",
+        "file": file_path,
+        "parts": num_parts,
+        "resumed_parts": num_parts - len(pending),
+        "remote_ids": [done[idx] for idx in range(num_parts)],
+        "uploaded_bytes": sent_bytes,
+        "seconds": elapsed,
+        "mb_per_s": sent_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+CLOUD_PART_SIZE = 32 * 1024 * 1024
+CLOUD_CODEC_EXTENSIONS = ("zst", "br", "zip", "usc")
+
+
+def _queue_put(q, item, stop):
+    """Blocking put that gives up once another stage has failed."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def upload_compressed(file_path, uploader, out_ext="zst", level=5, part_size=0, workers=DEFAULT_WORKERS,
+                      upload_workers=UPLOAD_WORKERS, ai_ratio=5, journal_path=None, progress=None):
+    """
+    Compress file_path while uploading it. A reader thread cuts the file into
+    part_size slices (CLOUD_PART_SIZE when 0), `workers` threads compress each
+    slice into a standalone <name>.partN.<out_ext> object and `upload_workers`
+    threads send them. The stages are joined by bounded queues, so part N+1 is
+    compressed while part N uploads and at most about
+    (workers + upload_workers + 3) parts are held in memory. Raw parts are
+    views of the mmap-ed file (pages are dropped once compressed), or a fixed
+    pool of reused buffers when the file can't be mapped.
+
+    The parts form an ordinary split set that extract() decodes. Confirmed parts
+    go to the same resumable journal as upload_file(). progress(nbytes) reports
+    source bytes as their part is confirmed. Returns a stats dict with the busy
+    time of each stage next to the wall time.
+    """
+    if out_ext not in CLOUD_CODEC_EXTENSIONS:
+        raise ValueError(f"Cloud compression supports {', '.join(CLOUD_CODEC_EXTENSIONS)}, not '{out_ext}'")
+    file_size = os.path.getsize(file_path)
+    base_name = os.path.basename(file_path)
+    part_size = part_size if part_size > 0 else CLOUD_PART_SIZE
+    num_parts = max(1, math.ceil(file_size / part_size))
+    kind = f"{out_ext}-{ai_ratio if out_ext == 'usc' else level}"
+    journal_path = journal_path or f"{file_path}.upload.json"
+    done = load_upload_journal(journal_path, file_path, part_size, kind)
+    if done:
+        logging.info(f"Resuming upload of {base_name}: {len(done)}/{num_parts} parts already confirmed")
+    pending = [idx for idx in range(num_parts) if idx not in done]
+    workers = max(1, workers)
+    upload_workers = max(1, upload_workers)
+
+    raw_q = queue.Queue(maxsize=workers)
+    packed_q = queue.Queue(maxsize=upload_workers)
+    stop = threading.Event()
+    lock = threading.Lock()
+    errors = []
+    busy = {"read": 0.0, "compress": 0.0, "upload": 0.0}
+    totals = {"uploaded_bytes": 0}
+    compressors_left = [workers]
+
+    def fail(e):
+        with lock:
+            errors.append(e)
+        stop.set()
+
+    def account(stage, seconds):
+        with lock:
+            busy[stage] += seconds
+
+    source = open(file_path, 'rb')
+    mm = map_file(source)
+    # Parts are views of the mapping; without one they are read into a fixed pool of buffers.
+    free_buffers = queue.Queue()
+    if mm is None:
+        for _ in range(workers + 2):
+            free_buffers.put(bytearray(min(part_size, max(file_size, 1))))
+
+    def reader():
+        try:
+            for idx in pending:
+                t0 = time.perf_counter()
+                offset = idx * part_size
+                length = min(part_size, file_size - offset)
+                buffer = None
+                if mm is not None:
+                    view = memoryview(mm)[offset:offset + length]
+                else:
+                    buffer = _queue_get(free_buffers, stop)
+                    if buffer is None:
+                        return
+                    source.seek(offset)
+                    view = memoryview(buffer)[:source.readinto(memoryview(buffer)[:length])]
+                if len(view) != length:
+                    raise ValueError(f"{base_name} shrank while it was being uploaded")
+                account("read", time.perf_counter() - t0)
+                if not _queue_put(raw_q, (idx, view, buffer), stop):
+                    return
+        except Exception as e:
+            fail(e)
+        finally:
+            for _ in range(workers):
+                _queue_put(raw_q, None, stop)
+
+    def compressor():
+        try:
+            while True:
+                item = _queue_get(raw_q, stop)
+                if item is None:
+                    return
+                idx, view, buffer = item
+                t0 = time.perf_counter()
+                packed = io.BytesIO()
+                compress_part(view, packed, out_ext, level, base_name, out_ext == "usc", ai_ratio)
+                raw_len = len(view)
+                view.release()
+                if buffer is not None:
+                    free_buffers.put(buffer)
+                else:
+                    release_pages(mm, idx * part_size, raw_len)
+                account("compress", time.perf_counter() - t0)
+                if not _queue_put(packed_q, (idx, packed.getvalue(), raw_len), stop):
+                    return
+        except Exception as e:
+            fail(e)
+        finally:
+            with lock:
+                compressors_left[0] -= 1
+                last = compressors_left[0] == 0
+            if last:
+                for _ in range(upload_workers):
+                    _queue_put(packed_q, None, stop)
+
+    def sender():
+        try:
+            while True:
+                item = _queue_get(packed_q, stop)
+                if item is None:
+                    return
+                idx, blob, raw_len = item
+                name = f"{base_name}.part{idx}.{out_ext}"
+                t0 = time.perf_counter()
+
+                def attempt():
+                    return uploader.upload(name, io.BytesIO(blob), len(blob))
+                remote_id = call_with_retries(attempt, f"Upload of {name}")
+                account("upload", time.perf_counter() - t0)
+                with lock:
+                    done[idx] = remote_id
+                    totals["uploaded_bytes"] += len(blob)
+                    save_upload_journal(journal_path, file_path, part_size, done, kind)
+                    if progress:
+                        progress(raw_len)
+        except Exception as e:
+            fail(e)
+
+    if progress:
+        progress(sum(min(part_size, file_size - idx * part_size) for idx in done if idx < num_parts))
+    start = time.perf_counter()
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=compressor, daemon=True) for _ in range(workers)]
+    threads += [threading.Thread(target=sender, daemon=True) for _ in range(upload_workers)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if mm is not None:
+            close_mapping(mm)
+        source.close()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f"Upload of {base_name} stopped after {len(done)}/{num_parts} parts: {errors[0]}") from errors[0]
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    raw_bytes = sum(min(part_size, file_size - idx * part_size) for idx in pending)
+    log_throughput(f"Compress+upload ({out_ext}, {len(pending)} parts, {workers}+{upload_workers} threads)",
+                   raw_bytes, elapsed)
+    return {
+        "operation": "upload",
+        "file": file_path,
+        "format": out_ext,
+        "parts": num_parts,
+        "resumed_parts": num_parts - len(pending),
+        "remote_ids": [done[idx] for idx in range(num_parts)],
+        "input_bytes": raw_bytes,
+        "uploaded_bytes": totals["uploaded_bytes"],
+        "read_seconds": busy["read"],
+        "compress_seconds": busy["compress"] / workers,
+        "upload_seconds": busy["upload"] / upload_workers,
+        "seconds": elapsed,
+        "mb_per_s": raw_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+
 
 #########################
-# Logging Setup
+#   Job Queue
 #########################
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+JOB_DB_PATH = os.path.join(os.path.expanduser("~"), ".usc-jobs.sqlite3")
+# How often the dispatcher re-reads the journal for jobs added, paused or
+# cancelled by another process, and stores the progress of its running jobs.
+JOB_POLL_INTERVAL = 1.0
+# Parameters holding paths; they are made absolute when a job is queued.
+JOB_PATH_PARAMS = ("paths", "output", "out_dir", "dedup_store")
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    paused INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner INTEGER,
+    done_bytes INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+class JobControl(ProgressTracker):
+    """
+    The progress callback a job's engine reports through. That is where a
+    paused job waits and a cancelled one raises JobCancelled, so both take
+    effect at the job's next progress report, or sooner in engines that call
+    check() between blocks.
+    """
+
+    def __init__(self, total_bytes, label):
+        super().__init__(total_bytes, label=label)
+        self.cancelled = False
+        self._running = threading.Event()
+        self._running.set()
+
+    def __call__(self, nbytes):
+        self.check()
+        super().__call__(nbytes)
+
+    def check(self):
+        self._running.wait()
+        if self.cancelled:
+            raise JobCancelled(f"{self.label} was cancelled")
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._running.set()
+
+
+def _pid_alive(pid):
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name != "posix":
+        return False  # can't tell without psutil; treat its jobs as orphaned
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class JobQueue:
+    """
+    Priority scheduler for compress(), extract() and verify() jobs, journaled in SQLite.
+
+    Jobs run on their own threads as long as their workers fit in `slots` CPU
+    slots (default: all logical CPUs); a job asking for more gets all of them.
+    Higher priority goes first, then the oldest job, and the head of the queue
+    is never overtaken, so a wide job isn't starved by narrow ones.
+
+    The journal at db_path is the only state. Jobs that were queued, or running
+    in a process that has since exited, are picked up by the next queue opened
+    on it; an interrupted job starts over. Another process (the CLI) can add,
+    pause, resume or cancel jobs through the same file. on_finish(job) is
+    called from the job's thread when it ends.
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH, slots=None, on_finish=None):
+        self.db_path = db_path
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        self.on_finish = on_finish
+        self._cond = threading.Condition()
+        self._running = {}  # job id -> (JobControl, slots held)
+        self._threads = []
+        self._used = 0
+        self._dirty = True
+        self._closing = False
+        self._idle = threading.Event()
+        self._dispatcher = None
+        self._finished = []
+        with self._db() as db:
+            db.execute(JOB_SCHEMA)
+            orphans = [row["id"] for row in db.execute("SELECT id, owner FROM jobs WHERE state = 'running'")
+                       if row["owner"] != os.getpid() and not _pid_alive(row["owner"])]
+            for job_id in orphans:
+                db.execute("UPDATE jobs SET state = 'queued', owner = NULL, cancel_requested = 0 WHERE id = ?",
+                           (job_id,))
+        if orphans:
+            logging.info(f"Re-queued {len(orphans)} interrupted job(s) from {db_path}")
+
+    @contextlib.contextmanager
+    def _db(self):
+        import sqlite3
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _job_row(self, db, job_id):
+        row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No job {job_id} in {self.db_path}")
+        return row
+
+    def _wake(self):
+        with self._cond:
+            self._dirty = True
+            self._idle.clear()
+            self._cond.notify_all()
+
+    def _as_dict(self, row):
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        with self._cond:
+            entry = self._running.get(job["id"])
+        if entry and job["state"] == "running":
+            job["done_bytes"] = entry[0].done_bytes
+        return job
+
+    def submit(self, kind, params, priority=0):
+        """Queue compress(), extract() or verify() with keyword params; returns the job id."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (choose from {', '.join(JOB_KINDS)})")
+        params = dict(params)
+        for key in JOB_PATH_PARAMS:
+            value = params.get(key)
+            if isinstance(value, (list, tuple)):
+                params[key] = [os.path.abspath(os.fspath(p)) for p in value]
+            elif value is not None:
+                params[key] = os.path.abspath(os.fspath(value))
+        total = sum(os.path.getsize(p) for p in params.get("paths", []) if os.path.isfile(p))
+        with self._db() as db:
+            job_id = db.execute(
+                "INSERT INTO jobs (kind, params, priority, total_bytes, created) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(params), priority, total, time.time())
+            ).lastrowid
+        self._wake()
+        return job_id
+
+    def cancel(self, job_id):
+        """A queued job is dropped; a running one stops at its next progress report."""
+        with self._db() as db:
+            self._job_row(db, job_id)
+            db.execute("UPDATE jobs SET state = 'cancelled', finished = ? WHERE id = ? AND state = 'queued'",
+                       (time.time(), job_id))
+            db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND state = 'running'", (job_id,))
+        self._apply_requests()
+        self._wake()
+
+    def pause(self, job_id):
+        """Hold a queued job back, or make a running one wait at its next progress report."""
+        self._set_paused(job_id, 1)
+
+    def resume(self, job_id):
+        self._set_paused(job_id, 0)
+
+    def _set_paused(self, job_id, paused):
+        with self._db() as db:
+            self._job_row(db, job_id)
+            db.execute("UPDATE jobs SET paused = ? WHERE id = ? AND state IN ('queued', 'running')",
+                       (paused, job_id))
+        self._apply_requests()
+        self._wake()
+
+    def set_priority(self, job_id, priority):
+        with self._db() as db:
+            self._job_row(db, job_id)
+            db.execute("UPDATE jobs SET priority = ? WHERE id = ? AND state = 'queued'", (priority, job_id))
+        self._wake()
+
+    def job(self, job_id):
+        with self._db() as db:
+            return self._as_dict(self._job_row(db, job_id))
+
+    def jobs(self, states=None):
+        """All jobs, newest first, optionally only those in `states`; running ones carry live done_bytes."""
+        with self._db() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY id DESC").fetchall()
+        return [self._as_dict(row) for row in rows if not states or row["state"] in states]
+
+    def start(self):
+        """Start dispatching queued jobs in the background."""
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+            self._dispatcher.start()
+
+    def run_until_idle(self):
+        """
+        Headless worker: run jobs until none is running and none can start
+        (paused queued jobs stay queued). Returns the jobs that ended here.
+        """
+        self.start()
+        self._idle.wait()
+        self.shutdown()
+        return [self.job(job_id) for job_id in self._finished]
+
+    def shutdown(self, wait=True):
+        """Stop starting jobs. Jobs left running when the process exits are re-queued by the next queue."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._dispatcher:
+            self._dispatcher.join()
+            self._dispatcher = None
+        if wait:
+            for t in list(self._threads):
+                t.join()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closing:
+                    if not self._cond.wait(JOB_POLL_INTERVAL):
+                        break
+                if self._closing:
+                    return
+                self._dirty = False
+            self._apply_requests()
+            waiting = self._start_ready()
+            with self._cond:
+                if not waiting and not self._running and not self._dirty:
+                    self._idle.set()
+
+    def _apply_requests(self):
+        """Pass pause/cancel requests from the journal to running jobs and store their progress."""
+        with self._cond:
+            running = dict(self._running)
+        if not running:
+            return
+        with self._db() as db:
+            for job_id, (control, _) in running.items():
+                row = self._job_row(db, job_id)
+                if row["cancel_requested"]:
+                    control.cancel()
+                elif row["paused"]:
+                    control.pause()
+                else:
+                    control.resume()
+                db.execute("UPDATE jobs SET done_bytes = ? WHERE id = ? AND state = 'running'",
+                           (control.done_bytes, job_id))
+
+    def _start_ready(self):
+        """Start jobs from the head of the queue while they fit; True if one is left waiting."""
+        while True:
+            with self._db() as db:
+                row = db.execute("SELECT * FROM jobs WHERE state = 'queued' AND paused = 0 "
+                                 "ORDER BY priority DESC, id LIMIT 1").fetchone()
+                if row is None:
+                    return False
+                params = json.loads(row["params"])
+                need = min(max(1, params.get("workers", 1)), self.slots)
+                with self._cond:
+                    if self._closing or self._used + need > self.slots:
+                        return True
+                claimed = db.execute(
+                    "UPDATE jobs SET state = 'running', owner = ?, started = ?, done_bytes = 0, "
+                    "cancel_requested = 0 WHERE id = ? AND state = 'queued'",
+                    (os.getpid(), time.time(), row["id"])
+                ).rowcount
+            if not claimed:
+                continue  # another process took it
+            params["workers"] = need
+            control = JobControl(row["total_bytes"], f"{row['kind']} job #{row['id']}")
+            t = threading.Thread(target=self._run, args=(row["id"], row["kind"], params, control, need),
+                                 daemon=True)
+            with self._cond:
+                self._running[row["id"]] = (control, need)
+                self._used += need
+                self._threads.append(t)
+            t.start()
+
+    def _run(self, job_id, kind, params, control, need):
+        state, result, error = "done", None, None
+        try:
+            result = JOB_KINDS[kind](progress=control, **params)
+            if control.cancelled:
+                # Cancelled after the engine's last check: the job finished, but its output isn't wanted.
+                state = "cancelled"
+                if kind == "compress" and not params.get("incremental"):
+                    remove_outputs(result["outputs"])
+                result = None
+        except Exception as e:
+            # Engines running their own threads may wrap JobCancelled in another error.
+            if control.cancelled:
+                state = "cancelled"
+            else:
+                logging.error(f"Job {job_id} ({kind}) failed: {e}")
+                state, error = "failed", str(e)
+        with self._db() as db:
+            db.execute("UPDATE jobs SET state = ?, finished = ?, done_bytes = ?, result = ?, error = ?, paused = 0, "
+                       "owner = NULL WHERE id = ?",
+                       (state, time.time(), control.done_bytes, json.dumps(result) if result else None, error,
+                        job_id))
+        try:
+            if self.on_finish:
+                self.on_finish(self.job(job_id))
+        finally:
+            with self._cond:
+                del self._running[job_id]
+                self._used -= need
+                self._threads.remove(threading.current_thread())
+                self._finished.append(job_id)
+            self._wake()
 
-#########################
-#   THEMING / SKINS
-#########################
-THEMES = {
-    "Default": {
-        "bg_color": "#f0f0f0",
-        "fg_color": "#000000",
-        "progress_bg": "#ffffff"
-    },
-    "Dark": {
-        "bg_color": "#333333",
-        "fg_color": "#ffffff",
-        "progress_bg": "#555555"
-    },
-    "Rainbow": {
-        "bg_color": "#ffb3ba",
-        "fg_color": "#004d00",
-        "progress_bg": "#ffffba"
-    },
-    "HighContrast": {
-        "bg_color": "#000000",
-        "fg_color": "#ffed00",
-        "progress_bg": "#ffffff"
-    },
-    "CustomImage": {
-        "bg_color": None,
-        "fg_color": "#ffffff",
-        "progress_bg": "#ffffff"
-    }
-}
-CURRENT_THEME = "Default"
+
+JOB_KINDS = {"compress": compress, "extract": extract, "verify": verify}
+
+
+def format_job(job):
+    """One line for a job: id, state, priority, kind, target and progress."""
+    state = "paused" if job["paused"] and job["state"] in ("queued", "running") else job["state"]
+    params = job["params"]
+    target = os.path.basename(params.get("output") or params.get("out_dir") or params["paths"][0])
+    line = f"#{job['id']} {state:<9} p{job['priority']:<3} {job['kind']} -> {target}"
+    if job["total_bytes"] and job["state"] in ("running", "done"):
+        line += f"  {min(job['done_bytes'] / job['total_bytes'], 1.0):.0%}"
+    if job["error"]:
+        line += f"  ({job['error']})"
+    elif job["result"] and job["result"].get("ok", True) is False:
+        line += "  (problems found)"
+    elif job["result"] and job["result"].get("ok", True) is None:
+        line += "  (unchecked)"
+    return line
 
 
 class SmartCompressApp:
@@ -91,32 +4879,37 @@ class SmartCompressApp:
         self.root.geometry("1000x700")
 
         self.is_compressing = False
-        self.gauth = None
         self.gdrive = None
+        # The running job's ProgressTracker, sampled by poll_progress on the Tk thread.
+        self.tracker = None
+        # Local compression and extraction run as queued jobs; see the Jobs tab.
+        self.jobs = JobQueue(on_finish=self.job_finished)
+        self.job_ids = []
+        self.jobs_busy = False
 
         # For custom background image
         self.bg_image = None
 
         self.setup_main_interface()
         self.warn_if_underpowered()
+        self.jobs.start()
+        self.root.after(0, self.poll_jobs)
 
     #########################
     #   System Resource Check
     #########################
     def warn_if_underpowered(self):
-        try:
-            import psutil
-            total_ram = psutil.virtual_memory().total
-            ram_gb = total_ram / (1024**3)
-            cpu_count = psutil.cpu_count(logical=True)
-            if ram_gb < 4 or cpu_count < 4:
-                messagebox.showwarning(
-                    "Low System Resources",
-                    f"Your system has {ram_gb:.1f} GB RAM and {cpu_count} CPU cores.\n"
-                    "Local high-level compression/decompression may be slow or unstable."
-                )
-        except ImportError:
-            pass
+        cpu_count, total_ram, _ = system_resources()
+        if total_ram is None:
+            return
+        ram_gb = total_ram / (1024**3)
+        if ram_gb < 4 or cpu_count < 4:
+            messagebox.showwarning(
+                "Low System Resources",
+                f"Your system has {ram_gb:.1f} GB RAM and {cpu_count} CPU cores.\n"
+                "Local high-level compression/decompression may be slow or unstable.\n"
+                "The \"auto\" algorithm picks settings that fit this machine."
+            )
 
     #########################
     #   Main Interface
@@ -133,6 +4926,12 @@ class SmartCompressApp:
         extract_button = tk.Button(toolbar_frame, text="Extract", command=self.start_extraction)
         extract_button.pack(side=tk.LEFT, padx=2, pady=2)
 
+        verify_button = tk.Button(toolbar_frame, text="Verify", command=self.start_verification)
+        verify_button.pack(side=tk.LEFT, padx=2, pady=2)
+
+        contents_button = tk.Button(toolbar_frame, text="Contents", command=self.show_contents)
+        contents_button.pack(side=tk.LEFT, padx=2, pady=2)
+
         image_button = tk.Button(toolbar_frame, text="Custom BG Image", command=self.choose_bg_image)
         image_button.pack(side=tk.LEFT, padx=2, pady=2)
 
@@ -165,6 +4964,10 @@ class SmartCompressApp:
         tab_control.add(self.decompress_tab, text='Decompress')
         self.create_decompress_tab(self.decompress_tab)
 
+        self.jobs_tab = ttk.Frame(tab_control)
+        tab_control.add(self.jobs_tab, text='Jobs')
+        self.create_jobs_tab(self.jobs_tab)
+
         tab_control.pack(expand=1, fill="both")
 
         # Progress label & bar
@@ -188,15 +4991,22 @@ class SmartCompressApp:
 
         tk.Label(tab, text="Choose Algorithm:").pack()
         self.algo_var = tk.StringVar(value="zip")
-        algo_options = ["zip", "zstd", "brotli", "7z", "xz", "tar"]
-        self.algo_dropdown = ttk.OptionMenu(tab, self.algo_var, "zip", *algo_options)
+        self.algo_dropdown = ttk.OptionMenu(tab, self.algo_var, "zip", *ALGORITHMS, "auto")
         self.algo_dropdown.pack(pady=5)
 
+        tk.Label(tab, text="Auto Target: speed, ratio:0.4 or time:60").pack()
+        self.auto_target_var = tk.StringVar(value="speed")
+        tk.Entry(tab, textvariable=self.auto_target_var).pack()
+
         tk.Label(tab, text="Compression Level:").pack()
         self.level_var = tk.IntVar(value=5)
         self.level_scale = tk.Scale(tab, from_=1, to=9, orient=tk.HORIZONTAL, variable=self.level_var)
         self.level_scale.pack()
 
+        tk.Label(tab, text="Worker Processes:").pack()
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        tk.Spinbox(tab, from_=1, to=max(64, DEFAULT_WORKERS), textvariable=self.workers_var, width=5).pack()
+
         # "Smart ratio" for AI-based approach
         tk.Label(tab, text="AI Smart Ratio (1=fast,10=max):").pack()
         self.ai_ratio_var = tk.IntVar(value=5)
@@ -208,6 +5018,28 @@ class SmartCompressApp:
         split_entry = tk.Entry(tab, textvariable=self.split_var)
         split_entry.pack()
 
+        self.volumes_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(tab, text="Split: independent .usc volumes + .uscv index",
+                       variable=self.volumes_var).pack()
+
+        self.zstd_long_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(tab, text="zstd long-distance matching", variable=self.zstd_long_var).pack()
+
+        self.zstd_dict_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(tab, text="ZIP: zstd dictionary for many small files", variable=self.zstd_dict_var).pack()
+
+        self.incremental_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(tab, text="ZIP: update existing archive (only changed files)",
+                       variable=self.incremental_var).pack()
+
+        tk.Label(tab, text="7z Solid Block (MB): 0 = one block, -1 = per file").pack()
+        self.solid_block_var = tk.IntVar(value=0)
+        tk.Entry(tab, textvariable=self.solid_block_var).pack()
+
+        self.dedup_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(tab, text="Dedup: store only new chunks (.uscm + .usc-store folder)",
+                       variable=self.dedup_var).pack()
+
         self.ai_var = tk.BooleanVar(value=False)
         tk.Checkbutton(tab, text="Use AI-based Local Compression", variable=self.ai_var).pack(pady=5)
 
@@ -219,6 +5051,22 @@ class SmartCompressApp:
         self.decompress_listbox = tk.Listbox(tab, selectmode=tk.MULTIPLE)
         self.decompress_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
+    def create_jobs_tab(self, tab):
+        tk.Label(tab, text="Queued, running and finished jobs (kept across restarts):").pack(pady=5)
+        self.jobs_listbox = tk.Listbox(tab, selectmode=tk.MULTIPLE)
+        self.jobs_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        button_frame = tk.Frame(tab)
+        button_frame.pack(pady=5)
+        for text, action in (("Pause", self.jobs.pause), ("Resume", self.jobs.resume), ("Cancel", self.jobs.cancel)):
+            tk.Button(button_frame, text=text, command=lambda a=action: self.job_action(a)).pack(side=tk.LEFT, padx=2)
+
+        tk.Label(button_frame, text="Priority for new jobs:").pack(side=tk.LEFT, padx=(10, 2))
+        self.priority_var = tk.IntVar(value=0)
+        tk.Spinbox(button_frame, from_=-9, to=9, textvariable=self.priority_var, width=4).pack(side=tk.LEFT)
+        tk.Button(button_frame, text="Apply to Queued", command=lambda: self.job_action(self.set_job_priority)
+                  ).pack(side=tk.LEFT, padx=2)
+
     #########################
     #   Theming
     #########################
@@ -275,7 +5123,7 @@ class SmartCompressApp:
             ext = file_path.lower()
             # If it’s a known compressed extension, add to decompress
             # We also check .partX or .part0, which might be splitted archives
-            if ('.part' in ext) or ext.endswith('.zip') or ext.endswith('.tar') or ext.endswith('.7z') or ext.endswith('.xz'):
+            if ('.part' in ext) or ext.endswith(('.zip', '.tar', '.7z', '.xz', '.zst', '.br', '.usc', '.uscm', '.uscv')):
                 self.decompress_listbox.insert(tk.END, file_path)
             else:
                 self.compress_listbox.insert(tk.END, file_path)
@@ -288,24 +5136,61 @@ class SmartCompressApp:
         if not selected_files:
             messagebox.showwarning("No Files Selected", "Please select files to compress.")
             return
+        if self.is_compressing:
+            messagebox.showwarning("Busy", "Wait for the current compression or upload to finish.")
+            return
 
         mode = self.mode_var.get()
         if mode == "local":
-            threading.Thread(target=self.start_local_compression, args=(selected_files,), daemon=True).start()
+            self.start_local_compression(selected_files)
         else:
+            # Set here, on the Tk thread, so a second click can't start a second upload.
+            self.is_compressing = True
             threading.Thread(target=self.start_cloud_compression, args=(selected_files,), daemon=True).start()
 
     #########################
     #   Local Multi-Algorithm (with optional AI)
     #########################
     def start_local_compression(self, selected_files):
+        """Runs on the Tk thread; only the auto mode probe goes to a worker thread."""
         if not selected_files:
             return
 
         self.is_compressing = True
         self.update_progress_label("Starting local compression...")
 
-        out_ext = self.algo_var.get()
+        algorithm, level, workers = self.algo_var.get(), self.level_var.get(), self.workers_var.get()
+        if algorithm == "auto" and not self.ai_var.get():
+            # Probe before asking for a file name, so the dialog offers the right extension.
+            self.update_progress_label("Auto: probing the selection...")
+            threading.Thread(target=self.auto_tune_selection, args=(selected_files, self.auto_target_var.get()),
+                             daemon=True).start()
+            return
+        self.queue_local_compression(selected_files, algorithm, level, workers)
+
+    def auto_tune_selection(self, selected_files, target):
+        """Worker thread: run auto_tune(), then continue on the Tk thread with its pick."""
+        try:
+            plan = auto_tune(selected_files, target)
+        except Exception as e:
+            msg = str(e)
+            self.root.after(0, lambda msg=msg: messagebox.showerror("Auto Mode Error", msg))
+            self.is_compressing = False
+            self.update_progress_label("No compression in progress")
+            return
+        algorithm, level, workers = plan["algorithm"], plan["level"], plan["workers"]
+        self.update_progress_label(f"Auto: {algorithm} level {level}, {workers} workers")
+        self.root.after(0, lambda: self.queue_local_compression(selected_files, algorithm, level, workers))
+
+    def queue_local_compression(self, selected_files, algorithm, level, workers):
+        """Ask for the output file and queue the compress job (on the Tk thread)."""
+        out_ext = ALGO_EXTENSIONS.get(algorithm, algorithm)
+        if self.ai_var.get():
+            out_ext = "usc"
+        if self.dedup_var.get():
+            out_ext = "uscm"
+        elif self.volumes_var.get() and self.split_var.get() > 0:
+            out_ext = "uscv"
         out_archive = filedialog.asksaveasfilename(
             title="Save Compressed Archive As",
             defaultextension=f".{out_ext}",
@@ -316,231 +5201,95 @@ class SmartCompressApp:
             self.update_progress_label("No compression in progress")
             return
 
-        total_size = sum(os.path.getsize(f) for f in selected_files)
-        self.progress_bar["maximum"] = total_size
-        self.progress_bar["value"] = 0
-
-        level = self.level_var.get()
-        use_ai = self.ai_var.get()
-        ai_ratio = self.ai_ratio_var.get()
-
-        split_mb = self.split_var.get()
-        if split_mb <= 0:
-            try:
-                if use_ai:
-                    self.do_local_ai_compression(selected_files, out_archive, out_ext, level, ai_ratio)
-                else:
-                    self.do_local_compress_format(selected_files, out_archive, out_ext, level)
-            except Exception as e:
-                logging.error(f"Error during local compression: {e}")
-                messagebox.showerror("Local Compression Error", str(e))
-        else:
-            # Splitting
-            part_size = split_mb * 1024 * 1024
-            try:
-                for file_path in selected_files:
-                    self.local_split_and_compress(file_path, part_size, out_ext, level, use_ai, ai_ratio)
-            except Exception as e:
-                logging.error(f"Error during split compression: {e}")
-                messagebox.showerror("Split Compression Error", str(e))
+        try:
+            job_id = self.jobs.submit("compress", dict(
+                paths=selected_files,
+                output=out_archive,
+                algorithm=algorithm,
+                level=level,
+                split_mb=self.split_var.get(),
+                workers=workers,
+                adaptive=self.ai_var.get(),
+                ai_ratio=self.ai_ratio_var.get(),
+                long_distance=self.zstd_long_var.get(),
+                zstd_dictionary=self.zstd_dict_var.get(),
+                dedup_store=os.path.join(os.path.dirname(out_archive), DEDUP_STORE_DIR) if self.dedup_var.get() else None,
+                incremental=self.incremental_var.get(),
+                solid_block_mb=self.solid_block_var.get(),
+                volumes=self.volumes_var.get(),
+            ), self.priority_var.get())
+            self.update_progress_label(f"Queued compression job #{job_id}")
+        except Exception as e:
+            logging.error(f"Error queueing local compression: {e}")
+            messagebox.showerror("Local Compression Error", str(e))
 
         self.is_compressing = False
-        self.update_progress_label("No compression in progress")
-        self.progress_bar["value"] = 0
-
-    def local_split_and_compress(self, file_path, part_size, out_ext, level, use_ai=False, ai_ratio=5):
-        file_size = os.path.getsize(file_path)
-        base_name = os.path.basename(file_path)
-        num_parts = math.ceil(file_size / part_size)
-        accumulated = 0
-        with open(file_path, 'rb') as f_in:
-            for part_idx in range(num_parts):
-                chunk_data = f_in.read(part_size)
-                part_out = f"{base_name}.part{part_idx}.{out_ext}"
-                if use_ai:
-                    self.ai_compress_chunk(chunk_data, part_out, ai_ratio)
-                else:
-                    self.do_local_compress_chunk(chunk_data, part_out, out_ext, level, base_name)
-                accumulated += len(chunk_data)
-                self.root.after(0, self.update_progressbar, accumulated)
-        messagebox.showinfo(
-            "Split-Compression Complete",
-            f"Created {num_parts} parts from {base_name}"
-        )
-
-    def do_local_compress_format(self, selected_files, out_path, out_ext, level):
-        """
-        Dispatch to specific compress function (zip, tar, 7z, xz).
-        """
-        if out_ext == "zip":
-            self.do_local_zip(selected_files, out_path, level)
-        elif out_ext == "tar":
-            self.do_local_tar(selected_files, out_path, level)
-        else:
-            messagebox.showinfo("Placeholder", f"No full implementation for .{out_ext} compression yet.")
-
-    def do_local_compress_chunk(self, chunk_data, out_file, out_ext, level, base_name):
-        """
-        For splitted approach: compress chunk_data to out_file using the chosen format.
-        """
-        if out_ext == "zip":
-            with zipfile.ZipFile(out_file, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-                zf.writestr(base_name, chunk_data)
-        else:
-            # Placeholder for other formats
-            with open(out_file, 'wb') as f:
-                f.write(chunk_data)
-
-    def do_local_ai_compression(self, selected_files, out_path, out_ext, level, ai_ratio):
-        """
-        Example AI method with 'ai_ratio' controlling how many times we reverse bytes (?)
-        Just a silly placeholder.
-        """
-        accumulated = 0
-        with open(out_path, 'wb') as f_out:
-            for file_path in selected_files:
-                sz = os.path.getsize(file_path)
-                with open(file_path, 'rb') as f_in:
-                    data = f_in.read()
-                    # Repeat reversing 'ai_ratio' times
-                    compressed_data = self.ai_compress_chunk(data, None, ai_ratio)
-                    f_out.write(compressed_data)
-                accumulated += sz
-                self.root.after(0, self.update_progressbar, accumulated)
-        messagebox.showinfo("AI Compression Complete", f"AI-compressed {len(selected_files)} files to {out_path}")
-
-    def ai_compress_chunk(self, chunk_data, out_file_path=None, ratio=5):
-        """
-        We'll just do reversing 'ratio' times for demonstration.
-        """
-        result = chunk_data
-        for _ in range(ratio):
-            result = result[::-1]
-        if out_file_path:
-            with open(out_file_path, 'wb') as f:
-                f.write(result)
-        return result
-
-    # Example .zip with a 'level' param
-    def do_local_zip(self, selected_files, out_path, level=5):
-        """
-        We don't have direct 'level' control with Python's built-in zipfile, 
-        so we just do a standard ZIP. This is a placeholder.
-        """
-        accumulated = 0
-        with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-            for file_path in selected_files:
-                sz = os.path.getsize(file_path)
-                with open(file_path, 'rb') as fin:
-                    data = fin.read()
-                    arcname = os.path.basename(file_path)
-                    zf.writestr(arcname, data)
-                accumulated += sz
-                self.root.after(0, self.update_progressbar, accumulated)
-        messagebox.showinfo("Compression Complete", f"Files compressed into {out_path}")
-
-    def do_local_tar(self, selected_files, out_path, level=5):
-        """
-        Basic .tar creation (no direct 'level' param). For Gzip tar, we'd do 'w:gz', etc.
-        """
-        if not TAR_AVAILABLE:
-            messagebox.showinfo("tarfile Missing", "Install Python’s tarfile or ensure it's available.")
-            return
-
-        import tarfile
-        with tarfile.open(out_path, 'w') as tf:
-            accumulated = 0
-            for file_path in selected_files:
-                sz = os.path.getsize(file_path)
-                tf.add(file_path, arcname=os.path.basename(file_path))
-                accumulated += sz
-                self.root.after(0, self.update_progressbar, accumulated)
-        messagebox.showinfo("Compression Complete", f"TAR created at {out_path}")
 
     #########################
     #   Cloud Compression
     #########################
-    # (unchanged, same pydrive2 approach)
     def start_cloud_compression(self, selected_files):
-        if not PYDRIVE_AVAILABLE:
-            messagebox.showerror("pydrive2 Missing", "Install pydrive2 and have client_secrets.json.")
-            return
-        if not self.gauth or not self.gdrive:
-            if not self.google_drive_login():
+        """
+        Worker thread: log in if needed and upload the selection. Dialogs go
+        through root.after; is_compressing (set by the caller) is cleared at the end.
+        """
+        try:
+            if not PYDRIVE_AVAILABLE:
+                self.root.after(0, lambda: messagebox.showerror(
+                    "pydrive2 Missing", "Install pydrive2 and have client_secrets.json."))
                 return
-        split_mb = self.split_var.get()
-        for file_path in selected_files:
-            if split_mb > 0:
-                self.cloud_split_and_upload_google_drive(file_path, split_mb)
-            else:
-                self.cloud_single_upload_google_drive(file_path)
-        messagebox.showinfo("Cloud Upload", "All files uploaded to Google Drive.")
-        self.is_compressing = False
-        self.update_progress_label("No compression in progress")
-        self.progress_bar["value"] = 0
+            if not self.gdrive:
+                if not self.google_drive_login():
+                    return
+            split_mb = self.split_var.get()
+            self.start_progress(sum(os.path.getsize(f) for f in selected_files), "Uploading")
+            try:
+                for file_path in selected_files:
+                    self.cloud_upload_google_drive(file_path, split_mb)
+                self.root.after(0, lambda: messagebox.showinfo("Cloud Upload", "All files uploaded to Google Drive."))
+            except Exception as e:
+                logging.error(f"Error during cloud upload: {e}")
+                msg = f"{e}\n\nRun the upload again to resume from the last confirmed part."
+                self.root.after(0, lambda msg=msg: messagebox.showerror("Cloud Upload Error", msg))
+            self.finish_progress()
+        finally:
+            self.is_compressing = False
 
     def google_drive_login(self):
-        from pydrive2.auth import GoogleAuth
-        from pydrive2.drive import GoogleDrive
-        self.is_compressing = True
+        """Worker thread: connect to Drive; False (after an error dialog) if that fails."""
         self.update_progress_label("Logging into Google Drive...")
-        self.gauth = GoogleAuth()
         try:
-            self.gauth.LocalWebserverAuth()
+            self.gdrive = connect_google_drive()
         except Exception as e:
-            messagebox.showerror("Google Drive Auth Error", str(e))
-            self.is_compressing = False
+            msg = str(e)
+            self.root.after(0, lambda msg=msg: messagebox.showerror("Google Drive Auth Error", msg))
+            self.update_progress_label("No compression in progress")
             return False
-        self.gdrive = GoogleDrive(self.gauth)
-        self.is_compressing = False
         self.update_progress_label("No compression in progress")
-        messagebox.showinfo("Google Drive", "Successfully authenticated with Google Drive.")
+        self.root.after(0, lambda: messagebox.showinfo("Google Drive", "Successfully authenticated with Google Drive."))
         return True
 
-    def cloud_single_upload_google_drive(self, file_path):
-        if not self.gdrive:
-            return
-        self.is_compressing = True
-        self.update_progress_label("Uploading file to Google Drive...")
-        sz = os.path.getsize(file_path)
-        base_name = os.path.basename(file_path)
-        self.progress_bar["maximum"] = sz
-        self.progress_bar["value"] = 0
-        drive_file = self.gdrive.CreateFile({'title': base_name})
-        with open(file_path, 'rb') as f:
-            data = f.read()
-            drive_file.SetContentBinary(data)
-        drive_file.Upload(param={'supportsAllDrives': True})
-        self.progress_bar["value"] = sz
-        self.is_compressing = False
-        self.update_progress_label("No compression in progress")
-        messagebox.showinfo("Cloud Upload Complete", f"Uploaded '{base_name}' to Google Drive.")
-
-    def cloud_split_and_upload_google_drive(self, file_path, split_mb):
-        if not self.gdrive:
-            return
-        self.is_compressing = True
-        self.update_progress_label("Splitting & uploading file to Google Drive...")
-        part_size = split_mb * 1024 * 1024
-        file_size = os.path.getsize(file_path)
+    def cloud_upload_google_drive(self, file_path, split_mb):
+        """
+        Compress one file into split_mb parts (CLOUD_PART_SIZE when 0) while
+        uploading them to Drive. An interrupted upload resumes from its journal.
+        """
         base_name = os.path.basename(file_path)
-        num_parts = math.ceil(file_size / part_size)
-        self.progress_bar["maximum"] = file_size
-        self.progress_bar["value"] = 0
-        accumulated = 0
-        with open(file_path, 'rb') as f:
-            for part_idx in range(num_parts):
-                chunk_data = f.read(part_size)
-                part_filename = f"{base_name}.part{part_idx}"
-                drive_file = self.gdrive.CreateFile({'title': part_filename})
-                drive_file.SetContentBinary(chunk_data)
-                drive_file.Upload(param={'supportsAllDrives': True})
-                accumulated += len(chunk_data)
-                self.root.after(0, self.update_progressbar, accumulated)
-        self.is_compressing = False
-        self.update_progress_label("No compression in progress")
-        self.progress_bar["value"] = 0
-        messagebox.showinfo("Cloud Split Upload Complete", f"Uploaded {base_name} in {num_parts} parts to Google Drive.")
+        self.tracker.label = f"Uploading {base_name}"
+        out_ext = "usc" if self.ai_var.get() else ALGO_EXTENSIONS.get(self.algo_var.get(), self.algo_var.get())
+        if out_ext not in CLOUD_CODEC_EXTENSIONS:
+            logging.info(f"{out_ext} can't be compressed per part; using zstd for the cloud upload")
+            out_ext = "zst"
+        stats = upload_compressed(
+            file_path, DriveUploader(self.gdrive),
+            out_ext=out_ext,
+            level=self.level_var.get(),
+            part_size=split_mb * 1024 * 1024,
+            workers=self.workers_var.get(),
+            ai_ratio=self.ai_ratio_var.get(),
+            progress=self.tracker,
+        )
+        logging.info(f"Uploaded {base_name} in {stats['parts']} part(s) ({stats['resumed_parts']} resumed)")
 
     #########################
     #   Extraction
@@ -559,207 +5308,724 @@ class SmartCompressApp:
         if not out_dir:
             return
 
-        self.is_compressing = True
-        self.update_progress_label("Starting decompression...")
-        total_size = sum(os.path.getsize(f) for f in selected_files)
-        self.progress_bar["maximum"] = total_size
-        self.progress_bar["value"] = 0
-        accumulated = 0
-
-        for cfile in selected_files:
-            fsize = os.path.getsize(cfile)
-            # Check if this is a parted file (like "example.part0.zip", "example.part1.zip", etc.)
-            # If parted, unify them first, produce a single temp file, then decompress.
-            merged_path, final_ext = self.check_and_merge_parts(cfile)
-
-            # Now decompress based on final_ext
-            # Could be .zip, .tar, .7z, .xz, or AI-based extension
-            self.local_decompress(merged_path, final_ext, out_dir)
+        jobs, problems = plan_extraction(selected_files)
+        if problems:
+            for source, _, _ in jobs:
+                if isinstance(source, ConcatenatedFile):
+                    source.close()
+            messagebox.showerror("Incomplete Split Archive", "\n".join(problems))
+            return
 
-            # If parted, remove the merged temp if desired. 
-            # We'll leave as is or do a cleanup placeholder.
+        # One job per archive, so a bad one doesn't stop the rest.
+        for source, _, _ in jobs:
+            # Split sets arrive as one ConcatenatedFile over all their parts.
+            paths = source.paths if isinstance(source, ConcatenatedFile) else [source]
+            if isinstance(source, ConcatenatedFile):
+                source.close()
+            self.jobs.submit("extract", dict(paths=paths, out_dir=out_dir, workers=self.workers_var.get()),
+                             self.priority_var.get())
+        self.update_progress_label(f"Queued {len(jobs)} extraction job(s)")
 
-            accumulated += fsize
-            self.root.after(0, self.update_progressbar, accumulated)
+    def start_verification(self):
+        """Check the selected archives against their stored checksums, without extracting them."""
+        selected_files = [self.decompress_listbox.get(i) for i in self.decompress_listbox.curselection()]
+        if not selected_files:
+            messagebox.showwarning("No Files Selected", "Please select compressed files to verify.")
+            return
+        job_id = self.jobs.submit("verify", dict(paths=selected_files, workers=self.workers_var.get()),
+                                  self.priority_var.get())
+        self.update_progress_label(f"Queued verification job #{job_id}")
 
-        messagebox.showinfo("Decompression Complete", "All selected files have been processed.")
-        self.is_compressing = False
-        self.update_progress_label("No compression in progress")
-        self.progress_bar["value"] = 0
+    def show_contents(self):
+        """List the selected archives' members (read on a worker thread, headers only)."""
+        selected_files = [self.decompress_listbox.get(i) for i in self.decompress_listbox.curselection()]
+        if not selected_files:
+            messagebox.showwarning("No Files Selected", "Please select compressed files to list.")
+            return
 
-    def check_and_merge_parts(self, filepath):
-        """
-        If the file is partN.something, unify all parts. Return the merged file path + extension
-        Example: 'myarchive.part0.zip' => merges .part0.zip, .part1.zip, etc. => 'temp_merged_myarchive.zip'
-        """
-        base = os.path.basename(filepath)
-        dirname = os.path.dirname(filepath)
-        # Check if .partX is in the name
-        if ".part" in base:
-            # We parse out the prefix up to .part
-            # e.g. base='myarchive.part0.zip', split => prefix='myarchive', ext='.zip'
-            part_index = base.find(".part")
-            prefix = base[:part_index]  # 'myarchive'
-            # after 'partX' we might see .zip, .7z, .tar, etc.
-            # Example: '.part0.zip' => ext = '.zip'
-            # We'll find the next dot after 'part0'
-            # a simpler approach is to find the substring after the second dot
-            splitted = base[part_index+1:].split('.', 1)  # e.g. 'part0.zip' => ['part0','zip']
-            if len(splitted) > 1:
-                final_ext = '.' + splitted[1]  # e.g. '.zip'
-            else:
-                final_ext = ''  # no extension?
-
-            # Now unify all .partX + final_ext
-            # We'll search for all files in dirname with same prefix, partN, final_ext
-            # Then sort them by partN index
-            all_parts = []
-            for fname in os.listdir(dirname):
-                if fname.startswith(prefix + ".part") and fname.endswith(final_ext):
-                    all_parts.append(fname)
-            # Sort them by the part number
-            # each name like prefix.part0.zip => find the number after 'part' and before final_ext
-            def part_index_func(fn):
-                # e.g. prefix.part7.zip => we find the substring after .part => '7'
-                idx = fn.find(".part")
-                # substring from idx+5 up to the next dot?
-                sub = fn[idx+5:]
-                # sub might be '7.zip' => split at '.' => '7'
-                partnumber = sub.split('.',1)[0]  # '7'
-                return int(partnumber)
-            all_parts.sort(key=part_index_func)
-
-            merged_name = f"temp_merged_{prefix}{final_ext}"
-            merged_path = os.path.join(dirname, merged_name)
-
-            with open(merged_path, 'wb') as fout:
-                for p in all_parts:
-                    fullp = os.path.join(dirname, p)
-                    with open(fullp, 'rb') as part_f:
-                        fout.write(part_f.read())
-
-            return merged_path, final_ext
-        else:
-            # Not parted
-            # let's parse extension anyway
-            ext = os.path.splitext(filepath)[1]
-            return filepath, ext
+        def work():
+            try:
+                stats = list_archives(selected_files)
+            except Exception as e:
+                logging.error(f"Listing failed: {e}")
+                msg = str(e)
+                self.root.after(0, lambda msg=msg: messagebox.showerror("Listing Failed", msg))
+                return
+            self.root.after(0, lambda: self.contents_window(selected_files, stats))
 
-    def local_decompress(self, file_path, extension, out_dir):
-        """
-        Decompress the file at file_path with the given extension into out_dir.
-        If AI-based, do the reversing logic. Otherwise dispatch to .zip, .tar, .7z, .xz, etc.
-        """
-        # We'll guess if it's AI-based if extension is .ai or user used it. 
-        # But we don't store that. So let's do a naive approach:
-        if extension == ".zip":
-            self.do_local_unzip(file_path, out_dir)
-        elif extension == ".tar":
-            self.do_local_untar(file_path, out_dir)
-        elif extension == ".7z":
-            self.do_local_un7z(file_path, out_dir)
-        elif extension == ".xz":
-            self.do_local_unxz(file_path, out_dir)
-        else:
-            # Possibly AI approach => try a "re-reverse multiple times"? 
-            # We'll do a "detect" approach. If it fails, we skip.
-            # For real usage, you'd store metadata or extension like .ai, etc.
-            # We'll do a fallback
-            self.do_local_ai_decompress(file_path, out_dir)
+        threading.Thread(target=work, daemon=True).start()
 
-    def do_local_unzip(self, zip_path, out_dir):
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(out_dir)
-            messagebox.showinfo("Extraction Complete", f"Unzipped {os.path.basename(zip_path)} into {out_dir}")
-        except Exception as e:
-            logging.error(f"Error extracting zip {zip_path}: {e}")
-            messagebox.showerror("Extraction Error", str(e))
+    def contents_window(self, selected_files, stats):
+        """A window listing every member; the selected ones can be extracted on their own."""
+        window = tk.Toplevel(self.root)
+        window.title("Archive Contents")
+        listbox = tk.Listbox(window, selectmode=tk.EXTENDED, width=100, height=25)
+        listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        names = []
+        for archive in stats["archives"]:
+            for entry in archive["members"]:
+                if entry["dir"]:
+                    continue
+                size = "?" if entry["size"] is None else f"{entry['size']:,}"
+                listbox.insert(tk.END, f"{entry['name']}  ({size} bytes)  in {os.path.basename(archive['archive'])}")
+                names.append(entry["name"])
+        tk.Button(window, text="Extract Selected",
+                  command=lambda: self.extract_members(selected_files, [names[i] for i in listbox.curselection()])
+                  ).pack(pady=5)
 
-    def do_local_untar(self, tar_path, out_dir):
-        if not TAR_AVAILABLE:
-            messagebox.showwarning("tarfile Missing", "Python's tarfile not available or error importing.")
+    def extract_members(self, selected_files, names):
+        if not names:
+            messagebox.showwarning("No Members Selected", "Please select members to extract.")
             return
-        try:
-            with tarfile.open(tar_path, 'r') as tf:
-                tf.extractall(path=out_dir)
-            messagebox.showinfo("Extraction Complete", f"Untarred {os.path.basename(tar_path)} into {out_dir}")
-        except Exception as e:
-            logging.error(f"Error extracting tar {tar_path}: {e}")
-            messagebox.showerror("Extraction Error", str(e))
-
-    def do_local_un7z(self, s7_path, out_dir):
-        if not SEVENZ_AVAILABLE:
-            messagebox.showinfo("py7zr Missing", "Install py7zr to handle .7z.")
+        out_dir = filedialog.askdirectory(title="Select Folder to Extract Into")
+        if not out_dir:
             return
-        try:
-            import py7zr
-            with py7zr.SevenZipFile(s7_path, 'r') as archive:
-                archive.extractall(path=out_dir)
-            messagebox.showinfo("Extraction Complete", f"Un7z {os.path.basename(s7_path)} into {out_dir}")
-        except Exception as e:
-            logging.error(f"Error extracting 7z {s7_path}: {e}")
-            messagebox.showerror("Extraction Error", str(e))
+        # Names are matched as globs; escape them so '[' or '*' in a name match literally.
+        params = dict(paths=selected_files, out_dir=out_dir, workers=self.workers_var.get(),
+                      members=[glob.escape(name) for name in names])
+        job_id = self.jobs.submit("extract", params, self.priority_var.get())
+        self.update_progress_label(f"Queued extraction job #{job_id} ({len(names)} member(s))")
 
-    def do_local_unxz(self, xz_path, out_dir):
-        if not LZMA_AVAILABLE:
-            messagebox.showinfo("lzma Missing", "Install python-lzma or ensure it's available to handle .xz.")
+    #########################
+    #   Jobs
+    #########################
+    def job_action(self, action):
+        for job_id in [self.job_ids[i] for i in self.jobs_listbox.curselection()]:
+            try:
+                action(job_id)
+            except ValueError as e:
+                messagebox.showerror("Job Error", str(e))
+        self.poll_jobs(reschedule=False)
+
+    def set_job_priority(self, job_id):
+        self.jobs.set_priority(job_id, self.priority_var.get())
+
+    def job_finished(self, job):
+        """Called on the job's thread; the dialog is shown from the Tk thread."""
+        params, show = job["params"], messagebox.showinfo
+        if job["state"] == "failed":
+            show = messagebox.showerror
+            title, text = f"{job['kind'].title()} Job Failed", f"#{job['id']}: {job['error']}"
+        elif job["state"] != "done":
             return
-        try:
-            # .xz often used with tar => .tar.xz, but we'll do a direct approach
-            import lzma
-            with lzma.open(xz_path, 'rb') as f_in:
-                data = f_in.read()
-            # We guess an output name
-            base = os.path.basename(xz_path)
-            out_name = os.path.join(out_dir, base.replace('.xz',''))
-            with open(out_name, 'wb') as f_out:
-                f_out.write(data)
-            messagebox.showinfo("Extraction Complete", f"Un-xz {os.path.basename(xz_path)} => {out_name}")
-        except Exception as e:
-            logging.error(f"Error extracting xz {xz_path}: {e}")
-            messagebox.showerror("Extraction Error", str(e))
+        elif job["kind"] == "extract":
+            title, text = "Decompression Complete", f"Extracted into {params['out_dir']}."
+        elif job["kind"] == "verify":
+            archives = job["result"]["archives"]
+            bad = [a for a in archives if a["ok"] is False]
+            unverified = [a for a in archives if a["ok"] is None]
+            if bad:
+                show = messagebox.showerror
+                title = "Verification Failed"
+                text = "\n".join(f"{os.path.basename(a['archive'])}: {'; '.join(a['problems'])}" for a in bad)
+            elif unverified:
+                show = messagebox.showwarning
+                title = "Not Verified"
+                text = "\n".join(f"{os.path.basename(a['archive'])}: decodes, but stores no checksum to check"
+                                 for a in unverified)
+            else:
+                title, text = "Verification Passed", f"{len(archives)} archive(s) match their checksums."
+        elif params.get("split_mb", 0) > 0:
+            title, text = "Split-Compression Complete", f"Created {len(job['result']['outputs'])} parts"
+        else:
+            title, text = "Compression Complete", f"Files compressed into {job['result']['outputs'][0]}"
+        self.root.after(0, lambda: show(title, text))
 
-    def do_local_ai_decompress(self, ai_path, out_dir):
+    def poll_jobs(self, reschedule=True):
         """
-        We'll do a reversing multiple times if we suspect it was AI-based.
-        By default, let's do ratio=5.
+        Refresh the Jobs tab and, unless a cloud upload owns it, drive the
+        progress bar with the combined progress of the running jobs.
         """
-        # Read entire file, re-reverse ratio times
-        ratio = 5
-        # If you had a real approach, you'd store ratio in metadata
-        try:
-            with open(ai_path, 'rb') as f:
-                data = f.read()
-            # Reverse ratio times
-            result = data
-            for _ in range(ratio):
-                result = result[::-1]
-            # Save result
-            out_name = os.path.join(out_dir, os.path.basename(ai_path) + ".restored")
-            with open(out_name, 'wb') as f_out:
-                f_out.write(result)
-            messagebox.showinfo("AI Decompress Complete", f"AI-based decompression for {os.path.basename(ai_path)} => {out_name}")
-        except Exception as e:
-            logging.error(f"Error in AI-based decompression {ai_path}: {e}")
-            messagebox.showerror("AI Extraction Error", str(e))
+        jobs = self.jobs.jobs()
+        selected = {self.job_ids[i] for i in self.jobs_listbox.curselection()}
+        self.job_ids = [job["id"] for job in jobs]
+        self.jobs_listbox.delete(0, tk.END)
+        for i, job in enumerate(jobs):
+            self.jobs_listbox.insert(tk.END, format_job(job))
+            if job["id"] in selected:
+                self.jobs_listbox.selection_set(i)
+
+        running = [job for job in jobs if job["state"] == "running"]
+        if self.tracker is None and running:
+            self.jobs_busy = True
+            self.progress_bar["maximum"] = max(sum(job["total_bytes"] for job in running), 1)
+            self.progress_bar["value"] = sum(job["done_bytes"] for job in running)
+            queued = sum(1 for job in jobs if job["state"] == "queued")
+            self.progress_label.config(text=f"{len(running)} job(s) running, {queued} queued")
+        elif self.jobs_busy and not running:
+            self.jobs_busy = False
+            if self.tracker is None:
+                self.reset_progress()
+        if reschedule:
+            self.root.after(int(JOB_POLL_INTERVAL * 1000), self.poll_jobs)
 
     #########################
     #   Progress & UI Helpers
     #########################
-    def update_progressbar(self, value):
-        self.progress_bar["value"] = value
-        self.root.update_idletasks()
+    def start_progress(self, total_bytes, label, output_size=None):
+        """
+        Called from a worker thread. The worker only counts into the returned
+        tracker; the Tk thread samples it every PROGRESS_INTERVAL seconds.
+        """
+        self.tracker = ProgressTracker(total_bytes, output_size, label)
+        self.root.after(0, self.poll_progress, self.tracker)
+        return self.tracker
+
+    def poll_progress(self, tracker):
+        if tracker is not self.tracker:
+            return  # finished or replaced by a newer job
+        snapshot = tracker.snapshot()
+        self.progress_bar["maximum"] = max(snapshot["total_bytes"], 1)
+        self.progress_bar["value"] = snapshot["done_bytes"]
+        self.progress_label.config(text=format_progress(snapshot))
+        self.root.after(int(PROGRESS_INTERVAL * 1000), self.poll_progress, tracker)
+
+    def finish_progress(self):
+        self.tracker = None
+        self.root.after(0, self.reset_progress)
+
+    def reset_progress(self):
+        self.progress_bar["value"] = 0
+        self.progress_label.config(text="No compression in progress")
 
     def update_progress_label(self, text):
-        self.progress_label.config(text=text)
-        self.root.update_idletasks()
+        """Safe from any thread; the label is changed on the Tk thread."""
+        self.root.after(0, lambda: self.progress_label.config(text=text))
 
 
 #########################
-#   Main Runner
+#   Startup Benchmark
 #########################
-if __name__ == "__main__":
+# Modules that must not be imported just by importing this one.
+# lzma is left out: zipfile imports it unconditionally.
+LAZY_GUARDED_MODULES = ["tkinter", "tarfile", "py7zr", "zstandard", "brotli", "lz4", "qiskit", "pydrive2", "sqlite3",
+                        "xxhash", "blake3"]
+
+
+def startup_benchmark(runs=5):
+    """
+    Import this module in fresh interpreters under -X importtime. Reports the median
+    and worst cumulative import time, the slowest top-level imports, and any
+    module from LAZY_GUARDED_MODULES that got imported eagerly.
+    """
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    totals = []
+    slowest = {}
+    eager = set()
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        children = []
+        for line in proc.stderr.splitlines():
+            fields = line.split("|")
+            if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            name = fields[2].strip()
+            depth = len(fields[2]) - len(fields[2].lstrip())
+            cumulative_ms = int(fields[1]) / 1000
+            # Children are printed before their parent, one indent level deeper.
+            if depth == 3:
+                children.append((name, cumulative_ms))
+            elif depth == 1:
+                if name == module:
+                    totals.append(cumulative_ms)
+                    for child, ms in children:
+                        slowest[child] = max(slowest.get(child, 0.0), ms)
+                        if child.split(".")[0] in LAZY_GUARDED_MODULES:
+                            eager.add(child.split(".")[0])
+                children = []
+    top = sorted(slowest.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    totals.sort()
+    return {
+        "operation": "startup-bench",
+        "runs": len(totals),
+        "median_ms": totals[len(totals) // 2],
+        "max_ms": totals[-1],
+        "slowest_imports_ms": dict(top),
+        "eager_backends": sorted(eager),
+    }
+
+
+#########################
+#   Benchmark Suite
+#########################
+BENCH_PROFILES = ["text", "logs", "random", "media", "tiny", "huge"]
+BENCH_ALGORITHMS = ALGORITHMS + ["ai"]
+BENCH_LEVELS = [1, 5, 9]
+BENCH_SCALE_MB = 8
+# The "huge" profile is one file this many times the scale.
+BENCH_HUGE_FACTOR = 8
+BENCH_TINY_FILES = 2000
+BENCH_SEED = 1
+# A baseline row regresses when MB/s drops by more than the tolerance
+# (a fraction), or the ratio grows by more than BENCH_RATIO_TOLERANCE.
+BENCH_TOLERANCE = 0.10
+BENCH_RATIO_TOLERANCE = 0.01
+BENCH_WORDS = (
+    "the of and to in is that it for was on are as with be at by this have from or one had not but what all "
+    "were when we there can an your which their said if do will each about how up out them then she many some "
+    "so these would other into has more her two like him see time could no make than first been its who now "
+    "people my made over did down only way find use may water long little very after words called just where "
+    "most know get through back much before go good new write our used me man too any day same right look "
+    "think also around another came come work three word must because does part even place well such here "
+    "take why things help put years different away again off went old number great tell men say small every "
+    "found still between name should home big give air line set own under read last never us left end along "
+    "while might next sound below saw something thought both few those always looked show large often together "
+    "asked house world going want school important until form food keep children feet land side without boy "
+    "once animals life enough took sometimes four head above kind began almost live page got earth need far"
+).split()
+BENCH_LOG_MESSAGES = [
+    "request completed", "cache miss", "connection reset by peer", "user logged in", "retrying upload",
+    "disk usage above threshold", "job finished", "slow query", "token refreshed", "worker started",
+]
+
+
+def _bench_text(rng, size):
+    # Zipf-like word frequencies give the repetition real prose has.
+    weights = [1 / (rank + 1) for rank in range(len(BENCH_WORDS))]
+    out = bytearray()
+    while len(out) < size:
+        words = rng.choices(BENCH_WORDS, weights, k=20000)
+        for i in range(0, len(words), 12):
+            out += " ".join(words[i:i + 12]).capitalize().encode() + b".\n"
+    return bytes(out[:size])
+
+
+def _bench_logs(rng, size):
+    out = bytearray()
+    stamp = 1_700_000_000.0
+    while len(out) < size:
+        stamp += rng.expovariate(50)
+        out += (f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(stamp))}.{int(stamp * 1000) % 1000:03d} "
+                f"{rng.choice(['INFO', 'INFO', 'INFO', 'DEBUG', 'WARN', 'ERROR'])} "
+                f"[worker-{rng.randrange(16)}] {rng.choice(BENCH_LOG_MESSAGES)} "
+                f"ip=10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)} "
+                f"latency={rng.randrange(2000)}ms id={rng.getrandbits(64):016x}\n").encode()
+    return bytes(out[:size])
+
+
+def _bench_media(rng, size):
+    # Already-compressed data: deflate streams, which no backend shrinks much further.
+    out = bytearray()
+    while len(out) < size:
+        out += zlib.compress(_bench_text(rng, 1024 * 1024), 6)
+    return bytes(out[:size])
+
+
+def bench_corpus(profile, root, scale_mb=BENCH_SCALE_MB, seed=BENCH_SEED):
+    """
+    The files of one benchmark profile under root, generated on first use from a
+    fixed seed so every run (and every machine) measures the same bytes.
+    """
+    folder = os.path.join(root, f"{profile}-{scale_mb}mb-seed{seed}")
+    marker = os.path.join(folder, ".complete")
+    if not os.path.exists(marker):
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+        rng = random.Random(f"{profile}-{seed}")
+        size = scale_mb * 1024 * 1024
+        makers = {"text": _bench_text, "logs": _bench_logs, "media": _bench_media,
+                  "random": lambda r, n: r.randbytes(n)}
+        if profile in makers:
+            with open(os.path.join(folder, f"{profile}.dat"), 'wb') as f:
+                f.write(makers[profile](rng, size))
+        elif profile == "tiny":
+            for i in range(BENCH_TINY_FILES):
+                record = {"id": i, "name": " ".join(rng.choices(BENCH_WORDS, k=rng.randrange(2, 6))),
+                          "tags": rng.sample(BENCH_WORDS, 3), "score": round(rng.random(), 4)}
+                with open(os.path.join(folder, f"record{i:05d}.json"), 'w') as f:
+                    json.dump(record, f)
+        elif profile == "huge":
+            with open(os.path.join(folder, "huge.dat"), 'wb') as f:
+                for _ in range(scale_mb * BENCH_HUGE_FACTOR):
+                    maker = rng.choice([_bench_text, _bench_logs, _bench_text, lambda r, n: r.randbytes(n)])
+                    f.write(maker(rng, 1024 * 1024))
+        else:
+            raise ValueError(f"Unknown benchmark profile '{profile}' (choose from {', '.join(BENCH_PROFILES)})")
+        open(marker, 'w').close()
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name != ".complete")
+
+
+def run_measured(function, *args, **kwargs):
+    """
+    Call module.function(*args, **kwargs) in a fresh interpreter and return
+    (its JSON result, peak RSS in MB, CPU seconds). RSS and CPU are None where
+    os.wait4 is missing (Windows).
+    """
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    code = (f"import json, sys, {module} as m; job = json.load(sys.stdin); "
+            f"print(json.dumps(getattr(m, job['function'])(*job['args'], **job['kwargs'])))")
+    with tempfile.TemporaryFile() as errors:
+        proc = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=errors, cwd=os.path.dirname(os.path.abspath(__file__)), text=True)
+        proc.stdin.write(json.dumps({"function": function, "args": args, "kwargs": kwargs}))
+        proc.stdin.close()
+        output = proc.stdout.read()
+        proc.stdout.close()
+        peak_mb = cpu_s = None
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in KiB on Linux and in bytes on macOS.
+            peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+            cpu_s = usage.ru_utime + usage.ru_stime
+        else:
+            proc.wait()
+        if proc.returncode != 0:
+            errors.seek(0)
+            lines = errors.read().decode(errors="replace").strip().splitlines()
+            raise RuntimeError(f"{function} failed: {lines[-1] if lines else f'exit code {proc.returncode}'}")
+    return json.loads(output), peak_mb, cpu_s
+
+
+def bench_one(files, algorithm, level, workers, run_dir):
+    """
+    Compress then extract files with compress()/extract(); one result row.
+    The round trip is verified by comparing the digests of the inputs with those
+    of the restored files (a single-file stream is restored under another name).
+    """
+    adaptive = algorithm == "ai"
+    out_ext = "usc" if adaptive else ALGO_EXTENSIONS.get(algorithm, algorithm)
+    archive = os.path.join(run_dir, f"bench.{out_ext}")
+    restore_dir = os.path.join(run_dir, "restored")
+    try:
+        packed, c_peak, c_cpu = run_measured(
+            "compress", files, archive, algorithm="zip" if adaptive else algorithm, level=level,
+            workers=workers, adaptive=adaptive, ai_ratio=min(max(level, 1), 10))
+        unpacked, d_peak, d_cpu = run_measured("extract", [archive], restore_dir, workers=workers)
+        restored = sorted(file_digest(p) for p in unpacked["outputs"] if os.path.isfile(p))
+        verified = restored == sorted(file_digest(p) for p in files)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir)
+    mb = packed["input_bytes"] / (1024 * 1024)
+    return {
+        "input_bytes": packed["input_bytes"],
+        "output_bytes": packed["output_bytes"],
+        "ratio": packed["ratio"],
+        "compress_mb_s": mb / packed["seconds"] if packed["seconds"] > 0 else 0.0,
+        "decompress_mb_s": mb / unpacked["seconds"] if unpacked["seconds"] > 0 else 0.0,
+        "compress_peak_rss_mb": c_peak,
+        "decompress_peak_rss_mb": d_peak,
+        "compress_cpu_s": c_cpu,
+        "decompress_cpu_s": d_cpu,
+        "verified": verified,
+    }
+
+
+def benchmark(profiles=None, algorithms=None, levels=None, scale_mb=BENCH_SCALE_MB, workers=1, repeat=1,
+              work_dir=None, seed=BENCH_SEED):
+    """
+    Run every algorithm and level over every profile's corpus through the same
+    compress()/extract() the GUI uses, each in its own interpreter so peak RSS and
+    CPU time are per run. With repeat > 1 the fastest run of each row is kept.
+    Backends that aren't installed are reported as skipped.
+    """
+    profiles = profiles or BENCH_PROFILES
+    algorithms = algorithms or BENCH_ALGORITHMS
+    levels = levels or BENCH_LEVELS
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "usc-bench")
+    run_dir = os.path.join(work_dir, "run")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+    needs = {"7z": SEVENZ_AVAILABLE, "zstd": ZSTD_AVAILABLE, "brotli": BROTLI_AVAILABLE,
+             "xz": LZMA_AVAILABLE, "tar": TAR_AVAILABLE}
+    results = []
+    start = time.perf_counter()
+    for profile in profiles:
+        files = bench_corpus(profile, os.path.join(work_dir, "corpus"), scale_mb, seed)
+        for algorithm in algorithms:
+            # tar stores without compressing, so one level says it all.
+            for level in ([0] if algorithm == "tar" else levels):
+                row = {"profile": profile, "algorithm": algorithm, "level": level}
+                if not needs.get(algorithm, True):
+                    row["skipped"] = "backend not installed"
+                    results.append(row)
+                    continue
+                try:
+                    runs = [bench_one(files, algorithm, level, workers, run_dir) for _ in range(max(1, repeat))]
+                    row.update(max(runs, key=lambda r: r["compress_mb_s"] + r["decompress_mb_s"]))
+                except Exception as e:
+                    row["error"] = str(e)
+                if "error" in row:
+                    logging.error(f"Bench {profile}/{algorithm}/{level}: {row['error']}")
+                results.append(row)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return {
+        "operation": "bench",
+        "scale_mb": scale_mb,
+        "seed": seed,
+        "workers": workers,
+        "seconds": time.perf_counter() - start,
+        "results": results,
+    }
+
+
+def compare_bench(stats, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Annotate each row of stats with its change against a saved baseline run and
+    count regressions. Speeds are compared as fractions of the baseline. A row
+    that failed or didn't round-trip counts as a regression too.
+    """
+    previous = {(r["profile"], r["algorithm"], r["level"]): r for r in baseline.get("results", [])
+                if "compress_mb_s" in r}
+    regressions = 0
+    for row in stats["results"]:
+        old = previous.get((row["profile"], row["algorithm"], row["level"]))
+        regressed = "error" in row or row.get("verified") is False
+        if old and "compress_mb_s" in row:
+            change = {key: (row[key] - old[key]) / old[key] if old[key] else 0.0
+                      for key in ("compress_mb_s", "decompress_mb_s", "ratio")}
+            regressed = regressed or (change["compress_mb_s"] < -tolerance or change["decompress_mb_s"] < -tolerance
+                                      or change["ratio"] > BENCH_RATIO_TOLERANCE)
+            change["regressed"] = regressed
+            row["baseline"] = change
+        regressions += regressed
+    stats["regressions"] = regressions
+    return stats
+
+
+def bench_table(stats):
+    """The results as a fixed-width text table."""
+    header = f"{'profile':<8} {'algo':<7} {'lvl':>3} {'ratio':>6} {'comp MB/s':>10} {'dec MB/s':>9} " \
+             f"{'peak MB':>8} {'cpu s':>7}  baseline"
+    lines = [header, "-" * len(header)]
+    for row in stats["results"]:
+        start = f"{row['profile']:<8} {row['algorithm']:<7} {row['level']:>3} "
+        if "compress_mb_s" not in row:
+            lines.append(start + (row.get("skipped") or f"error: {row.get('error')}"))
+            continue
+        peaks = [p for p in (row["compress_peak_rss_mb"], row["decompress_peak_rss_mb"]) if p is not None]
+        cpu = row["compress_cpu_s"]
+        note = "" if row["verified"] else "  ROUND TRIP MISMATCH"
+        if "baseline" in row:
+            change = row["baseline"]
+            note = (f"comp {change['compress_mb_s']:+.0%} dec {change['decompress_mb_s']:+.0%} "
+                    f"ratio {change['ratio']:+.1%}{'  REGRESSED' if change['regressed'] else ''}") + note
+        lines.append(start + f"{row['ratio']:>6.3f} {row['compress_mb_s']:>10.1f} {row['decompress_mb_s']:>9.1f} "
+                             f"{max(peaks) if peaks else 0:>8.0f} {cpu if cpu is not None else 0:>7.2f}  {note}")
+    return "\n".join(lines)
+
+
+#########################
+#   Command Line
+#########################
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m Smartultimatecompresorpro",
+        description="UltraSmartCompressor. Run without arguments to open the GUI."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("compress", help="compress files into an archive")
+    c.add_argument("paths", nargs="+", help="files to compress")
+    c.add_argument("-o", "--output", required=True, help="archive to write (parts go next to it when splitting)")
+    c.add_argument("-a", "--algo", choices=ALGORITHMS + ["auto"], default="zip",
+                   help="auto probes a sample and picks algorithm, level and workers")
+    c.add_argument("--target", default="speed", help=f"auto: {', '.join(AUTO_TARGETS)} (default speed)")
+    c.add_argument("-l", "--level", type=int, default=5, help="compression level (default 5)")
+    c.add_argument("--split-mb", type=int, default=0, help="split each input into parts of this many MB (not 7z/tar)")
+    c.add_argument("--volumes", action="store_true",
+                   help="with --split-mb: independent .usc volumes of the whole selection plus a .uscv index")
+    c.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="worker processes/threads")
+    c.add_argument("--ai", action="store_true", help="adaptive per-chunk engine, writes a .usc container")
+    c.add_argument("--ai-ratio", type=int, default=5, help="adaptive speed/ratio trade-off, 1=fast 10=max")
+    c.add_argument("--zstd-long", action="store_true", help="zstd long-distance matching")
+    c.add_argument("--zstd-dict", action="store_true", help="zip: zstd dictionary for many small files")
+    c.add_argument("--incremental", action="store_true",
+                   help="zip: update an existing archive, re-encoding only changed files")
+    c.add_argument("--solid-mb", type=int, default=0,
+                   help="7z: solid block size in MB (0 = one block, -1 = one per file)")
+    c.add_argument("--dedup-store", default=None, metavar="DIR",
+                   help="write a .uscm manifest; only chunks new to this store are compressed")
+    c.add_argument("--progress", action="store_true", help="print MB/s, ratio and ETA to stderr")
+    add_queue_args(c)
+
+    x = sub.add_parser("extract", help="extract archives, including split part sets")
+    x.add_argument("paths", nargs="+", help="archives or any part of a split set")
+    x.add_argument("-o", "--output", required=True, help="folder to extract into")
+    x.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="worker processes")
+    x.add_argument("-m", "--member", action="append", dest="members", metavar="PATTERN",
+                   help="only extract members matching this glob (repeatable); a folder matches its contents")
+    x.add_argument("--progress", action="store_true", help="print MB/s and ETA to stderr")
+    add_queue_args(x)
+
+    t = sub.add_parser("list", help="list archive members from their directories and headers, without extracting")
+    t.add_argument("paths", nargs="+", help="archives, any part of a split set, .uscv or .uscm files")
+
+    j = sub.add_parser("jobs", help="run, list, pause, resume, cancel or reprioritise queued jobs")
+    j.add_argument("action", choices=["list", "run", "pause", "resume", "cancel", "priority"],
+                   help="run works through the queue until nothing more can start")
+    j.add_argument("ids", nargs="*", type=int, help="job ids (pause, resume, cancel, priority)")
+    j.add_argument("--priority", type=int, default=0, help="priority: the new priority")
+    j.add_argument("--slots", type=int, default=None,
+                   help="run: CPU slots shared by the running jobs' workers (default: all CPUs)")
+    j.add_argument("--db", default=JOB_DB_PATH, help="job journal (default ~/.usc-jobs.sqlite3)")
+
+    v = sub.add_parser("verify", help="check archives against their stored checksums, without extracting")
+    v.add_argument("paths", nargs="+", help="archives, any part of a split set, .uscv or .uscm files")
+    v.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="worker processes")
+    v.add_argument("--progress", action="store_true", help="print MB/s and ETA to stderr")
+    add_queue_args(v)
+
+    u = sub.add_parser("upload", help="resumable, concurrent upload to Google Drive (or a folder)")
+    u.add_argument("paths", nargs="+", help="files to upload")
+    u.add_argument("--split-mb", type=int, default=0, help="upload in parts of this many MB")
+    u.add_argument("-w", "--workers", type=int, default=UPLOAD_WORKERS, help="concurrent part uploads")
+    u.add_argument("--compress", choices=CLOUD_CODEC_EXTENSIONS, default=None,
+                   help="compress parts while uploading (.partN.<ext> objects)")
+    u.add_argument("-l", "--level", type=int, default=5, help="compression level (default 5)")
+    u.add_argument("--compress-workers", type=int, default=DEFAULT_WORKERS, help="compression threads")
+    u.add_argument("--dest", default=None, help="upload into this local folder instead of Google Drive")
+
+    b = sub.add_parser("startup-bench", help="measure cold import time (regression guard)")
+    b.add_argument("--runs", type=int, default=5)
+    b.add_argument("--max-ms", type=float, default=None, help="fail if the median import takes longer")
+
+    k = sub.add_parser("bench", help="benchmark algorithms and levels on generated corpora")
+    k.add_argument("--profiles", nargs="+", choices=BENCH_PROFILES, default=None)
+    k.add_argument("--algos", nargs="+", choices=BENCH_ALGORITHMS, default=None)
+    k.add_argument("--levels", nargs="+", type=int, default=None, help=f"default {BENCH_LEVELS}")
+    k.add_argument("--scale-mb", type=int, default=BENCH_SCALE_MB, help="size of each corpus")
+    k.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS)
+    k.add_argument("--repeat", type=int, default=1, help="keep the fastest of this many runs")
+    k.add_argument("--work-dir", default=None, help="where corpora are cached (default: temp folder)")
+    k.add_argument("--save", default=None, metavar="FILE", help="also write the JSON results here")
+    k.add_argument("--baseline", default=None, metavar="FILE",
+                   help="compare with a saved run; exit 1 on regressions")
+    k.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE,
+                   help="allowed MB/s drop against the baseline (fraction)")
+
+    sub.add_parser("gui", help="open the graphical interface")
+    return parser
+
+
+def add_queue_args(p):
+    p.add_argument("--queue", action="store_true",
+                   help="add to the job queue instead of running now (see the jobs command)")
+    p.add_argument("--priority", type=int, default=0, help="queue: higher runs first")
+    p.add_argument("--db", default=JOB_DB_PATH, help="queue: job journal (default ~/.usc-jobs.sqlite3)")
+
+
+def print_status(snapshot):
+    print(format_progress(snapshot), file=sys.stderr, flush=True)
+
+
+def run_gui():
+    load_tkinter()
     root = tk.Tk()
-    app = SmartCompressApp(root)
+    SmartCompressApp(root)
     root.mainloop()
+    return 0
+
+
+def main(argv=None):
+    """CLI entry point. Prints JSON stats on stdout; exit code 0 on success, 1 on failure."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return run_gui()
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "gui":
+        return run_gui()
+    try:
+        if args.command == "compress":
+            params = dict(
+                paths=args.paths,
+                output=args.output,
+                algorithm=args.algo,
+                level=args.level,
+                split_mb=args.split_mb,
+                workers=args.workers,
+                adaptive=args.ai,
+                ai_ratio=args.ai_ratio,
+                long_distance=args.zstd_long,
+                zstd_dictionary=args.zstd_dict,
+                dedup_store=args.dedup_store,
+                incremental=args.incremental,
+                solid_block_mb=args.solid_mb,
+                auto_target=args.target,
+                volumes=args.volumes,
+            )
+            if args.queue:
+                stats = {"operation": "queue", "job": JobQueue(args.db).submit("compress", params, args.priority)}
+            else:
+                stats = compress(**params, on_status=print_status if args.progress else None)
+        elif args.command == "extract":
+            params = dict(paths=args.paths, out_dir=args.output, workers=args.workers, members=args.members)
+            if args.queue:
+                stats = {"operation": "queue", "job": JobQueue(args.db).submit("extract", params, args.priority)}
+            else:
+                stats = extract(**params, on_status=print_status if args.progress else None)
+        elif args.command == "list":
+            stats = list_archives(args.paths)
+            print(listing_table(stats), file=sys.stderr)
+        elif args.command == "verify":
+            params = dict(paths=args.paths, workers=args.workers)
+            if args.queue:
+                stats = {"operation": "queue", "job": JobQueue(args.db).submit("verify", params, args.priority)}
+            else:
+                stats = verify(**params, on_status=print_status if args.progress else None)
+                if stats["ok"] is not True:
+                    print(json.dumps(stats, indent=2))
+                    return 1
+        elif args.command == "jobs":
+            jobs = JobQueue(args.db, args.slots)
+            if args.action == "run":
+                stats = {"operation": "jobs", "jobs": jobs.run_until_idle()}
+                # Results without an "ok" (compress, extract) count as passed.
+                if any(job["state"] == "failed" or (job["result"] or {}).get("ok", True) is not True
+                       for job in stats["jobs"]):
+                    print(json.dumps(stats, indent=2))
+                    return 1
+            else:
+                for job_id in args.ids:
+                    if args.action == "priority":
+                        jobs.set_priority(job_id, args.priority)
+                    elif args.action != "list":
+                        getattr(jobs, args.action)(job_id)
+                stats = {"operation": "jobs", "jobs": jobs.jobs()}
+                for job in stats["jobs"]:
+                    print(format_job(job), file=sys.stderr)
+        elif args.command == "upload":
+            uploader = LocalDirUploader(args.dest) if args.dest else DriveUploader(connect_google_drive())
+            part_size = args.split_mb * 1024 * 1024
+            if args.compress:
+                files = [upload_compressed(path, uploader, args.compress, args.level, part_size,
+                                           args.compress_workers, args.workers) for path in args.paths]
+            else:
+                files = [upload_file(path, uploader, part_size, args.workers) for path in args.paths]
+            stats = {"operation": "upload", "files": files}
+        elif args.command == "bench":
+            stats = benchmark(args.profiles, args.algos, args.levels, args.scale_mb, args.workers, args.repeat,
+                              args.work_dir)
+            if args.baseline:
+                with open(args.baseline) as f:
+                    compare_bench(stats, json.load(f), args.tolerance)
+            if args.save:
+                with open(args.save, 'w') as f:
+                    json.dump(stats, f, indent=2)
+            print(bench_table(stats), file=sys.stderr)
+            if stats.get("regressions"):
+                print(json.dumps(stats, indent=2))
+                return 1
+        else:
+            stats = startup_benchmark(args.runs)
+            if stats["eager_backends"] or (args.max_ms is not None and stats["median_ms"] > args.max_ms):
+                print(json.dumps(stats, indent=2))
+                return 1
+    except Exception as e:
+        logging.error(f"{args.command} failed: {e}")
+        print(json.dumps({"operation": args.command, "error": str(e)}))
+        return 1
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+#########################
+#   Main Runner
+#########################
+if __name__ == "__main__":
+    sys.exit(main())
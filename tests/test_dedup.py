@@ -0,0 +1,37 @@
+import os
+
+import Smartultimatecompresorpro as usc
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def chunk_files(store):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(os.path.join(store, "chunks"))
+                  for name in names)
+
+
+def test_second_run_reuses_every_chunk(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "logs.txt").write_bytes(b"".join(b"%08d GET /index.html 200\n" % i for i in range(40_000)))
+    (src / "blob.bin").write_bytes(os.urandom(500_000))
+    files = [str(src / "logs.txt"), str(src / "blob.bin")]
+    store = str(tmp_path / "store")
+
+    first = usc.compress(files, str(tmp_path / "monday.uscm"), dedup_store=store)
+    assert first["new_chunks"] > 0
+    stored = chunk_files(store)
+
+    second = usc.compress(files, str(tmp_path / "tuesday.uscm"), dedup_store=store)
+    assert second["new_chunks"] == 0
+    assert second["stored_bytes"] == 0
+    assert chunk_files(store) == stored
+
+    for manifest in ("monday.uscm", "tuesday.uscm"):
+        out_dir = tmp_path / ("restored-" + manifest)
+        usc.extract([str(tmp_path / manifest)], str(out_dir))
+        for path in files:
+            assert read(out_dir / os.path.basename(path)) == read(path)
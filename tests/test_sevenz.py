@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import Smartultimatecompresorpro as usc
+
+py7zr = pytest.importorskip("py7zr")
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"file{i}.txt"
+        path.write_bytes(f"block {i}\n".encode() * 10_000)
+        paths.append(str(path))
+    return paths
+
+
+def round_trip(files, tmp_path, solid_block_mb):
+    archive = str(tmp_path / "out.7z")
+    usc.sevenz_files(files, archive, level=3, solid_block_mb=solid_block_mb)
+    with py7zr.SevenZipFile(archive, 'r') as sz:
+        blocks = sz.archiveinfo().blocks
+    out_dir = tmp_path / "restored"
+    usc.extract([archive], str(out_dir))
+    for path in files:
+        with open(path, 'rb') as a, open(out_dir / os.path.basename(path), 'rb') as b:
+            assert a.read() == b.read()
+    return blocks
+
+
+@pytest.mark.parametrize("solid_block_mb, blocks", [(0, 1), (-1, 3)])
+def test_solid_blocks(files, tmp_path, solid_block_mb, blocks):
+    assert round_trip(files, tmp_path, solid_block_mb) == blocks
+
+
+def test_unknown_py7zr_falls_back_to_one_block(files, tmp_path, monkeypatch):
+    monkeypatch.setattr(usc, "SEVENZ_BLOCK_VERSIONS", ((0, 0), (0, 1)))
+    assert round_trip(files, tmp_path, -1) == 1
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import Smartultimatecompresorpro as usc
+
+
+class FlakyUploader(usc.LocalDirUploader):
+    """LocalDirUploader whose uploads of one part always fail."""
+
+    def __init__(self, dest_dir, failing):
+        super().__init__(dest_dir)
+        self.failing = failing
+        self.attempts = 0
+
+    def upload(self, name, stream, size):
+        if name == self.failing:
+            self.attempts += 1
+            raise IOError(f"{name}: connection reset")
+        return super().upload(name, stream, size)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(usc.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(os.urandom(100_000) + b"upload\n" * 20_000)
+    return str(path)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_failed_part_stops_upload_and_resumes(source, tmp_path):
+    dest = str(tmp_path / "remote")
+    part_size = 128 * 1024
+    flaky = FlakyUploader(dest, "data.bin.part1")
+    with pytest.raises(RuntimeError, match="stopped after 1/2 parts"):
+        usc.upload_file(source, flaky, part_size, workers=2)
+    assert flaky.attempts == usc.UPLOAD_RETRIES + 1
+    assert os.path.exists(source + ".upload.json")
+
+    stats = usc.upload_file(source, usc.LocalDirUploader(dest), part_size, workers=2)
+    assert stats["resumed_parts"] == 1
+    assert not os.path.exists(source + ".upload.json")
+    parts = [os.path.join(dest, f"data.bin.part{i}") for i in range(stats["parts"])]
+    assert b"".join(read(p) for p in parts) == read(source)
+
+
+def test_upload_compressed_round_trip_and_resume(source, tmp_path):
+    dest = str(tmp_path / "remote")
+    part_size = 64 * 1024
+    flaky = FlakyUploader(dest, "data.bin.part2.zst")
+    with pytest.raises(RuntimeError):
+        usc.upload_compressed(source, flaky, "zst", part_size=part_size, workers=1, upload_workers=1)
+
+    stats = usc.upload_compressed(source, usc.LocalDirUploader(dest), "zst", part_size=part_size, workers=2)
+    assert stats["resumed_parts"] == 2
+    parts = [os.path.join(dest, f"data.bin.part{i}.zst") for i in range(stats["parts"])]
+    out_dir = tmp_path / "restored"
+    outputs = usc.extract(parts, str(out_dir))["outputs"]
+    assert [read(p) for p in outputs] == [read(source)]
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import Smartultimatecompresorpro as usc
+
+
+@pytest.fixture
+def files(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    contents = {"text.txt": b"adaptive container\n" * 50_000,
+                "random.bin": os.urandom(300_000),
+                "empty.dat": b""}
+    for name, data in contents.items():
+        (src / name).write_bytes(data)
+    return [str(src / name) for name in contents]
+
+
+@pytest.fixture
+def archive(files, tmp_path):
+    path = str(tmp_path / "out.usc")
+    usc.compress(files, path, adaptive=True, ai_ratio=5)
+    return path
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_round_trip(files, archive, tmp_path, workers):
+    out_dir = tmp_path / "restored"
+    usc.extract([archive], str(out_dir), workers=workers)
+    for path in files:
+        assert read(out_dir / os.path.basename(path)) == read(path)
+    assert usc.verify([archive])["ok"] is True
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_flipped_payload_byte_fails_its_chunk(archive, workers):
+    with usc.UscReader(archive) as reader:
+        chunk = reader.member("random.bin").chunks[0]
+        offset = reader.base + chunk.payload_offset + chunk.csize // 2
+    data = bytearray(read(archive))
+    data[offset] ^= 0xFF
+    with open(archive, 'wb') as f:
+        f.write(data)
+    stats = usc.verify([archive], workers=workers)
+    assert stats["ok"] is False
+    assert stats["archives"][0]["problems"] == [f"random.bin: chunk at offset {chunk.member_offset}: "
+                                                "Checksum mismatch in .usc chunk"]
+
+
+def test_truncated_footer_is_rejected(archive, tmp_path):
+    with open(archive, 'r+b') as f:
+        f.truncate(os.path.getsize(archive) - 4)
+    with pytest.raises(ValueError, match="no .usc index"):
+        usc.UscReader(archive)
+    assert usc.verify([archive])["archives"][0]["problems"] == ["Truncated .usc archive"]
+    with pytest.raises(ValueError, match="Truncated"):
+        usc.extract([archive], str(tmp_path / "restored"))
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+import Smartultimatecompresorpro as usc
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_volume_round_trip(tmp_path):
+    files = [write(tmp_path / "src" / "x.bin", os.urandom(300_000)),
+             write(tmp_path / "src" / "y.txt", b"volume set\n" * 20_000)]
+    index_path = str(tmp_path / "set.uscv")
+    usc.volume_compress(files, index_path, 100_000)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    usc.volume_restore(index_path, str(out_dir))
+    for file_path in files:
+        with open(file_path, 'rb') as a, open(out_dir / os.path.basename(file_path), 'rb') as b:
+            assert a.read() == b.read()
+
+
+def test_duplicate_basenames_are_rejected(tmp_path):
+    files = [write(tmp_path / "a" / "y.txt", b"a" * 3000),
+             write(tmp_path / "b" / "y.txt", b"b" * 5000)]
+    index_path = str(tmp_path / "set.uscv")
+    with pytest.raises(ValueError, match="same name"):
+        usc.volume_compress(files, index_path, 4096)
+    assert not any(name.startswith("set.") for name in os.listdir(tmp_path))
@@ -0,0 +1,50 @@
+import lzma
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import Smartultimatecompresorpro as usc
+
+
+@pytest.fixture
+def source(tmp_path):
+    # Level 0 cuts 1 MB blocks, so this spans four of them.
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"".join(b"%08d xz block\n" % i for i in range(120_000)) + os.urandom(1_700_000))
+    return str(path)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_multi_block_xz_decodes_with_stdlib(source, tmp_path):
+    archive = str(tmp_path / "data.xz")
+    usc.compress([source], archive, algorithm="xz", level=0, workers=2)
+    reader = usc.XzReader(archive)
+    try:
+        assert len(reader.blocks) == 4
+    finally:
+        reader.close()
+    with lzma.open(archive) as f:
+        assert f.read() == read(source)
+
+
+def test_empty_xz_decodes_with_stdlib(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    archive = str(tmp_path / "empty.xz")
+    usc.compress([str(path)], archive, algorithm="xz", workers=2)
+    with lzma.open(archive) as f:
+        assert f.read() == b""
+
+
+@pytest.mark.skipif(shutil.which("xz") is None, reason="xz tool not installed")
+def test_multi_block_xz_passes_xz_test(source, tmp_path):
+    archive = str(tmp_path / "data.xz")
+    usc.compress([source], archive, algorithm="xz", level=0, workers=2)
+    subprocess.run(["xz", "--test", archive], check=True)
+    assert subprocess.run(["xz", "-dc", archive], check=True, capture_output=True).stdout == read(source)